@@ -0,0 +1,54 @@
+"""cria tabela usuario_carreira_score (compatibilidade materializada por usuário)
+
+Revision ID: 022_usuario_carreira_score
+Revises: 021_remove_vaga_compat
+Create Date: 2025-11-03
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_usuario_carreira_score'
+down_revision = '021_remove_vaga_compat'
+branch_labels = None
+depends_on = None
+
+
+# DEFAULT_MIN_FREQ de app.services.compatibilidade quando a tabela foi criada (a migração não importa a aplicação)
+MIN_FREQ = 3
+
+
+def upgrade() -> None:
+    # Tabela preenchida aqui para os usuários existentes e por criar_usuario para os novos (leituras não gravam)
+    op.create_table(
+        'usuario_carreira_score',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('usuario_id', sa.Integer(), sa.ForeignKey('usuario.id', ondelete='CASCADE'), nullable=False, index=True),
+        sa.Column('carreira_id', sa.Integer(), sa.ForeignKey('carreira.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('peso_coberto', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('peso_total', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('usuario_id', 'carreira_id', name='uq_usuario_carreira_score'),
+    )
+    op.execute(sa.text(
+        """
+        INSERT INTO usuario_carreira_score (usuario_id, carreira_id, peso_coberto, peso_total)
+        SELECT u.id, c.id,
+            COALESCE((
+                SELECT SUM(COALESCE(ch.frequencia, 0))
+                FROM carreira_habilidade ch
+                JOIN usuario_habilidade uh ON uh.habilidade_id = ch.habilidade_id
+                WHERE ch.carreira_id = c.id AND uh.usuario_id = u.id AND COALESCE(ch.frequencia, 0) >= :min_freq
+            ), 0),
+            COALESCE((
+                SELECT SUM(COALESCE(ch.frequencia, 0))
+                FROM carreira_habilidade ch
+                WHERE ch.carreira_id = c.id AND COALESCE(ch.frequencia, 0) >= :min_freq
+            ), 0)
+        FROM usuario u CROSS JOIN carreira c
+        """
+    ).bindparams(min_freq=MIN_FREQ))
+
+
+def downgrade() -> None:
+    op.drop_table('usuario_carreira_score')
@@ -0,0 +1,32 @@
+"""cria tabela extracao_cache (respostas da IA reaproveitadas por hash da descrição)
+
+Revision ID: 023_extracao_cache
+Revises: 022_usuario_carreira_score
+Create Date: 2025-11-05
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023_extracao_cache'
+down_revision = '022_usuario_carreira_score'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'extracao_cache',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('chave', sa.String(64), nullable=False, unique=True),
+        sa.Column('modelo', sa.String(50), nullable=False),
+        sa.Column('versao_prompt', sa.String(16), nullable=False),
+        sa.Column('resposta', sa.Text(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('expira_em', sa.DateTime(), nullable=False, index=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('extracao_cache')
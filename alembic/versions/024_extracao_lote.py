@@ -0,0 +1,43 @@
+"""cria tabelas extracao_lote e extracao_rascunho (extração de habilidades em lote)
+
+Revision ID: 024_extracao_lote
+Revises: 023_extracao_cache
+Create Date: 2025-11-06
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '024_extracao_lote'
+down_revision = '023_extracao_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'extracao_lote',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pendente'),
+        sa.Column('concorrencia', sa.Integer(), nullable=False),
+        sa.Column('por_minuto', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'extracao_rascunho',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('lote_id', sa.Integer(), sa.ForeignKey('extracao_lote.id', ondelete='CASCADE'), nullable=False, index=True),
+        sa.Column('vaga_id', sa.Integer(), sa.ForeignKey('vaga.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pendente'),
+        sa.Column('habilidades', sa.Text(), nullable=True),
+        sa.Column('erro', sa.Text(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint('lote_id', 'vaga_id', name='uq_extracao_rascunho_lote_vaga'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('extracao_rascunho')
+    op.drop_table('extracao_lote')
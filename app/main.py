@@ -40,3 +40,8 @@ app.include_router(mapeamentoRouter)
 app.include_router(usuarioHabilidadeRouter)
 app.include_router(usuarioRouter)
 app.include_router(vagaRouter)
+
+
+from app.services.extracao import fechar_cliente_openai_async
+
+app.add_event_handler("shutdown", fechar_cliente_openai_async) # libera o pool HTTP do cliente OpenAI assíncrono
@@ -4,4 +4,4 @@ class Categoria(Base):
     __tablename__ = 'categoria'
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(150), unique=True, nullable=False)
-    atualizado_em = Column(DateTime, server_default=func.now(), nullable=False)
\ No newline at end of file
+    atualizado_em = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
@@ -0,0 +1,11 @@
+from . import Base, Column, Integer, String, Text, DateTime, func
+
+class ExtracaoCache(Base):
+    __tablename__ = 'extracao_cache'
+    id = Column(Integer, primary_key=True, index=True)
+    chave = Column(String(64), unique=True, nullable=False)  # sha256 de descrição padronizada + versão do prompt + modelo + categorias
+    modelo = Column(String(50), nullable=False)
+    versao_prompt = Column(String(16), nullable=False)
+    resposta = Column(Text, nullable=False)  # texto bruto do modelo; interpretado e normalizado a cada leitura
+    criado_em = Column(DateTime, server_default=func.now(), nullable=False)
+    expira_em = Column(DateTime, nullable=False, index=True)
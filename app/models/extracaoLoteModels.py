@@ -0,0 +1,10 @@
+from . import Base, Column, Integer, String, DateTime, func
+
+class ExtracaoLote(Base):
+    __tablename__ = 'extracao_lote'
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, server_default='pendente')  # pendente | processando | concluido | erro (restaram rascunhos pendentes; pode ser retomado)
+    concorrencia = Column(Integer, nullable=False)  # extrações simultâneas do lote
+    por_minuto = Column(Integer, nullable=False)  # limite de chamadas à IA por minuto do lote
+    criado_em = Column(DateTime, server_default=func.now(), nullable=False)
+    finalizado_em = Column(DateTime, nullable=True)
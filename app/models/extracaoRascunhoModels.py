@@ -0,0 +1,14 @@
+from . import Base, Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint, func
+
+class ExtracaoRascunho(Base):
+    __tablename__ = 'extracao_rascunho'
+    id = Column(Integer, primary_key=True, index=True)
+    lote_id = Column(Integer, ForeignKey('extracao_lote.id', ondelete='CASCADE'), nullable=False, index=True)
+    vaga_id = Column(Integer, ForeignKey('vaga.id', ondelete='CASCADE'), nullable=False)
+    status = Column(String(20), nullable=False, server_default='pendente')  # pendente | concluido | erro
+    habilidades = Column(Text, nullable=True)  # JSON com os itens do preview, aguardando confirmação do administrador
+    erro = Column(Text, nullable=True)
+    atualizado_em = Column(DateTime, server_default=func.now(), nullable=False)
+    __table_args__ = (
+        UniqueConstraint('lote_id', 'vaga_id', name='uq_extracao_rascunho_lote_vaga'),
+    )
@@ -5,7 +5,7 @@ class Habilidade(Base):
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(150), unique=True, nullable=False)
     categoria_id = Column(Integer, ForeignKey('categoria.id', ondelete='RESTRICT'), nullable=False)
-    atualizado_em = Column(DateTime, server_default=func.now(), nullable=False)
+    atualizado_em = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     categoria_rel = relationship('Categoria', backref='habilidades')
 
     # leitura do nome da categoria para mostrar no front
@@ -5,4 +5,4 @@ class Normalizacao(Base):
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(200), unique=True, nullable=False)  # regex/padrão (ex.: r"^node(js)?$")
     nome_padronizado = Column(String(150), nullable=False)   # valor canônico (ex.: "Node.js")
-    atualizado_em = Column(DateTime, server_default=func.now(), nullable=False)
\ No newline at end of file
+    atualizado_em = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
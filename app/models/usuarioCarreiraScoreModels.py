@@ -0,0 +1,12 @@
+from . import Base, Column, Integer, ForeignKey, UniqueConstraint
+
+class UsuarioCarreiraScore(Base):
+    __tablename__ = 'usuario_carreira_score'
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey('usuario.id', ondelete='CASCADE'), nullable=False, index=True)
+    carreira_id = Column(Integer, ForeignKey('carreira.id', ondelete='CASCADE'), nullable=False)
+    peso_coberto = Column(Integer, nullable=False, default=0) # soma das frequências das habilidades da carreira que o usuário possui
+    peso_total = Column(Integer, nullable=False, default=0) # soma das frequências de todas as habilidades da carreira
+    __table_args__ = (
+        UniqueConstraint('usuario_id', 'carreira_id', name='uq_usuario_carreira_score'),
+    )
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends 
-from app.services.carreira import criar_carreira, listar_carreiras, buscar_carreira_por_id, atualizar_carreira, deletar_carreira 
+from fastapi import APIRouter, HTTPException, Depends, Request 
+from app.services.carreira import criar_carreira, iterar_carreiras, buscar_carreira_por_id, atualizar_carreira, deletar_carreira 
 from app.schemas.carreiraSchemas import CarreiraBase, CarreiraOut 
 from app.dependencies import pegar_sessao, requer_admin 
+from app.utils.streaming import resposta_streaming
 from sqlalchemy.orm import Session 
 from app.models.carreiraModels import Carreira 
 from app.models.usuarioModels import Usuario
@@ -11,9 +12,9 @@ carreiraRouter = APIRouter(prefix="/carreira", tags=["carreira"])
 
 
 @carreiraRouter.get("/", response_model=list[CarreiraOut]) 
-async def get_carreiras(session: Session = Depends(pegar_sessao)):
-    """Retorna uma lista de todas as carreiras cadastradas no sistema"""
-    return listar_carreiras(session)
+async def get_carreiras(request: Request, session: Session = Depends(pegar_sessao)):
+    """Retorna uma lista de todas as carreiras cadastradas no sistema (transmitidas em JSON ou NDJSON conforme o Accept)"""
+    return resposta_streaming(request, iterar_carreiras(session), session)
 
 
 @carreiraRouter.get("/{carreira_id}", response_model=CarreiraOut) 
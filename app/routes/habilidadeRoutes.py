@@ -1,18 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.schemas.habilidadeSchemas import HabilidadeOut, HabilidadeAtualizar
 from app.models.categoriaModels import Categoria
-from app.services.habilidade import listar_habilidades, buscar_habilidade_por_id, atualizar_habilidade, deletar_habilidade
+from app.services.habilidade import iterar_habilidades, buscar_habilidade_por_id, atualizar_habilidade, deletar_habilidade
 from app.dependencies import pegar_sessao, requer_admin
+from app.utils.streaming import resposta_streaming
 
 
 habilidadeRouter = APIRouter(prefix="/habilidade", tags=["habilidade"])
 
 
 @habilidadeRouter.get("/", response_model=list[HabilidadeOut])
-def listar(session: Session = Depends(pegar_sessao)):
-	"""Lista todas as habilidades cadastradas no sistema"""
-	return listar_habilidades(session)
+def listar(request: Request, session: Session = Depends(pegar_sessao)):
+	"""Lista todas as habilidades cadastradas no sistema (transmitidas em JSON ou NDJSON conforme o Accept)"""
+	return resposta_streaming(request, iterar_habilidades(session), session)
 
 
 @habilidadeRouter.get("/categorias", response_model=list[dict])
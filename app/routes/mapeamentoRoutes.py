@@ -1,15 +1,65 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from app.schemas.mapeamentoSchemas import MapaOut
+from app.schemas.mapeamentoSchemas import MapaOut, MapaEntidadeOut
 from app.dependencies import pegar_sessao
-from app.services.mapeamento import montar_mapa
+from app.utils.streaming import aceita_ndjson, resposta_streaming
+from app.services.mapeamento import obter_mapa_serializado, montar_mapa_sql, iterar_mapa, relacoes_do_curso, relacoes_da_carreira
 
 
 mapeamentoRouter = APIRouter(prefix="/mapa", tags=["mapeamento"])
 
 
+def _etag_corresponde(if_none_match: str | None, etag: str) -> bool:
+    """Verifica se o cabeçalho If-None-Match contém o ETag atual (comparação fraca, conforme RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag for c in candidatos)
+
+
 @mapeamentoRouter.get("/", response_model=MapaOut)
-def obter_mapa(session: Session = Depends(pegar_sessao)):
-    """Retorna o mapa completo de relacionamento entre cursos e carreiras do sistema"""
-    dados = montar_mapa(session=session)
-    return dados
+def obter_mapa(
+    request: Request,
+    min_score: float | None = Query(None, ge=0, description="Score mínimo das relações; calcula os scores no banco em vez de usar o mapa em cache"),
+    session: Session = Depends(pegar_sessao),
+):
+    """Retorna o mapa completo de relacionamento entre cursos e carreiras do sistema (pré-serializado, com ETag)
+
+    Com Accept: application/x-ndjson, transmite um registro por curso e por carreira com suas relações
+    (filtradas por min_score, se informado).
+    """
+    if aceita_ndjson(request):
+        return resposta_streaming(request, iterar_mapa(session, min_score=min_score), session)
+    if min_score is not None:
+        return montar_mapa_sql(session, min_score=min_score)
+    mapa = obter_mapa_serializado(session)
+    cabecalhos = {"ETag": mapa.etag, "Cache-Control": "no-cache"}
+    if _etag_corresponde(request.headers.get("if-none-match"), mapa.etag):
+        return Response(status_code=304, headers=cabecalhos)
+    return Response(content=mapa.corpo, media_type="application/json", headers=cabecalhos)
+
+
+@mapeamentoRouter.get("/curso/{curso_id}", response_model=MapaEntidadeOut)
+def obter_mapa_curso(
+    curso_id: int,
+    limit: int = Query(10, ge=1, description="Quantidade máxima de carreiras retornadas"),
+    session: Session = Depends(pegar_sessao),
+):
+    """Retorna as carreiras mais relacionadas a um curso com seus scores ou erro 404 se o curso não existir"""
+    resultado = relacoes_do_curso(session, curso_id, limite=limit)
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Curso não encontrado")
+    return resultado
+
+
+@mapeamentoRouter.get("/carreira/{carreira_id}", response_model=MapaEntidadeOut)
+def obter_mapa_carreira(
+    carreira_id: int,
+    limit: int = Query(10, ge=1, description="Quantidade máxima de cursos retornados"),
+    session: Session = Depends(pegar_sessao),
+):
+    """Retorna os cursos mais relacionados a uma carreira com seus scores ou erro 404 se a carreira não existir"""
+    resultado = relacoes_da_carreira(session, carreira_id, limite=limit)
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Carreira não encontrada")
+    return resultado
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.services.usuario import buscar_usuario_por_id
 from app.services.usuarioHabilidade import criar_usuario_habilidade, listar_habilidades_usuario, remover_usuario_habilidade
-from app.services.compatibilidade import compatibilidade_carreiras_por_usuario, calcular_compatibilidade_usuario_carreira
+from app.services.compatibilidade import compatibilidade_carreiras_por_usuario, calcular_compatibilidade_usuario_carreira, compatibilidade_materializada_por_usuario, proximas_habilidades_usuario, DEFAULT_MIN_FREQ, DEFAULT_TAXA_COBERTURA
 from app.models.usuarioHabilidadeModels import UsuarioHabilidade
 from app.models.carreiraHabilidadeModels import CarreiraHabilidade
 from app.models.habilidadeModels import Habilidade 
@@ -79,18 +79,37 @@ async def listar_habilidades_faltantes_route(
 @usuarioHabilidadeRouter.get("/{usuario_id}/compatibilidade/top", response_model=list[dict])
 async def top_carreiras_usuario_route(
     usuario_id: int,
+    min_freq: int = Query(DEFAULT_MIN_FREQ, ge=1, description="Frequência mínima da habilidade na carreira"),
+    taxa_cobertura: float = Query(DEFAULT_TAXA_COBERTURA, gt=0, le=1, description="Proporção do peso da carreira que forma o núcleo"),
+    limit: int | None = Query(None, ge=1, description="Quantidade máxima de carreiras retornadas"),
+    offset: int = Query(0, ge=0, description="Quantidade de carreiras do topo a pular"),
+    detalhes: bool = Query(False, description="Inclui nomes das habilidades cobertas"),
+    faltantes: bool = Query(False, description="Inclui nomes das habilidades do núcleo que o usuário não possui"),
     usuario: Usuario = Depends(verificar_token),
     session: Session = Depends(pegar_sessao),
 ):
-    """Calcula compatibilidade do usuário com todas as carreiras ponderada por frequência das habilidades"""
+    """Calcula compatibilidade do usuário com todas as carreiras ponderada por frequência das habilidades, com paginação e nomes de habilidades opcionais"""
 
     usuario_db = buscar_usuario_por_id(session, usuario_id)
 
     if not usuario_db:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    # Parâmetros padrão sem nomes de habilidades: lê os scores materializados do usuário
+    if min_freq == DEFAULT_MIN_FREQ and taxa_cobertura >= 1 and not detalhes and not faltantes:
+        return compatibilidade_materializada_por_usuario(session, usuario_id, limite=limit, deslocamento=offset)
     
     # Calcula compatibilidade para todas as carreiras
-    resultados = compatibilidade_carreiras_por_usuario(session, usuario_id)
+    resultados = compatibilidade_carreiras_por_usuario(
+        session,
+        usuario_id,
+        min_freq=min_freq,
+        taxa_cobertura=taxa_cobertura,
+        limite=limit,
+        deslocamento=offset,
+        detalhes=detalhes,
+        faltantes=faltantes,
+    )
     return resultados
 
 
@@ -98,10 +117,14 @@ async def top_carreiras_usuario_route(
 async def compatibilidade_usuario_carreira_route(
     usuario_id: int,
     carreira_id: int,
+    min_freq: int = Query(DEFAULT_MIN_FREQ, ge=1, description="Frequência mínima da habilidade na carreira"),
+    taxa_cobertura: float = Query(DEFAULT_TAXA_COBERTURA, gt=0, le=1, description="Proporção do peso da carreira que forma o núcleo"),
+    detalhes: bool = Query(False, description="Inclui nomes das habilidades cobertas"),
+    faltantes: bool = Query(False, description="Inclui nomes das habilidades do núcleo que o usuário não possui"),
     usuario: Usuario = Depends(verificar_token),
     session: Session = Depends(pegar_sessao),
 ):
-    """Calcula compatibilidade do usuário com uma carreira específica"""
+    """Calcula compatibilidade do usuário com uma carreira específica, com nomes de habilidades opcionais"""
 
     usuario_db = buscar_usuario_por_id(session, usuario_id)
 
@@ -109,10 +132,49 @@ async def compatibilidade_usuario_carreira_route(
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
     # Calcula compatibilidade para a carreira específica
-    resultado = calcular_compatibilidade_usuario_carreira(session, usuario_id, carreira_id)
+    resultado = calcular_compatibilidade_usuario_carreira(
+        session,
+        usuario_id,
+        carreira_id,
+        min_freq=min_freq,
+        taxa_cobertura=taxa_cobertura,
+        detalhes=detalhes,
+        faltantes=faltantes,
+    )
     return resultado
 
 
+@usuarioHabilidadeRouter.get("/{usuario_id}/compatibilidade/proximas-habilidades", response_model=list[dict])
+async def proximas_habilidades_usuario_route(
+    usuario_id: int,
+    carreira_id: int | None = Query(None, description="Carreira alvo (padrão: carreira do usuário)"),
+    todas_carreiras: bool = Query(False, description="Avalia o ganho em todas as carreiras, ignorando a carreira alvo"),
+    min_freq: int = Query(DEFAULT_MIN_FREQ, ge=1, description="Frequência mínima da habilidade na carreira"),
+    taxa_cobertura: float = Query(DEFAULT_TAXA_COBERTURA, gt=0, le=1, description="Proporção do peso da carreira que forma o núcleo"),
+    limit: int = Query(10, ge=1, description="Quantidade máxima de habilidades retornadas"),
+    usuario: Usuario = Depends(verificar_token),
+    session: Session = Depends(pegar_sessao),
+):
+    """Lista as habilidades que o usuário não possui que mais aumentam sua compatibilidade (carreira alvo ou todas)"""
+
+    usuario_db = buscar_usuario_por_id(session, usuario_id)
+
+    if not usuario_db:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    # Sem carreira informada usa a carreira do usuário; sem nenhuma das duas avalia todas as carreiras
+    alvo = None if todas_carreiras else (carreira_id or usuario_db.carreira_id)
+
+    return proximas_habilidades_usuario(
+        session,
+        usuario_id,
+        alvo,
+        min_freq=min_freq,
+        taxa_cobertura=taxa_cobertura,
+        limite=limit,
+    )
+
+
 @usuarioHabilidadeRouter.post("/{usuario_id}/adicionar-habilidade/{habilidade_id}", response_model=UsuarioHabilidadeOut)
 async def adicionar_habilidade_usuario_route(
     usuario_id: int,
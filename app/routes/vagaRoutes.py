@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, Request, UploadFile
+from openai import APIError
 from sqlalchemy.orm import Session
-from app.schemas.vagaSchemas import VagaBase, VagaOut
-from app.services.vaga import listar_vagas, criar_vaga, extrair_habilidades_vaga, confirmar_habilidades_vaga, remover_relacao_vaga_habilidade, excluir_vaga_decrementando
+from app.schemas.vagaSchemas import VagaBase, VagaOut, VagaImportacaoOut
+from app.schemas.extracaoLoteSchemas import ExtracaoLoteCriar, ExtracaoLoteOut
+from app.services.vaga import iterar_vagas, criar_vaga, extrair_habilidades_vaga_async, transmitir_preview_habilidades, confirmar_habilidades_vaga, remover_relacao_vaga_habilidade, excluir_vaga_decrementando
 from app.dependencies import pegar_sessao, requer_admin
+from app.utils.resiliencia import CircuitoAberto
+from app.services.extracao import purgar_cache_extracao, resumo_metricas_extracao, reiniciar_metricas_extracao
+from app.services.extracaoLote import criar_lote, obter_lote, executar_lote, lote_em_execucao
+from app.services.vagaImportacao import FORMATOS_IMPORTACAO, TAMANHO_LOTE_IMPORTACAO, detectar_formato, importar_vagas
+from app.utils.streaming import resposta_sse, resposta_streaming
+from app.models.vagaModels import Vaga
 
 
 vagaRouter = APIRouter(prefix="/vaga", tags=["vaga"])
 
 
 @vagaRouter.get("/", response_model=list[VagaOut])
-async def get_vagas(session: Session = Depends(pegar_sessao)):
-    """Lista todas as vagas cadastradas no sistema ordenadas por data de criação"""
-    return listar_vagas(session)
+async def get_vagas(request: Request, session: Session = Depends(pegar_sessao)):
+    """Lista todas as vagas cadastradas no sistema ordenadas por data de criação (transmitidas em JSON ou NDJSON conforme o Accept)"""
+    return resposta_streaming(request, iterar_vagas(session), session)
 
 
 @vagaRouter.post("/cadastro", response_model=VagaOut)
@@ -29,14 +37,124 @@ async def criar_vaga_endpoint(
         raise
 
 
+@vagaRouter.post("/importacao", response_model=VagaImportacaoOut)
+def importar_vagas_endpoint(
+    background_tasks: BackgroundTasks,
+    arquivo: UploadFile = File(..., description="CSV (titulo,descricao,carreira_id) ou JSONL com um objeto por linha"),
+    formato: str | None = Query(None, description="csv ou jsonl; por padrão deduzido da extensão/Content-Type do arquivo"),
+    tamanho_lote: int = Query(TAMANHO_LOTE_IMPORTACAO, ge=1, le=10000),
+    extrair: bool = Query(False, description="Agenda a extração de habilidades das vagas inseridas"),
+    sessao: Session = Depends(pegar_sessao),
+    admin=Depends(requer_admin)
+):
+    """Importa vagas em lote padronizando as descrições e ignorando duplicadas, com o status de cada linha, disponível apenas para administradores"""
+    formato = (formato or detectar_formato(arquivo.filename, arquivo.content_type) or "").lower()
+    if formato not in FORMATOS_IMPORTACAO:
+        raise HTTPException(status_code=400, detail="Formato não suportado; envie um arquivo CSV ou JSONL.")
+    resultado = importar_vagas(sessao, arquivo.file, formato, tamanho_lote)
+    if extrair and resultado.inseridas:
+        lote = criar_lote(sessao, [linha.id for linha in resultado.linhas if linha.status == "inserida"])
+        background_tasks.add_task(executar_lote, lote.id, sessao.get_bind())
+        resultado.lote_extracao_id = lote.id
+    return resultado
+
+
+@vagaRouter.delete("/cache-extracao")
+async def purgar_cache_extracao_endpoint(
+    expirados: bool = True,
+    sessao: Session = Depends(pegar_sessao),
+    admin=Depends(requer_admin)
+):
+    """Remove respostas da IA guardadas no cache de extração (apenas expiradas por padrão), disponível apenas para administradores"""
+    removidos = purgar_cache_extracao(sessao, somente_expirados=expirados)
+    return {"status": "purgado", "removidos": removidos}
+
+
+@vagaRouter.get("/metricas-extracao")
+async def metricas_extracao_endpoint(
+    reiniciar: bool = False,
+    admin=Depends(requer_admin)
+):
+    """Resume latências, tokens, origem dos resultados e caminhos de interpretação da extração neste processo, disponível apenas para administradores"""
+    resumo = resumo_metricas_extracao()
+    if reiniciar:
+        reiniciar_metricas_extracao()
+    return resumo
+
+
+@vagaRouter.post("/extracao-lote", response_model=ExtracaoLoteOut, status_code=202)
+async def criar_extracao_lote_endpoint(
+    payload: ExtracaoLoteCriar,
+    background_tasks: BackgroundTasks,
+    sessao: Session = Depends(pegar_sessao),
+    admin=Depends(requer_admin)
+):
+    """Agenda a extração de habilidades de várias vagas (ou de todas sem habilidades) gravando os resultados como rascunhos, disponível apenas para administradores"""
+    lote = criar_lote(sessao, payload.vaga_ids, payload.concorrencia, payload.por_minuto)
+    if lote.status != "concluido":
+        background_tasks.add_task(executar_lote, lote.id, sessao.get_bind())
+    return obter_lote(sessao, lote.id, incluir_rascunhos=False)
+
+
+@vagaRouter.get("/extracao-lote/{lote_id}", response_model=ExtracaoLoteOut)
+async def obter_extracao_lote_endpoint(
+    lote_id: int,
+    sessao: Session = Depends(pegar_sessao),
+    admin=Depends(requer_admin)
+):
+    """Consulta a situação de um lote de extração e os rascunhos já gerados, disponível apenas para administradores"""
+    lote = obter_lote(sessao, lote_id)
+    if not lote:
+        raise HTTPException(status_code=404, detail="Lote de extração não encontrado")
+    return lote
+
+
+@vagaRouter.post("/extracao-lote/{lote_id}/retomar", response_model=ExtracaoLoteOut, status_code=202)
+async def retomar_extracao_lote_endpoint(
+    lote_id: int,
+    background_tasks: BackgroundTasks,
+    sessao: Session = Depends(pegar_sessao),
+    admin=Depends(requer_admin)
+):
+    """Recoloca na fila os rascunhos ainda pendentes de um lote interrompido (ex.: reinício do servidor), disponível apenas para administradores"""
+    lote = obter_lote(sessao, lote_id, incluir_rascunhos=False)
+    if not lote:
+        raise HTTPException(status_code=404, detail="Lote de extração não encontrado")
+    if lote_em_execucao(lote_id):
+        raise HTTPException(status_code=409, detail="Lote de extração já está em execução")
+    if lote.pendentes:
+        background_tasks.add_task(executar_lote, lote_id, sessao.get_bind())
+    return lote
+
+
 @vagaRouter.get("/{vaga_id}/preview-habilidades", response_model=list[dict])
 async def preview_habilidades_endpoint(
     vaga_id: int,
     sessao: Session = Depends(pegar_sessao),
     admin=Depends(requer_admin)
 ):
-    """Extrai habilidades da descrição da vaga usando IA e retorna preview para edição, disponível apenas para administradores"""
-    return extrair_habilidades_vaga(sessao, vaga_id)
+    """Extrai habilidades da descrição da vaga usando IA e retorna preview para edição, disponível apenas para administradores
+
+    Falha do modelo não vira preview vazio: responde 503 (com Retry-After) se o circuito estiver aberto e 502 nos demais casos.
+    """
+    try:
+        return await extrair_habilidades_vaga_async(sessao, vaga_id, propagar_erros=True)
+    except CircuitoAberto as e:
+        raise HTTPException(status_code=503, detail="Serviço de extração temporariamente indisponível", headers={"Retry-After": str(max(1, round(e.reabre_em)))})
+    except (APIError, TimeoutError):
+        raise HTTPException(status_code=502, detail="Falha ao consultar o serviço de extração")
+
+
+@vagaRouter.get("/{vaga_id}/preview-habilidades/stream")
+async def preview_habilidades_stream_endpoint(
+    vaga_id: int,
+    sessao: Session = Depends(pegar_sessao),
+    admin=Depends(requer_admin)
+):
+    """Transmite o preview como Server-Sent Events: um evento "habilidade" por item assim que o modelo o conclui, e "fim" ao terminar"""
+    if not sessao.query(Vaga.id).filter(Vaga.id == vaga_id).first():
+        raise HTTPException(status_code=404, detail="Vaga não encontrada")
+    return resposta_sse(transmitir_preview_habilidades(sessao, vaga_id), "habilidade", sessao)
 
 
 @vagaRouter.post("/{vaga_id}/confirmar-habilidades")
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class ExtracaoLoteCriar(BaseModel):
+    vaga_ids: list[int] | None = None  # None: todas as vagas que ainda não têm habilidades associadas
+    concorrencia: int = Field(default=4, ge=1, le=16)
+    por_minuto: int = Field(default=30, ge=1, le=600)
+
+
+class ExtracaoRascunhoOut(BaseModel):
+    vaga_id: int
+    status: str
+    habilidades: list[dict] = []
+    erro: str | None = None
+
+
+class ExtracaoLoteOut(BaseModel):
+    id: int
+    status: str
+    total: int
+    pendentes: int
+    concluidas: int
+    falhas: int
+    criado_em: datetime | None = None
+    finalizado_em: datetime | None = None
+    rascunhos: list[ExtracaoRascunhoOut] = []
@@ -18,3 +18,9 @@ class MapaOut(BaseModel):
     carreiras: List[ItemSimples]
     cursoToCarreiras: Dict[int, List[RelacaoScore]]
     carreiraToCursos: Dict[int, List[RelacaoScore]]
+
+
+class MapaEntidadeOut(BaseModel):
+    id: int
+    nome: str
+    relacoes: List[RelacaoScore]
@@ -12,3 +12,19 @@ class VagaOut(VagaBase):
     carreira_nome: str | None = None
     
     model_config = {'from_attributes': True}
+
+
+class VagaImportacaoLinha(BaseModel):
+    linha: int  # linha do arquivo em que o registro termina (no CSV, o cabeçalho é a linha 1)
+    status: str  # inserida | duplicada | invalida
+    id: int | None = None
+    erro: str | None = None
+
+
+class VagaImportacaoOut(BaseModel):
+    total: int
+    inseridas: int
+    duplicadas: int
+    invalidas: int
+    lote_extracao_id: int | None = None
+    linhas: list[VagaImportacaoLinha]
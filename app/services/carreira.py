@@ -1,5 +1,8 @@
 from app.models.carreiraModels import Carreira 
 from app.schemas.carreiraSchemas import CarreiraBase, CarreiraOut 
+from typing import Iterator
+from app.services.compatibilidade import invalidar_matriz_carreiras
+from app.services.mapeamento import invalidar_mapa
 
 
 def criar_carreira(session, carreira_data: CarreiraBase) -> CarreiraOut:
@@ -7,6 +10,8 @@ def criar_carreira(session, carreira_data: CarreiraBase) -> CarreiraOut:
     nova_carreira = Carreira(**carreira_data.model_dump())
     session.add(nova_carreira)
     session.commit()
+    invalidar_matriz_carreiras(session)
+    invalidar_mapa(session)
     session.refresh(nova_carreira)
     return CarreiraOut.model_validate(nova_carreira)
 
@@ -17,6 +22,12 @@ def listar_carreiras(session) -> list[CarreiraOut]:
     return [CarreiraOut.model_validate(carreira) for carreira in carreiras]
 
 
+def iterar_carreiras(session, tamanho_lote: int = 500) -> Iterator[CarreiraOut]:
+    """Percorre as carreiras em lotes (cursor no servidor) convertendo cada uma para CarreiraOut sob demanda"""
+    for carreira in session.query(Carreira).yield_per(tamanho_lote):
+        yield CarreiraOut.model_validate(carreira)
+
+
 def buscar_carreira_por_id(session, id: int) -> CarreiraOut | None:
     """Busca uma carreira específica pelo ID no banco de dados e retorna como CarreiraOut ou None se não encontrada"""
     carreira = session.query(Carreira).filter(Carreira.id == id).first()
@@ -30,6 +41,8 @@ def atualizar_carreira(session, id: int, carreira_data: CarreiraBase) -> Carreir
         for key, value in carreira_data.model_dump(exclude_unset=True).items():
             setattr(carreira, key, value)
         session.commit()
+        invalidar_matriz_carreiras(session)
+        invalidar_mapa(session)
         session.refresh(carreira)
         return CarreiraOut.model_validate(carreira)
     return None
@@ -41,5 +54,7 @@ def deletar_carreira(session, id: int) -> CarreiraOut | None:
     if carreira:
         session.delete(carreira)
         session.commit()
+        invalidar_matriz_carreiras(session)
+        invalidar_mapa(session)
         return CarreiraOut.model_validate(carreira)
     return None
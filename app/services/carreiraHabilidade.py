@@ -1,12 +1,17 @@
 from app.models.carreiraHabilidadeModels import CarreiraHabilidade
 from app.schemas.carreiraHabilidadeSchemas import CarreiraHabilidadeBase, CarreiraHabilidadeOut
+from app.services.compatibilidade import invalidar_matriz_carreiras, recalcular_scores_carreiras
+from app.services.mapeamento import atualizar_mapa_carreira
 
 
 def criar_carreira_habilidade(session, carreira_habilidade_data: CarreiraHabilidadeBase) -> CarreiraHabilidadeOut:
     """Cria uma nova associação entre carreira e habilidade no banco de dados e retorna como CarreiraHabilidadeOut"""
     nova = CarreiraHabilidade(**carreira_habilidade_data.model_dump())
     session.add(nova)
+    recalcular_scores_carreiras(session, [nova.carreira_id])
     session.commit()
+    invalidar_matriz_carreiras(session)
+    atualizar_mapa_carreira(session, carreira_habilidade_data.carreira_id)
     session.refresh(nova)
     return CarreiraHabilidadeOut.model_validate(nova)
 
@@ -22,6 +27,9 @@ def remover_carreira_habilidade(session, carreira_id: int, habilidade_id: int) -
     relacao = session.query(CarreiraHabilidade).filter_by(carreira_id=carreira_id, habilidade_id=habilidade_id).first()
     if relacao:
         session.delete(relacao)
+        recalcular_scores_carreiras(session, [carreira_id])
         session.commit()
+        invalidar_matriz_carreiras(session)
+        atualizar_mapa_carreira(session, carreira_id)
         return CarreiraHabilidadeOut.model_validate(relacao)
     return None
@@ -1,15 +1,134 @@
-from typing import Any, Dict, List, Set, Tuple
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from sqlalchemy import and_, func, insert, literal, select, update
 from sqlalchemy.orm import Session
 from app.models.usuarioHabilidadeModels import UsuarioHabilidade
+from app.models.usuarioCarreiraScoreModels import UsuarioCarreiraScore
 from app.models.carreiraHabilidadeModels import CarreiraHabilidade
 from app.models.carreiraModels import Carreira
 from app.models.habilidadeModels import Habilidade 
+from app.utils.cache import CachePorBanco
+from app.utils.sql import insert_com_conflito
 
 
 DEFAULT_MIN_FREQ: int | None = 3  # filtra habilidades com frequência >= 3 (exclui as que aparecem apenas 1 ou 2 vezes)
 DEFAULT_TAXA_COBERTURA: float = 1.0 # proporção do núcleo da carreira (100%)
 
 
+class MatrizCarreiraHabilidade:
+    """Matriz esparsa carreiras × habilidades em formato CSR com a frequência de cada relação CarreiraHabilidade
+
+    - carreiras: lista (id, nome) na ordem da tabela carreira
+    - inicio/fim de cada linha em `ponteiros`, colunas (habilidade_id) em `habilidades` e valores em `frequencias`
+    """
+
+    __slots__ = ("carreiras", "nomes", "linha_por_carreira", "ponteiros", "habilidades", "frequencias", "tabelas_nucleo")
+
+    def __init__(self, carreiras: List[Tuple[int, str]], relacoes: Iterable[Tuple[int, int, int]]):
+        self.carreiras = list(carreiras)
+        self.nomes: Dict[int, str] = dict(self.carreiras)
+        self.linha_por_carreira: Dict[int, int] = {carreira_id: i for i, (carreira_id, _) in enumerate(self.carreiras)}
+        # agrupa as relações por linha preservando a ordem recebida
+        linhas: List[List[Tuple[int, int]]] = [[] for _ in self.carreiras]
+        for carreira_id, habilidade_id, frequencia in relacoes:
+            linha = self.linha_por_carreira.get(carreira_id)
+            if linha is not None:
+                linhas[linha].append((habilidade_id, frequencia))
+        self.ponteiros = array("q", [0])
+        self.habilidades = array("q")
+        self.frequencias = array("q")
+        for itens in linhas:
+            for habilidade_id, frequencia in itens:
+                self.habilidades.append(habilidade_id)
+                self.frequencias.append(frequencia)
+            self.ponteiros.append(len(self.habilidades))
+        self.tabelas_nucleo: Dict[int | None, Dict[int, TabelaNucleo]] = {}  # min_freq -> carreira_id -> tabela
+
+    def relacoes(self, carreira_id: int) -> List[Tuple[int, int]]:
+        """Retorna as relações (habilidade_id, frequencia) de uma carreira ou lista vazia se não existir"""
+        linha = self.linha_por_carreira.get(carreira_id)
+        if linha is None:
+            return []
+        inicio, fim = self.ponteiros[linha], self.ponteiros[linha + 1]
+        return list(zip(self.habilidades[inicio:fim], self.frequencias[inicio:fim]))
+
+    def tabela_nucleo(self, carreira_id: int, min_freq: int | None) -> "TabelaNucleo":
+        """Retorna a tabela de núcleo da carreira para o min_freq informado, calculando-a uma única vez por matriz"""
+        chave = None if min_freq is None else int(min_freq)
+        tabelas = self.tabelas_nucleo.get(chave)
+        if tabelas is None:
+            tabelas = {
+                carreira: TabelaNucleo(_filtrar_habilidades(self.relacoes(carreira), chave))
+                for carreira, _ in self.carreiras
+            }
+            self.tabelas_nucleo[chave] = tabelas
+        return tabelas.get(carreira_id) or TabelaNucleo([])
+
+
+class TabelaNucleo:
+    """Habilidades de uma carreira (já filtradas por min_freq) ordenadas por peso decrescente com somas acumuladas
+
+    Permite encontrar o núcleo para qualquer taxa_cobertura com uma busca binária em `acumulados`.
+    """
+
+    __slots__ = ("peso_total", "ids_ordenados", "acumulados", "posicao", "pesos")
+
+    def __init__(self, habilidades_consideradas: List[Tuple[int, float]]):
+        ordenadas = sorted(habilidades_consideradas, key=lambda t: t[1], reverse=True) # ordena por peso decrescente (estável)
+        self.peso_total: float = sum(peso for _, peso in habilidades_consideradas)
+        self.ids_ordenados: List[int] = [habilidade_id for habilidade_id, _ in ordenadas]
+        self.acumulados: List[float] = []
+        acumulado = 0.0
+        for _, peso in ordenadas:
+            acumulado += peso
+            self.acumulados.append(acumulado)
+        self.posicao: Dict[int, int] = {habilidade_id: i for i, habilidade_id in enumerate(self.ids_ordenados)}
+        self.pesos: Dict[int, float] = dict(habilidades_consideradas)
+
+    def corte(self, taxa_cobertura: float | None) -> Tuple[int, float]:
+        """Retorna (quantidade de habilidades do núcleo, peso do núcleo) para a taxa_cobertura informada"""
+        if (
+            taxa_cobertura is not None
+            and isinstance(taxa_cobertura, (int, float)) # garante que é numérico
+            and 0 < float(taxa_cobertura) < 1 # entre 0 e 1
+            and self.peso_total > 0 # evita divisão por zero
+        ):
+            alvo = float(taxa_cobertura) * self.peso_total # alvo de peso para o núcleo
+            indice = min(bisect_left(self.acumulados, alvo), len(self.acumulados) - 1) # primeira posição que atinge o alvo
+            return indice + 1, self.acumulados[indice]
+        return len(self.ids_ordenados), self.peso_total
+
+
+_cache_matriz = CachePorBanco()
+
+
+def _construir_matriz(session: Session) -> MatrizCarreiraHabilidade:
+    """Lê carreiras e relações carreira-habilidade do banco e monta a matriz esparsa"""
+    carreiras = session.query(Carreira.id, Carreira.nome).all()
+    relacoes = (
+        session.query(
+            CarreiraHabilidade.carreira_id,
+            CarreiraHabilidade.habilidade_id,
+            func.coalesce(CarreiraHabilidade.frequencia, 0),
+        )
+        .order_by(CarreiraHabilidade.carreira_id, CarreiraHabilidade.id)
+        .all()
+    )
+    return MatrizCarreiraHabilidade(carreiras, relacoes)
+
+
+def obter_matriz_carreiras(session: Session) -> MatrizCarreiraHabilidade:
+    """Retorna a matriz carreiras × habilidades residente em memória, construindo-a na primeira chamada"""
+    return _cache_matriz.obter(session, _construir_matriz)
+
+
+def invalidar_matriz_carreiras(session: Session | None = None) -> None:
+    """Descarta a matriz carreiras × habilidades; deve ser chamada após qualquer escrita em Carreira ou CarreiraHabilidade"""
+    _cache_matriz.invalidar(session)
+
+
 def _ids_habilidades_do_usuario(session: Session, usuario_id: int) -> Set[int]:
     """Retorna conjunto de IDs das habilidades que o usuário possui"""
     linhas = (
@@ -20,6 +139,66 @@ def _ids_habilidades_do_usuario(session: Session, usuario_id: int) -> Set[int]:
     return {habilidade_id for (habilidade_id,) in linhas} # extrai apenas os IDs das tuplas retornadas
 
 
+def _calcular_peso(frequencia_valor: int) -> float:
+    """Transforma a frequência em peso (a frequência no banco já representa a importância, então é usada diretamente)"""
+    return float(frequencia_valor)
+
+
+def _filtrar_habilidades(relacoes: Iterable[Tuple[int, int]], min_freq: int | None) -> List[Tuple[int, float]]:
+    """Aplica o filtro de frequência mínima e retorna lista de tuplas (habilidade_id, peso) na ordem recebida"""
+    habilidades_consideradas: List[Tuple[int, float]] = []
+    for habilidade_id, frequencia in relacoes:
+        frequencia_int = int(frequencia or 0) # garante que é inteiro (frequência nula conta como 0)
+        if min_freq is not None and frequencia_int < int(min_freq): # aplica filtro de frequência mínima
+            continue
+        habilidades_consideradas.append((habilidade_id, _calcular_peso(frequencia_int))) # adiciona após filtro e transformação em peso
+    return habilidades_consideradas
+
+
+def _pontuar_carreira(
+    tabela: TabelaNucleo,
+    habilidades_usuario: Set[int],
+    taxa_cobertura: float | None,
+) -> Tuple[float, float, float, List[int]]:
+    """Calcula (peso_total, denominador, peso_coberto, ids_cobertos) de uma carreira sem acessar o banco
+
+    O denominador é o peso do núcleo da carreira quando 0 < taxa_cobertura < 1, ou o peso total caso contrário.
+    """
+    tamanho_nucleo, denominador = tabela.corte(taxa_cobertura)
+
+    # Habilidades do núcleo que o usuário possui
+    ids_cobertos = sorted(
+        habilidade_id for habilidade_id in habilidades_usuario
+        if tabela.posicao.get(habilidade_id, tamanho_nucleo) < tamanho_nucleo
+    )
+
+    # Peso coberto apenas do núcleo
+    peso_coberto = sum(tabela.pesos[habilidade_id] for habilidade_id in ids_cobertos)
+    return tabela.peso_total, denominador, peso_coberto, ids_cobertos
+
+
+def _percentual(peso_coberto: float, denominador: float) -> float:
+    """Percentual de compatibilidade com 2 casas (0 quando o denominador é zero, evitando divisão por zero)"""
+    return 0.0 if denominador <= 0 else round(100.0 * (peso_coberto / float(denominador)), 2)
+
+
+def _ids_faltantes(tabela: TabelaNucleo, habilidades_usuario: Set[int], taxa_cobertura: float | None) -> List[int]:
+    """Retorna IDs das habilidades do núcleo da carreira que o usuário não possui, por peso decrescente"""
+    tamanho_nucleo, _ = tabela.corte(taxa_cobertura)
+    return [habilidade_id for habilidade_id in tabela.ids_ordenados[:tamanho_nucleo] if habilidade_id not in habilidades_usuario]
+
+
+def _nomes_habilidades(session: Session, ids: Set[int]) -> Dict[int, str]:
+    """Busca em uma única consulta os nomes das habilidades informadas, retornando {id: nome}"""
+    if not ids:
+        return {}
+    return dict(
+        session.query(Habilidade.id, Habilidade.nome)
+        .filter(Habilidade.id.in_(ids))
+        .all()
+    )
+
+
 def calcular_compatibilidade_usuario_carreira(
     session: Session,
     usuario_id: int,
@@ -27,6 +206,8 @@ def calcular_compatibilidade_usuario_carreira(
     *,
     min_freq: int | None = DEFAULT_MIN_FREQ, # frequência mínima de CarreiraHabilidade a considerar
     taxa_cobertura: float | None = DEFAULT_TAXA_COBERTURA, # proporção do núcleo da carreira a considerar (padrão 80%)
+    detalhes: bool = True, # inclui nomes das habilidades cobertas
+    faltantes: bool = False, # inclui nomes das habilidades do núcleo que o usuário não possui
 ) -> Dict[str, Any]:
     """Calcula compatibilidade percentual do usuário com uma carreira específica ponderando por frequências das habilidades
 
@@ -36,103 +217,74 @@ def calcular_compatibilidade_usuario_carreira(
     - carreira_id, carreira_nome
     - percentual (float 0>100 com 2 casas)
     - peso_coberto (int), peso_total (int)
-    - habilidades_cobertas (lista de nomes)
+    - habilidades_cobertas (lista de nomes, apenas com detalhes=True)
+    - habilidades_faltantes (lista de nomes do núcleo não cobertos, apenas com faltantes=True)
     """
 
-    # Busca a carreira
-    carreira = session.query(Carreira).filter(Carreira.id == carreira_id).first()
-    if not carreira:
-        return {
+    # Busca a carreira na matriz residente
+    matriz = obter_matriz_carreiras(session)
+    carreira_nome = matriz.nomes.get(carreira_id)
+    if carreira_id not in matriz.nomes:
+        vazio: Dict[str, Any] = {
             "carreira_id": carreira_id,
             "carreira_nome": None,
             "percentual": 0.0,
             "peso_coberto": 0,
             "peso_total": 0,
-            "habilidades_cobertas": [],
         }
+        if detalhes:
+            vazio["habilidades_cobertas"] = []
+        if faltantes:
+            vazio["habilidades_faltantes"] = []
+        return vazio
 
     # Coleta habilidades do usuário
     habilidades_usuario = _ids_habilidades_do_usuario(session, usuario_id)
 
-    # Coleta frequências da carreira
-    relacoes: List[Tuple[int, int]] = (
-        session.query(CarreiraHabilidade.habilidade_id, CarreiraHabilidade.frequencia)
-        .filter(CarreiraHabilidade.carreira_id == carreira.id)
-        .all()
+    # Calcula núcleo/pesos da carreira a partir da tabela pré-computada para o min_freq
+    tabela = matriz.tabela_nucleo(carreira_id, min_freq)
+    peso_total_considerado, denominador, peso_coberto, ids_cobertos = _pontuar_carreira(
+        tabela, habilidades_usuario, taxa_cobertura
     )
 
-    # Aplica filtro por frequência mínima e transforma pesos
-    def calcular_peso(frequencia_valor: int) -> float:
-        # Como a frequência no banco já representa a importância, usamos diretamente o valor sem transformações.
-        return float(frequencia_valor)
+    percentual = _percentual(peso_coberto, denominador)
 
-    # Lista de tuplas (habilidade_id, peso_transformado) após filtro
-    habilidades_consideradas: List[Tuple[int, float]] = []
-    for habilidade_id, frequencia in relacoes:
-        frequencia_int = int(frequencia) # garante que é inteiro
-        if min_freq is not None and frequencia_int < int(min_freq): # aplica filtro de frequência mínima
-            continue
-        habilidades_consideradas.append((habilidade_id, calcular_peso(frequencia_int))) # adiciona após filtro e transformação em peso
-
-    # Soma total considerando filtro/transformação
-    peso_total_considerado = sum(peso for _, peso in habilidades_consideradas)
-
-    # Define o denominador com base na taxa_cobertura (núcleo da carreira)
-    ids_nucleo: Set[int] = set()
-    denominador = peso_total_considerado
-    # Calcula o núcleo baseado na taxa_cobertura
-    if (
-        taxa_cobertura is not None
-        and isinstance(taxa_cobertura, (int, float)) # garante que é numérico
-        and 0 < float(taxa_cobertura) < 1 # entre 0 e 1
-        and peso_total_considerado > 0 # evita divisão por zero
-    ):
-        alvo = float(taxa_cobertura) * peso_total_considerado # alvo de peso para o núcleo
-        ordenadas = sorted(habilidades_consideradas, key=lambda t: t[1], reverse=True) # ordena por peso decrescente
-        acumulado = 0.0 # acumula peso até atingir o alvo
-        for habilidade_id, peso in ordenadas:
-            ids_nucleo.add(habilidade_id) # adiciona ao núcleo
-            acumulado += peso # acumula peso
-            if acumulado >= alvo: # atingiu o alvo
-                break
-        denominador = acumulado # redefine denominador para o peso do núcleo
-    else:
-        ids_nucleo = {habilidade_id for habilidade_id, _ in habilidades_consideradas} # todo o conjunto
-
-    # Peso coberto apenas do núcleo
-    peso_coberto = sum(
-        peso # soma pesos
-        for habilidade_id, peso in habilidades_consideradas # considera apenas núcleo
-        if habilidade_id in ids_nucleo and habilidade_id in habilidades_usuario # usuário possui
-    )
-
-    # Evita divisão por zero
-    percentual = 0.0 if denominador <= 0 else round(100.0 * (peso_coberto / float(denominador)), 2)
-
-    # Busca nomes das habilidades cobertas
-    habilidades_nomes: List[str] = []
-    ids_cobertos = [
-        habilidade_id for habilidade_id, _ in habilidades_consideradas if habilidade_id in ids_nucleo and habilidade_id in habilidades_usuario
-    ]
-    # Busca nomes apenas se houver habilidades cobertas
-    if ids_cobertos:
-        nomes_habilidades = (
-            session.query(Habilidade.nome)
-            .filter(Habilidade.id.in_(ids_cobertos))
-            .all()
-        )
-        habilidades_nomes = [nome for (nome,) in nomes_habilidades]
-
-    # Retorna o resultado como dicionário
-    return {
-        "carreira_id": carreira.id,
-        "carreira_nome": carreira.nome,
+    resultado: Dict[str, Any] = {
+        "carreira_id": carreira_id,
+        "carreira_nome": carreira_nome,
         "percentual": percentual,
         "peso_coberto": round(float(peso_coberto), 4),
         "peso_total": round(float(peso_total_considerado), 4),
-        "habilidades_cobertas": habilidades_nomes,
     }
 
+    # Busca nomes das habilidades cobertas/faltantes em uma única consulta, apenas se pedidos
+    ids_faltantes = _ids_faltantes(tabela, habilidades_usuario, taxa_cobertura) if faltantes else []
+    nomes_por_id = _nomes_habilidades(session, set(ids_cobertos if detalhes else []) | set(ids_faltantes))
+    if detalhes:
+        resultado["habilidades_cobertas"] = [nomes_por_id[h] for h in ids_cobertos if h in nomes_por_id]
+    if faltantes:
+        resultado["habilidades_faltantes"] = [nomes_por_id[h] for h in ids_faltantes if h in nomes_por_id]
+    return resultado
+
+
+def _chave_ordenacao(resultado: Dict[str, Any]) -> Tuple[float, float, float, str]:
+    """Chave de ordenação dos resultados de compatibilidade (aplicada em ordem decrescente)"""
+    return (
+        resultado.get("percentual", 0.0),
+        resultado.get("peso_coberto", 0),
+        resultado.get("peso_total", 0),
+        (resultado.get("carreira_nome") or "").lower(),
+    )
+
+
+def _paginar(resultados: List[Dict[str, Any]], limite: int | None, deslocamento: int) -> List[Dict[str, Any]]:
+    """Ordena os resultados por _chave_ordenacao (decrescente) e retorna a página pedida; com limite usa heap"""
+    deslocamento = max(0, int(deslocamento or 0))
+    if limite is None:
+        resultados.sort(key=_chave_ordenacao, reverse=True) # ordem decrescente
+        return resultados[deslocamento:]
+    return heapq.nlargest(deslocamento + max(0, int(limite)), resultados, key=_chave_ordenacao)[deslocamento:]
+
 
 def compatibilidade_carreiras_por_usuario(
     session: Session,
@@ -140,30 +292,298 @@ def compatibilidade_carreiras_por_usuario(
     *,
     min_freq: int | None = DEFAULT_MIN_FREQ, # frequência mínima de CarreiraHabilidade a considerar
     taxa_cobertura: float | None = DEFAULT_TAXA_COBERTURA, # proporção do núcleo da carreira a considerar
+    limite: int | None = None, # quantidade máxima de carreiras retornadas (None = todas)
+    deslocamento: int = 0, # quantidade de carreiras do topo a pular (paginação)
+    detalhes: bool = True, # inclui nomes das habilidades cobertas
+    faltantes: bool = False, # inclui nomes das habilidades do núcleo que o usuário não possui
 ) -> List[Dict[str, Any]]:
-    """Calcula compatibilidade do usuário com todas as carreiras e retorna lista ordenada por percentual decrescente"""
+    """Calcula compatibilidade do usuário com todas as carreiras e retorna lista ordenada por percentual decrescente
+
+    As carreiras e frequências vêm da matriz residente em memória; por requisição são feitas apenas a consulta das
+    habilidades do usuário e a dos nomes das habilidades cobertas. O resultado é o mesmo de
+    calcular_compatibilidade_usuario_carreira aplicado a cada carreira.
+
+    Com limite informado, seleciona apenas a página pedida via heap (sem ordenar todas as carreiras). Nomes de
+    habilidades (cobertas e/ou faltantes) são buscados em uma única consulta, somente para as carreiras retornadas
+    e somente quando detalhes/faltantes forem pedidos.
+    """
+
+    matriz = obter_matriz_carreiras(session)
+    habilidades_usuario = _ids_habilidades_do_usuario(session, usuario_id)
 
-    # Busca todas as carreiras e calcula compatibilidade
-    carreiras = session.query(Carreira).all()
+    # Pontua todas as carreiras em memória (apenas campos numéricos)
     resultados: List[Dict[str, Any]] = []
-    for carreira_item in carreiras:
-        resultado = calcular_compatibilidade_usuario_carreira(
-            session,
-            usuario_id,
-            carreira_item.id,
-            min_freq=min_freq,
-            taxa_cobertura=taxa_cobertura,
+    ids_cobertos_por_carreira: Dict[int, List[int]] = {}
+    for carreira_id, carreira_nome in matriz.carreiras:
+        peso_total, denominador, peso_coberto, ids_cobertos = _pontuar_carreira(
+            matriz.tabela_nucleo(carreira_id, min_freq), habilidades_usuario, taxa_cobertura
+        )
+        percentual = _percentual(peso_coberto, denominador)
+        ids_cobertos_por_carreira[carreira_id] = ids_cobertos
+        resultados.append({
+            "carreira_id": carreira_id,
+            "carreira_nome": carreira_nome,
+            "percentual": percentual,
+            "peso_coberto": round(float(peso_coberto), 4),
+            "peso_total": round(float(peso_total), 4),
+        })
+
+    # Ordena resultados ou seleciona apenas a página pedida
+    resultados = _paginar(resultados, limite, deslocamento)
+
+    if not detalhes and not faltantes:
+        return resultados
+
+    # Busca nomes das habilidades das carreiras retornadas em uma única consulta
+    ids_faltantes_por_carreira: Dict[int, List[int]] = {}
+    ids_para_nomes: Set[int] = set()
+    for r in resultados:
+        carreira_id = r["carreira_id"]
+        if detalhes:
+            ids_para_nomes.update(ids_cobertos_por_carreira[carreira_id])
+        if faltantes:
+            ids_faltantes_por_carreira[carreira_id] = _ids_faltantes(
+                matriz.tabela_nucleo(carreira_id, min_freq), habilidades_usuario, taxa_cobertura
+            )
+            ids_para_nomes.update(ids_faltantes_por_carreira[carreira_id])
+    nomes_por_id = _nomes_habilidades(session, ids_para_nomes)
+    for r in resultados:
+        carreira_id = r["carreira_id"]
+        if detalhes:
+            r["habilidades_cobertas"] = [nomes_por_id[h] for h in ids_cobertos_por_carreira[carreira_id] if h in nomes_por_id]
+        if faltantes:
+            r["habilidades_faltantes"] = [nomes_por_id[h] for h in ids_faltantes_por_carreira[carreira_id] if h in nomes_por_id]
+    return resultados
+
+
+
+def proximas_habilidades_usuario(
+    session: Session,
+    usuario_id: int,
+    carreira_id: int | None = None, # carreira alvo (None = todas as carreiras)
+    *,
+    min_freq: int | None = DEFAULT_MIN_FREQ, # frequência mínima de CarreiraHabilidade a considerar
+    taxa_cobertura: float | None = DEFAULT_TAXA_COBERTURA, # proporção do núcleo da carreira a considerar
+    limite: int = 10, # quantidade máxima de habilidades retornadas
+) -> List[Dict[str, Any]]:
+    """Sugere as habilidades que o usuário não possui que mais aumentam seu percentual de compatibilidade
+
+    O núcleo de uma carreira depende só dos pesos da carreira, então adicionar uma habilidade do núcleo soma seu
+    peso ao peso_coberto e qualquer outra não altera o percentual. O ganho de todas as candidatas sai de uma única
+    passada pelas tabelas de núcleo da matriz residente (sem recalcular a compatibilidade por candidata).
+    Sem carreira_id, cada habilidade é avaliada na carreira em que gera o maior ganho.
+
+    Retorna lista ordenada por ganho decrescente com:
+    - habilidade_id, habilidade_nome, peso
+    - carreira_id, carreira_nome
+    - percentual_atual, percentual_novo, ganho (pontos percentuais)
+    """
+
+    matriz = obter_matriz_carreiras(session)
+    if carreira_id is None:
+        carreiras = matriz.carreiras
+    elif carreira_id in matriz.nomes:
+        carreiras = [(carreira_id, matriz.nomes[carreira_id])]
+    else:
+        return []
+    habilidades_usuario = _ids_habilidades_do_usuario(session, usuario_id)
+
+    # habilidade_id -> (ganho, carreira_id, peso, percentual_atual, percentual_novo) da melhor carreira
+    melhores: Dict[int, Tuple[float, int, float, float, float]] = {}
+    for carreira, _ in carreiras:
+        tabela = matriz.tabela_nucleo(carreira, min_freq)
+        _, denominador, peso_coberto, _ = _pontuar_carreira(tabela, habilidades_usuario, taxa_cobertura)
+        if denominador <= 0:
+            continue
+        percentual_atual = _percentual(peso_coberto, denominador)
+        tamanho_nucleo, _ = tabela.corte(taxa_cobertura)
+        for habilidade_id in tabela.ids_ordenados[:tamanho_nucleo]:
+            if habilidade_id in habilidades_usuario:
+                continue
+            peso = tabela.pesos[habilidade_id]
+            percentual_novo = _percentual(peso_coberto + peso, denominador)
+            ganho = round(percentual_novo - percentual_atual, 2)
+            anterior = melhores.get(habilidade_id)
+            if anterior is None or ganho > anterior[0]: # empate mantém a primeira carreira
+                melhores[habilidade_id] = (ganho, carreira, peso, percentual_atual, percentual_novo)
+
+    # Seleciona o top-K por ganho (empate: menor habilidade_id primeiro)
+    selecionadas = heapq.nlargest(max(0, int(limite)), melhores.items(), key=lambda item: (item[1][0], -item[0]))
+    nomes_por_id = _nomes_habilidades(session, {habilidade_id for habilidade_id, _ in selecionadas})
+    return [
+        {
+            "habilidade_id": habilidade_id,
+            "habilidade_nome": nomes_por_id.get(habilidade_id),
+            "peso": round(float(peso), 4),
+            "carreira_id": carreira,
+            "carreira_nome": matriz.nomes.get(carreira),
+            "percentual_atual": percentual_atual,
+            "percentual_novo": percentual_novo,
+            "ganho": ganho,
+        }
+        for habilidade_id, (ganho, carreira, peso, percentual_atual, percentual_novo) in selecionadas
+    ]
+
+
+# ===================== COMPATIBILIDADE MATERIALIZADA (usuario_carreira_score) =====================
+# Guarda peso_coberto/peso_total de cada par usuário × carreira para os parâmetros padrão
+# (DEFAULT_MIN_FREQ e taxa_cobertura 1.0, em que o núcleo é a carreira inteira).
+# - adicionar/remover uma habilidade do usuário ajusta peso_coberto por um UPDATE atômico
+# - mudanças em CarreiraHabilidade recalculam as carreiras afetadas para todos os usuários materializados
+# - usuários são materializados na migração 022 e ao serem criados (criar_usuario); leituras nunca escrevem
+
+
+def _frequencia_considerada():
+    """Expressão SQL da frequência de CarreiraHabilidade (nula conta como 0)"""
+    return func.coalesce(CarreiraHabilidade.frequencia, 0)
+
+
+def _filtro_min_freq():
+    """Condição SQL equivalente ao filtro de _filtrar_habilidades para DEFAULT_MIN_FREQ"""
+    return _frequencia_considerada() >= int(DEFAULT_MIN_FREQ or 0)
+
+
+def _ajustar_scores_habilidade_usuario(session: Session, usuario_id: int, habilidade_id: int, sinal: int) -> None:
+    """Soma (sinal=1) ou subtrai (sinal=-1) o peso da habilidade em cada carreira do peso_coberto materializado do usuário
+
+    Executado na transação da sessão, sem commit; usuários ainda não materializados não têm linhas e não são afetados.
+    """
+    peso_na_carreira = (
+        select(_frequencia_considerada())
+        .where(
+            CarreiraHabilidade.carreira_id == UsuarioCarreiraScore.carreira_id,
+            CarreiraHabilidade.habilidade_id == habilidade_id,
         )
-        resultados.append(resultado)
-
-    # Ordena resultados
-    resultados.sort(
-        key=lambda r: (
-            r.get("percentual", 0.0),
-            r.get("peso_coberto", 0),
-            r.get("peso_total", 0),
-            (r.get("carreira_nome") or "").lower(),
+        .scalar_subquery()
+    )
+    carreiras_com_habilidade = select(CarreiraHabilidade.carreira_id).where(
+        CarreiraHabilidade.habilidade_id == habilidade_id,
+        _filtro_min_freq(),
+    )
+    session.execute(
+        update(UsuarioCarreiraScore)
+        .where(
+            UsuarioCarreiraScore.usuario_id == usuario_id,
+            UsuarioCarreiraScore.carreira_id.in_(carreiras_com_habilidade),
+        )
+        .values(peso_coberto=UsuarioCarreiraScore.peso_coberto + sinal * peso_na_carreira)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def registrar_habilidade_adicionada(session: Session, usuario_id: int, habilidade_id: int) -> None:
+    """Atualiza os scores materializados do usuário após adicionar uma habilidade (antes do commit)"""
+    session.flush()
+    _ajustar_scores_habilidade_usuario(session, usuario_id, habilidade_id, 1)
+
+
+def registrar_habilidade_removida(session: Session, usuario_id: int, habilidade_id: int) -> None:
+    """Atualiza os scores materializados do usuário após remover uma habilidade (antes do commit)"""
+    session.flush()
+    _ajustar_scores_habilidade_usuario(session, usuario_id, habilidade_id, -1)
+
+
+def recalcular_scores_carreiras(session: Session, carreira_ids: Iterable[int]) -> None:
+    """Recalcula peso_total e peso_coberto das carreiras informadas para todos os usuários materializados
+
+    Deve ser chamada antes do commit de qualquer escrita que altere CarreiraHabilidade dessas carreiras.
+    """
+    session.flush()
+    for carreira_id in sorted({c for c in carreira_ids if c is not None}):
+        # Usuários materializados sem linha para a carreira (ex.: carreira criada depois) ganham uma linha zerada
+        ja_possuem = select(UsuarioCarreiraScore.usuario_id).where(UsuarioCarreiraScore.carreira_id == carreira_id)
+        session.execute(
+            insert(UsuarioCarreiraScore).from_select(
+                ["usuario_id", "carreira_id", "peso_coberto", "peso_total"],
+                select(UsuarioCarreiraScore.usuario_id, literal(carreira_id), literal(0), literal(0))
+                .where(UsuarioCarreiraScore.usuario_id.not_in(ja_possuem))
+                .distinct(),
+            )
+        )
+        peso_total = (
+            select(func.coalesce(func.sum(_frequencia_considerada()), 0))
+            .where(CarreiraHabilidade.carreira_id == carreira_id, _filtro_min_freq())
+            .scalar_subquery()
+        )
+        peso_coberto = (
+            select(func.coalesce(func.sum(_frequencia_considerada()), 0))
+            .select_from(CarreiraHabilidade)
+            .join(UsuarioHabilidade, UsuarioHabilidade.habilidade_id == CarreiraHabilidade.habilidade_id)
+            .where(
+                UsuarioHabilidade.usuario_id == UsuarioCarreiraScore.usuario_id,
+                CarreiraHabilidade.carreira_id == carreira_id,
+                _filtro_min_freq(),
+            )
+            .scalar_subquery()
+        )
+        session.execute(
+            update(UsuarioCarreiraScore)
+            .where(UsuarioCarreiraScore.carreira_id == carreira_id)
+            .values(peso_total=peso_total, peso_coberto=peso_coberto)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def materializar_scores_usuario(session: Session, usuario_id: int) -> None:
+    """Grava (ou corrige) as linhas de usuario_carreira_score do usuário para todas as carreiras a partir da matriz residente
+
+    Usa INSERT ... ON CONFLICT (usuario_id, carreira_id) DO UPDATE, então chamadas repetidas ou concorrentes não
+    violam uq_usuario_carreira_score. Executado na transação da sessão, sem commit.
+    """
+    resultados = compatibilidade_carreiras_por_usuario(session, usuario_id, detalhes=False)
+    if not resultados:
+        return
+    comando = insert_com_conflito(session, UsuarioCarreiraScore)
+    session.execute(
+        comando.on_conflict_do_update(
+            index_elements=["usuario_id", "carreira_id"],
+            set_={"peso_coberto": comando.excluded.peso_coberto, "peso_total": comando.excluded.peso_total},
         ),
-        reverse=True, # ordem decrescente
+        [
+            {
+                "usuario_id": usuario_id,
+                "carreira_id": r["carreira_id"],
+                "peso_coberto": int(r["peso_coberto"]),
+                "peso_total": int(r["peso_total"]),
+            }
+            for r in resultados
+        ],
     )
-    return resultados
+
+
+def compatibilidade_materializada_por_usuario(
+    session: Session,
+    usuario_id: int,
+    *,
+    limite: int | None = None, # quantidade máxima de carreiras retornadas (None = todas)
+    deslocamento: int = 0, # quantidade de carreiras do topo a pular (paginação)
+) -> List[Dict[str, Any]]:
+    """Retorna a compatibilidade do usuário com todas as carreiras a partir de usuario_carreira_score
+
+    Equivale a compatibilidade_carreiras_por_usuario com parâmetros padrão e detalhes=False, mas lê os pesos
+    prontos em uma única consulta indexada. Somente leitura: um usuário sem linhas materializadas (ex.: inserido
+    fora de criar_usuario) é calculado pela matriz residente sem gravar nada.
+    """
+    linhas = (
+        session.query(Carreira.id, Carreira.nome, UsuarioCarreiraScore.peso_coberto, UsuarioCarreiraScore.peso_total)
+        .outerjoin(
+            UsuarioCarreiraScore,
+            and_(UsuarioCarreiraScore.carreira_id == Carreira.id, UsuarioCarreiraScore.usuario_id == usuario_id),
+        )
+        .all()
+    )
+    if linhas and all(peso_total is None for _, _, _, peso_total in linhas):
+        return compatibilidade_carreiras_por_usuario(session, usuario_id, limite=limite, deslocamento=deslocamento, detalhes=False)
+
+    resultados: List[Dict[str, Any]] = []
+    for carreira_id, carreira_nome, peso_coberto, peso_total in linhas:
+        peso_coberto, peso_total = int(peso_coberto or 0), int(peso_total or 0)
+        percentual = _percentual(peso_coberto, peso_total)
+        resultados.append({
+            "carreira_id": carreira_id,
+            "carreira_nome": carreira_nome,
+            "percentual": percentual,
+            "peso_coberto": round(float(peso_coberto), 4),
+            "peso_total": round(float(peso_total), 4),
+        })
+    return _paginar(resultados, limite, deslocamento)
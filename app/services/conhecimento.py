@@ -1,5 +1,6 @@
 from app.models.conhecimentoModels import Conhecimento
 from app.schemas.conhecimentoSchemas import ConhecimentoBase, ConhecimentoOut
+from app.services.mapeamento import invalidar_mapa
 
 
 def criar_conhecimento(session, conhecimento_data: ConhecimentoBase) -> ConhecimentoOut:
@@ -41,5 +42,6 @@ def deletar_conhecimento(session, id: int) -> ConhecimentoOut | None:
     if conhecimento:
         session.delete(conhecimento)
         session.commit()
+        invalidar_mapa(session)  # remove relações com cursos e categorias em cascata
         return ConhecimentoOut.model_validate(conhecimento)
     return None
@@ -1,5 +1,6 @@
 from app.models.conhecimentoCategoriaModels import ConhecimentoCategoria
 from app.schemas.conhecimentoCategoriaSchemas import ConhecimentoCategoriaBase, ConhecimentoCategoriaOut, ConhecimentoCategoriaAtualizar
+from app.services.mapeamento import atualizar_mapa_conhecimento
 
 
 def criar_conhecimento_categoria(session, conhecimento_categoria_data: ConhecimentoCategoriaBase) -> ConhecimentoCategoriaOut:
@@ -7,6 +8,7 @@ def criar_conhecimento_categoria(session, conhecimento_categoria_data: Conhecime
     nova = ConhecimentoCategoria(**conhecimento_categoria_data.model_dump())
     session.add(nova)
     session.commit()
+    atualizar_mapa_conhecimento(session, conhecimento_categoria_data.conhecimento_id)
     session.refresh(nova)
     return ConhecimentoCategoriaOut.model_validate(nova)
 
@@ -23,6 +25,7 @@ def remover_conhecimento_categoria(session, conhecimento_id: int, categoria_id:
     if relacao:
         session.delete(relacao)
         session.commit()
+        atualizar_mapa_conhecimento(session, conhecimento_id)
         return ConhecimentoCategoriaOut.model_validate(relacao)
     return None
 
@@ -42,5 +45,6 @@ def atualizar_conhecimento_categoria(session, relacao_id: int, data: Conheciment
     except Exception:
         session.rollback()
         raise
+    atualizar_mapa_conhecimento(session, relacao.conhecimento_id)
     session.refresh(relacao)
     return ConhecimentoCategoriaOut.model_validate(relacao)
@@ -1,5 +1,6 @@
 from app.models.cursoModels import Curso
 from app.schemas.cursoSchemas import CursoBase, CursoOut
+from app.services.mapeamento import invalidar_mapa
 
 
 def criar_curso(session, curso_data: CursoBase) -> CursoOut:
@@ -7,6 +8,7 @@ def criar_curso(session, curso_data: CursoBase) -> CursoOut:
     novo_curso = Curso(**curso_data.model_dump())
     session.add(novo_curso)
     session.commit()
+    invalidar_mapa(session)
     session.refresh(novo_curso)
     return CursoOut.model_validate(novo_curso)
 
@@ -30,6 +32,7 @@ def atualizar_curso(session, id: int, curso_data: CursoBase) -> CursoOut | None:
         for key, value in curso_data.model_dump(exclude_unset=True).items():
             setattr(curso, key, value)
         session.commit()
+        invalidar_mapa(session)
         session.refresh(curso)
         return CursoOut.model_validate(curso)
     return None
@@ -41,5 +44,6 @@ def deletar_curso(session, id: int) -> CursoOut | None:
     if curso:
         session.delete(curso)
         session.commit()
+        invalidar_mapa(session)
         return CursoOut.model_validate(curso)
     return None
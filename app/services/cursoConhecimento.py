@@ -1,5 +1,6 @@
 from app.models.cursoConhecimentoModels import CursoConhecimento
 from app.schemas.cursoConhecimentoSchemas import CursoConhecimentoBase, CursoConhecimentoOut
+from app.services.mapeamento import atualizar_mapa_cursos
 
 
 def criar_curso_conhecimento(session, curso_conhecimento_data: CursoConhecimentoBase) -> CursoConhecimentoOut:
@@ -7,6 +8,7 @@ def criar_curso_conhecimento(session, curso_conhecimento_data: CursoConhecimento
     nova = CursoConhecimento(**curso_conhecimento_data.model_dump())
     session.add(nova)
     session.commit()
+    atualizar_mapa_cursos(session, [curso_conhecimento_data.curso_id])
     session.refresh(nova)
     return CursoConhecimentoOut.model_validate(nova)
 
@@ -23,5 +25,6 @@ def remover_curso_conhecimento(session, curso_id: int, conhecimento_id: int) ->
     if relacao:
         session.delete(relacao)
         session.commit()
+        atualizar_mapa_cursos(session, [curso_id])
         return CursoConhecimentoOut.model_validate(relacao)
     return None
@@ -1,11 +1,21 @@
 from dotenv import load_dotenv 
 import os
-from typing import List
+from typing import AsyncIterator, List
 from sqlalchemy.orm import Session
-from openai import OpenAI
-import json, re, unicodedata
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient
+from fastapi.concurrency import run_in_threadpool
+import asyncio, contextlib, hashlib, httpx, json, re, time, unicodedata, weakref
+from datetime import datetime, timedelta
+from functools import lru_cache
+from sqlalchemy import func
 from app.models.normalizacaoModels import Normalizacao
 from app.models.categoriaModels import Categoria 
+from app.models.extracaoCacheModels import ExtracaoCache
+from app.models.habilidadeModels import Habilidade
+from app.utils.cache import CachePorBanco
+from app.utils.metricas import Contadores, Histograma, cronometrar
+from app.utils.resiliencia import CircuitoAberto, DisjuntorCircuito, PoliticaRetentativa, chamar_com_resiliencia_async
+from app.utils.sql import insert_com_conflito
 
 
 load_dotenv()
@@ -75,15 +85,155 @@ Categorias permitidas (escolha exata de um destes nomes):
 """
 
 
-def carregar_padroes_db(session: Session | None) -> list[tuple[re.Pattern, str]]:
-    """Carrega padrões de normalização do banco de dados e retorna lista de tuplas (regex compilado, nome padronizado)"""
-    if session is None:
-        return []
+class MotorNormalizacao:
+    """Regras da tabela normalizacao compiladas uma única vez e reaproveitadas por todo o processo
+
+    - padrões literais (ex.: r"^kubernetes$") viram busca O(1) em dicionário
+    - os demais regex são combinados em uma única alternância, preservando a prioridade por id
+    - padrões que não podem ser combinados (retrorreferências, grupos nomeados, flags inline) ficam isolados
+    """
+
+    def __init__(self, regras: list[tuple[int, str, str]], assinatura: tuple):
+        self.assinatura = assinatura  # (quantidade, hash do conteúdo) das regras no momento da carga
+        self.verificado_em = time.monotonic()
+        self.literais: dict[str, tuple[int, str]] = {}
+        self.isolados: list[tuple[int, re.Pattern, str]] = []
+        combinaveis: list[tuple[int, str, str]] = []
+        for prioridade, (_, padrao, valor) in enumerate(regras):
+            try:
+                regex = re.compile(padrao, re.IGNORECASE)
+            except re.error:
+                continue  # padrão inválido é ignorado sem descartar as demais regras
+            literal = _padrao_literal(padrao)
+            if literal is not None:
+                self.literais.setdefault(literal.lower(), (prioridade, valor))
+            elif _PADRAO_NAO_COMBINAVEL.search(padrao):
+                self.isolados.append((prioridade, regex, valor))
+            else:
+                combinaveis.append((prioridade, padrao, valor))
+        self.combinado: re.Pattern | None = None
+        self.valores_combinados: dict[str, tuple[int, str]] = {}
+        if combinaveis:
+            try:
+                self.combinado = re.compile(
+                    "|".join(f"(?P<r{i}>{padrao})" for i, (_, padrao, _) in enumerate(combinaveis)),
+                    re.IGNORECASE,
+                )
+                self.valores_combinados = {f"r{i}": (prioridade, valor) for i, (prioridade, _, valor) in enumerate(combinaveis)}
+            except re.error:
+                self.isolados.extend((prioridade, re.compile(padrao, re.IGNORECASE), valor) for prioridade, padrao, valor in combinaveis)
+                self.isolados.sort(key=lambda r: r[0])
+
+    def aplicar(self, habilidade: str) -> str | None:
+        """Retorna o nome padronizado da regra de menor id que casa integralmente com a habilidade (ou None)"""
+        melhor = self.literais.get(habilidade)
+        if self.combinado is not None:
+            achado = self.combinado.fullmatch(habilidade)  # a alternância testa da esquerda para a direita: menor id vence
+            if achado:
+                candidato = self.valores_combinados[achado.lastgroup]
+                if melhor is None or candidato[0] < melhor[0]:
+                    melhor = candidato
+        for prioridade, regex, valor in self.isolados:
+            if melhor is not None and prioridade > melhor[0]:
+                break
+            if regex.fullmatch(habilidade):
+                melhor = (prioridade, valor)
+                break
+        return melhor[1] if melhor else None
+
+
+_PADRAO_NAO_COMBINAVEL = re.compile(r'\\\d|\(\?P|\(\?[aiLmsux-]+[:)]|\\[AZ]')  # retrorreferências, grupos nomeados, flags inline e âncoras absolutas
+_METACARACTERES = set('.^$*+?{}[]()|\\')
+INTERVALO_VERIFICACAO = 30  # segundos entre verificações de alteração da tabela normalizacao
+_cache_normalizacao = CachePorBanco()
+
+
+def _padrao_literal(padrao: str) -> str | None:
+    """Retorna o texto exato casado por um padrão sem metacaracteres (aceitando ^, $ e escapes simples) ou None"""
+    corpo = padrao[1:] if padrao.startswith('^') else padrao
+    if corpo.endswith('$') and not corpo.endswith('\\$'):
+        corpo = corpo[:-1]
+    literal = []
+    i = 0
+    while i < len(corpo):
+        c = corpo[i]
+        if c == '\\':
+            if i + 1 >= len(corpo) or corpo[i + 1].isalnum():
+                return None  # \d, \s, \b etc. não são literais
+            literal.append(corpo[i + 1])
+            i += 2
+            continue
+        if c in _METACARACTERES:
+            return None
+        literal.append(c)
+        i += 1
+    return ''.join(literal)
+
+
+def _carregar_regras(session: Session) -> list[tuple[int, str, str]]:
+    """Lê as regras de normalização (id, padrão, valor padronizado) em ordem de prioridade"""
+    regras = session.query(Normalizacao.id, Normalizacao.nome, Normalizacao.nome_padronizado).order_by(Normalizacao.id.asc()).all()
+    return [tuple(r) for r in regras]
+
+
+def _resumir_regras(regras: list[tuple[int, str, str]]) -> tuple:
+    """Quantidade e hash do conteúdo das regras: muda com qualquer inserção, remoção ou edição de padrão ou valor"""
+    resumo = hashlib.sha256()
+    for id_regra, padrao, valor in regras:
+        resumo.update(f"{id_regra}\x00{padrao}\x00{valor}\x01".encode("utf-8"))
+    return (len(regras), resumo.hexdigest())
+
+
+def _assinatura_normalizacao(session: Session) -> tuple:
+    """Assinatura pelo conteúdo da tabela, que detecta até edições feitas direto no banco sem mexer em atualizado_em
+
+    A tabela tem poucas linhas curtas e a assinatura é conferida no máximo a cada INTERVALO_VERIFICACAO segundos.
+    """
+    return _resumir_regras(_carregar_regras(session))
+
+
+def _construir_motor(session: Session) -> MotorNormalizacao:
+    """Carrega as regras do banco (uma única consulta) e compila o motor de normalização"""
     try:
-        regras = session.query(Normalizacao).order_by(Normalizacao.id.asc()).all() 
-        return [(re.compile(r.nome, re.IGNORECASE), r.nome_padronizado) for r in regras]
+        regras = _carregar_regras(session)
     except Exception:
-        return []
+        return MotorNormalizacao([], assinatura=None)
+    return MotorNormalizacao(regras, _resumir_regras(regras))
+
+
+def _obter_verificado(cache: CachePorBanco, session: Session, construir, assinar, intervalo: float | None = None):
+    """Retorna o valor cacheado (com atributos assinatura/verificado_em), reconstruindo-o quando a assinatura do banco mudou
+
+    A assinatura é conferida no máximo a cada intervalo segundos (padrão INTERVALO_VERIFICACAO; 0 confere sempre).
+    """
+    valor = cache.obter(session, construir)
+    if time.monotonic() - valor.verificado_em < (INTERVALO_VERIFICACAO if intervalo is None else intervalo):
+        return valor
+    try:
+        assinatura = assinar(session)
+    except Exception:
+        return valor
+    if assinatura == valor.assinatura:
+        valor.verificado_em = time.monotonic()
+        return valor
+    cache.invalidar(session)
+    return cache.obter(session, construir)
+
+
+def obter_motor_normalizacao(session: Session | None) -> MotorNormalizacao | None:
+    """Retorna o motor compilado do banco da sessão, reconstruindo-o apenas quando a tabela normalizacao mudou
+
+    A assinatura da tabela é conferida no máximo a cada INTERVALO_VERIFICACAO segundos, então normalizar
+    as habilidades de uma extração inteira não gera nenhuma consulta.
+    """
+    if session is None:
+        return None
+    return _obter_verificado(_cache_normalizacao, session, _construir_motor, _assinatura_normalizacao)
+
+
+def invalidar_normalizacao(session: Session | None = None) -> None:
+    """Descarta o motor compilado para que a próxima normalização recarregue as regras do banco"""
+    _cache_normalizacao.invalidar(session)
 
 
 def listar_categorias_db(session: Session | None) -> list[str]:
@@ -97,22 +247,42 @@ def listar_categorias_db(session: Session | None) -> list[str]:
         return []
 
 
-def normalizar_habilidade(habilidade: str, session: Session | None = None) -> str:
-    """Normaliza nome de habilidade aplicando padrões do banco de dados e regras de limpeza/formatação"""
+_SEPARADORES = re.compile(r'[\-_\/]+')
+_ESPACOS = re.compile(r'\s+')
+_VERSAO_COLADA = re.compile(r'\b(python|node|java|go|ruby|php|rust|scala|windows)(\d{1,3}(?:\.\d+)*)\b')
+_VERSAO_SEPARADA = re.compile(r'\b(python|node|java|go|ruby|php|rust|scala|windows)[ \-]+\d+(?:\.\d+){0,2}\b')
+_VERSAO_C = re.compile(r'\b(c\+\+|c#)[ \-]*\d{1,2}\b')
+_VERSAO_DOTNET = re.compile(r'\b(dotnet|\.net)[ \-]*\d+(?:\.\d+){0,2}\b')
+
+
+@lru_cache(maxsize=4096)
+def _limpar_habilidade(habilidade: str) -> str:
+    """Aplica as regras fixas de limpeza/formatação (independentes do banco) ao nome bruto da habilidade"""
     habilidade = habilidade.strip() # remove espaços em branco nas extremidades
-    habilidade = re.sub(r'[\-_\/]+', ' ', habilidade) # normaliza hífen/underscore/"/" em espaço
-    habilidade = re.sub(r'\s+', ' ', habilidade)[:60] # reduz múltiplos espaços e limita tamanho
+    habilidade = _SEPARADORES.sub(' ', habilidade) # normaliza hífen/underscore/"/" em espaço
+    habilidade = _ESPACOS.sub(' ', habilidade)[:60] # reduz múltiplos espaços e limita tamanho
     nfkd = unicodedata.normalize('NFKD', habilidade) # normaliza acentuação
     habilidade = ''.join(c for c in nfkd if not unicodedata.combining(c)).lower() # remove acentos e converte para minúsculas
-    habilidade = re.sub(r'\b(python|node|java|go|ruby|php|rust|scala|windows)(\d{1,3}(?:\.\d+)*)\b', r'\1', habilidade) # remove versões
-    habilidade = re.sub(r'\b(python|node|java|go|ruby|php|rust|scala|windows)[ \-]+\d+(?:\.\d+){0,2}\b', r'\1', habilidade) # remove versões com hífen/espaço
-    habilidade = re.sub(r'\b(c\+\+|c#)[ \-]*\d{1,2}\b', r'\1', habilidade) # remove versões de C++ e C#
-    habilidade = re.sub(r'\b(dotnet|\.net)[ \-]*\d+(?:\.\d+){0,2}\b', r'dotnet', habilidade) # remove versões de .NET
-    habilidade = habilidade.strip(' .;,-') # remove caracteres indesejados nas extremidades
-
-    # Tenta com padrões de normalização vindos do banco
-    for regex, valor in carregar_padroes_db(session) or []:  # Aqui os padrões são aplicados
-        if regex.fullmatch(habilidade):
+    habilidade = _VERSAO_COLADA.sub(r'\1', habilidade) # remove versões
+    habilidade = _VERSAO_SEPARADA.sub(r'\1', habilidade) # remove versões com hífen/espaço
+    habilidade = _VERSAO_C.sub(r'\1', habilidade) # remove versões de C++ e C#
+    habilidade = _VERSAO_DOTNET.sub(r'dotnet', habilidade) # remove versões de .NET
+    return habilidade.strip(' .;,-') # remove caracteres indesejados nas extremidades
+
+
+def normalizar_habilidade(habilidade: str, session: Session | None = None, motor: MotorNormalizacao | None = None) -> str:
+    """Normaliza nome de habilidade aplicando padrões do banco de dados e regras de limpeza/formatação
+
+    motor é um motor já obtido com obter_motor_normalizacao: dispensa a sessão (uso fora da thread que a detém).
+    """
+    habilidade = _limpar_habilidade(habilidade)
+
+    # Tenta com padrões de normalização vindos do banco (motor compilado e cacheado)
+    if motor is None:
+        motor = obter_motor_normalizacao(session)
+    if motor is not None:
+        valor = motor.aplicar(habilidade)
+        if valor is not None:
             return valor  # valor já está com acento e capitalização correta
 
     # Se não encontrou no padrão, capitaliza a primeira letra de cada palavra
@@ -139,94 +309,895 @@ def deduplicar(hab: str) -> str:
     return hab
 
 
-def extrair_habilidades_descricao(descricao: str, session: Session | None = None) -> List[dict]:
-    """Extrai habilidades técnicas da descrição usando OpenAI GPT-4.1 e retorna lista com nomes normalizados e categorias sugeridas"""
-    cliente = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) # inicializa o cliente com a chave da API
+class DicionarioHabilidades:
+    """Autômato de palavras (trie) com os nomes das habilidades conhecidas e dos padrões literais de normalização
+
+    Percorre a descrição padronizada uma única vez, casando sempre o termo mais longo a partir de cada palavra.
+    Termos de uma palavra que também são siglas curtas ou palavras comuns (TERMOS_AMBIGUOS, ex.: "redes", "rest",
+    "ia") não são aceitos sozinhos: voltam como candidatos para a IA confirmar pelo contexto.
+    """
+
+    def __init__(self, termos: list[tuple[str, dict]], assinatura: tuple | None):
+        self.assinatura = assinatura
+        self.verificado_em = time.monotonic()
+        self.raiz: dict = {}
+        for termo, item in termos:
+            palavras = padronizar_descricao(termo).split()
+            if len("".join(palavras)) < TAMANHO_MINIMO_TERMO:
+                continue  # nomes de uma letra (ex.: "C", "R") geram falsos positivos no texto livre
+            variantes = [palavras, ["".join(palavras)]] if len(palavras) > 1 else [palavras]  # "spring-boot" vira "springboot" na descrição
+            ambiguo = len(palavras) == 1 and (len(palavras[0]) <= TAMANHO_MAXIMO_SIGLA or palavras[0] in TERMOS_AMBIGUOS)
+            for variante in variantes:
+                no = self.raiz
+                for palavra in variante:
+                    no = no.setdefault(palavra, {})
+                no.setdefault(_FIM_TERMO, (item, ambiguo))  # primeiro termo cadastrado vence (habilidades antes dos padrões)
+
+    def encontrar(self, descricao_padronizada: str) -> tuple[list[dict], list[dict], list[int], list[int]]:
+        """Retorna (habilidades reconhecidas, candidatas ambíguas, posições das palavras que não casaram com nenhum termo,
+        posições das palavras das candidatas ambíguas), sem repetir habilidades"""
+        palavras = descricao_padronizada.split()
+        encontrados: list[dict] = []
+        ambiguos: list[dict] = []
+        vistos = set()
+        livres: list[int] = []
+        duvidosas: list[int] = []
+        i = 0
+        while i < len(palavras):
+            no = self.raiz
+            fim = None
+            j = i
+            while j < len(palavras) and palavras[j] in no:
+                no = no[palavras[j]]
+                j += 1
+                if _FIM_TERMO in no:
+                    fim = (j, no[_FIM_TERMO])
+            if fim is None:
+                livres.append(i)
+                i += 1
+                continue
+            j, (item, ambiguo) = fim
+            if ambiguo:
+                duvidosas.extend(range(i, j))
+            if item["nome"] not in vistos:
+                vistos.add(item["nome"])
+                (ambiguos if ambiguo else encontrados).append(dict(item))
+            i = j
+        return encontrados, ambiguos, livres, duvidosas
+
+
+_FIM_TERMO = ""  # chave que marca o fim de um termo na trie (palavras padronizadas nunca são vazias)
+TAMANHO_MINIMO_TERMO = 2
+TAMANHO_MAXIMO_SIGLA = 3  # termos de uma palavra até esse tamanho (ex.: "ia", "go", "sql") pedem confirmação da IA
+TERMOS_AMBIGUOS = frozenset({  # nomes de habilidade que também aparecem como palavras comuns em português ou inglês
+    "api", "apis", "rest", "spring", "rede", "redes", "dados", "web", "cloud", "nuvem", "container", "switch",
+    "seguranca", "arquitetura", "desenvolvimento", "qualidade", "compliance", "identidade", "infraestrutura",
+    "produtividade", "mensageria", "observabilidade", "roteamento", "redundancia", "virtualizacao", "estatistica",
+    "trace", "tracing", "less", "windows", "backend", "frontend",
+})
+EXTRACAO_MODO = os.getenv("EXTRACAO_MODO", "llm")  # llm | hibrido (dicionário local + IA só com os trechos não resolvidos) | local (sem IA)
+EXTRACAO_JANELA_PALAVRAS = int(os.getenv("EXTRACAO_JANELA_PALAVRAS", "5"))  # palavras de contexto de cada lado de um termo não resolvido
+_SIMBOLO_TECNICO = re.compile(r'[A-Za-z]\d|\w[#+]|[A-Za-z]{2,}[./][A-Za-z]{2,}')  # S3, Python3, C#, C++, Node.js, CI/CD (não "e/ou")
+_FIM_DE_FRASE = ".!?:;"
+_cache_dicionario = CachePorBanco()
+
+
+def _parece_habilidade(token: str, inicio_de_frase: bool, sem_caixa: bool) -> bool:
+    """Indica se uma palavra não reconhecida tem cara de nome técnico: números ou símbolos colados (S3, C#, Node.js, CI/CD),
+    sigla em maiúsculas (AWS) ou nome próprio no meio da frase (Kafka); texto todo em minúsculas (sem_caixa) não tem
+    esse sinal, então qualquer palavra vale"""
+    palavra = token.strip("()[]{}\"'“”‘’,.;:!?")
+    letras = [c for c in palavra if c.isalpha()]
+    if not letras:
+        return False
+    if sem_caixa or _SIMBOLO_TECNICO.search(palavra):
+        return True
+    if len(letras) >= 2 and all(c.isupper() for c in letras):
+        return True
+    return palavra[0].isupper() and not inicio_de_frase
+
+
+def _trechos_pendentes(descricao: str, dicionario: DicionarioHabilidades) -> tuple[list[dict], list[dict], str | None]:
+    """Passa a descrição pelo dicionário e retorna (habilidades reconhecidas, candidatas ambíguas, trechos para a IA)
+
+    Os trechos são janelas de EXTRACAO_JANELA_PALAVRAS palavras em volta de cada candidata ambígua e de cada palavra
+    não reconhecida com cara de nome técnico (_parece_habilidade), unidas quando se sobrepõem; sem nenhuma delas,
+    a descrição está resolvida e os trechos vêm None.
+    """
+    tokens: list[str] = []
+    inicios: list[bool] = []  # token abre frase ou linha (maiúscula ali não indica nome próprio)
+    palavras: list[str] = []  # palavra padronizada de cada token que tem letras ou números
+    origem: list[int] = []  # token de cada palavra padronizada
+    for linha in descricao.splitlines():
+        inicio = True
+        for token in linha.split():
+            padronizada = padronizar_descricao(token)
+            if padronizada:
+                palavras.append(padronizada)
+                origem.append(len(tokens))
+            tokens.append(token)
+            inicios.append(inicio)
+            inicio = token[-1] in _FIM_DE_FRASE or not any(c.isalnum() for c in token)  # marcadores de lista ("-", "1)")
+    encontrados, ambiguos, livres, duvidosas = dicionario.encontrar(" ".join(palavras))
+    sem_caixa = not any(c.isupper() for c in descricao)
+    alvos = sorted({origem[i] for i in duvidosas} | {
+        origem[i] for i in livres if _parece_habilidade(tokens[origem[i]], inicios[origem[i]], sem_caixa)
+    })
+    if not alvos:
+        return encontrados, ambiguos, None
+    janelas: list[list[int]] = []
+    for alvo in alvos:
+        inicio, fim = max(alvo - EXTRACAO_JANELA_PALAVRAS, 0), min(alvo + EXTRACAO_JANELA_PALAVRAS + 1, len(tokens))
+        if janelas and inicio <= janelas[-1][1]:
+            janelas[-1][1] = max(janelas[-1][1], fim)
+        else:
+            janelas.append([inicio, fim])
+    trechos = " [...] ".join(" ".join(tokens[inicio:fim]) for inicio, fim in janelas)
+    return encontrados, ambiguos, trechos
+
+
+def _assinatura_catalogo(session: Session) -> tuple:
+    """Muda quando habilidades ou categorias são inseridas, removidas ou atualizadas"""
+    quantidade, maior_id, atualizado = session.query(
+        func.count(Habilidade.id), func.max(Habilidade.id), func.max(Habilidade.atualizado_em)
+    ).one()
+    categorias = session.query(func.count(Categoria.id), func.max(Categoria.id), func.max(Categoria.atualizado_em)).one()
+    return (quantidade, maior_id, str(atualizado), tuple(map(str, categorias)))
+
+
+def _assinatura_dicionario(session: Session) -> tuple:
+    """Muda quando habilidades, categorias ou padrões de normalização são inseridos, removidos ou atualizados"""
+    return (*_assinatura_catalogo(session), _assinatura_normalizacao(session))
+
+
+def _construir_dicionario(session: Session) -> DicionarioHabilidades:
+    """Carrega habilidades (com categoria) e padrões literais de normalização e monta o autômato"""
+    try:
+        assinatura = _assinatura_dicionario(session)
+        linhas = (
+            session.query(Habilidade.nome, Categoria.nome)
+            .join(Categoria, Categoria.id == Habilidade.categoria_id)
+            .order_by(Habilidade.id.asc())
+            .all()
+        )
+    except Exception:
+        return DicionarioHabilidades([], assinatura=None)
+    termos = [(nome, {"nome": nome, "categoria_sugerida": categoria}) for nome, categoria in linhas]
+    por_nome = {nome.lower(): item for nome, item in termos}
+    motor = obter_motor_normalizacao(session)
+    for literal, (_, valor) in sorted(motor.literais.items(), key=lambda par: par[1][0]):
+        termos.append((literal, por_nome.get(valor.lower(), {"nome": valor, "categoria_sugerida": None})))
+    return DicionarioHabilidades(termos, assinatura)
+
+
+def obter_dicionario_habilidades(session: Session) -> DicionarioHabilidades:
+    """Retorna o autômato de habilidades conhecidas do banco da sessão, reconstruído apenas quando os dados mudam"""
+    return _obter_verificado(_cache_dicionario, session, _construir_dicionario, _assinatura_dicionario)
+
+
+def invalidar_dicionario_habilidades(session: Session | None = None) -> None:
+    """Descarta o autômato e o catálogo para que a próxima extração/preview recarregue as habilidades do banco"""
+    _cache_dicionario.invalidar(session)
+    _cache_catalogo.invalidar(session)
+
+
+def dobrar_nome(nome: str) -> str:
+    """Chave de busca sem acentos, sem diferença de maiúsculas e com espaços simples (ex.: " Análise  de DADOS" -> "analise de dados")"""
+    nome = unicodedata.normalize('NFD', nome)
+    nome = ''.join(c for c in nome if not unicodedata.combining(c))
+    return _ESPACOS.sub(' ', nome).strip().casefold()
+
+
+class CatalogoHabilidades:
+    """Habilidades (com a categoria atual) e categorias do banco em mapas indexados por dobrar_nome
+
+    Resolve os nomes de um preview inteiro em memória, sem uma consulta por habilidade. Em nomes que só
+    diferem por acento ou maiúsculas, vale o registro de menor id.
+    """
+
+    def __init__(self, habilidades: list[tuple], categorias: list[tuple], assinatura: tuple | None):
+        self.assinatura = assinatura
+        self.verificado_em = time.monotonic()
+        self._habilidades: dict[str, tuple] = {}  # nome dobrado -> (id, nome, categoria_id, categoria_nome)
+        for linha in habilidades:
+            self._habilidades.setdefault(dobrar_nome(linha[1]), tuple(linha))
+        self._categorias: dict[str, tuple] = {}  # nome dobrado -> (id, nome)
+        for linha in categorias:
+            self._categorias.setdefault(dobrar_nome(linha[1]), tuple(linha))
+
+    def habilidade(self, nome: str | None) -> tuple | None:
+        """(id, nome, categoria_id, categoria_nome) da habilidade com esse nome, ou None"""
+        return self._habilidades.get(dobrar_nome(nome)) if nome else None
+
+    def categoria(self, nome: str | None) -> tuple | None:
+        """(id, nome) da categoria com esse nome, ou None"""
+        return self._categorias.get(dobrar_nome(nome)) if nome else None
+
+
+_cache_catalogo = CachePorBanco()
+
+
+def _construir_catalogo(session: Session) -> CatalogoHabilidades:
+    """Carrega habilidades (com o nome da categoria) e categorias em duas consultas"""
+    try:
+        assinatura = _assinatura_catalogo(session)
+        habilidades = (
+            session.query(Habilidade.id, Habilidade.nome, Habilidade.categoria_id, Categoria.nome)
+            .outerjoin(Categoria, Categoria.id == Habilidade.categoria_id)
+            .order_by(Habilidade.id.asc())
+            .all()
+        )
+        categorias = session.query(Categoria.id, Categoria.nome).order_by(Categoria.id.asc()).all()
+    except Exception:
+        return CatalogoHabilidades([], [], assinatura=None)
+    return CatalogoHabilidades(habilidades, categorias, assinatura)
+
+
+def obter_catalogo_habilidades(session: Session, intervalo: float | None = 0) -> CatalogoHabilidades:
+    """Retorna o catálogo do banco da sessão; por padrão confere a assinatura a cada chamada (consultas de agregação
+    de custo fixo) para que ids e categorias do preview reflitam o banco, recarregando-o só quando algo mudou"""
+    return _obter_verificado(_cache_catalogo, session, _construir_catalogo, _assinatura_catalogo, intervalo)
+
+
+def _combinar_habilidades(locais: list[dict], extraidas: list[dict]) -> list[dict]:
+    """Junta as habilidades reconhecidas localmente com as extraídas pela IA, sem repetição"""
+    vistos = {deduplicar(item["nome"]) for item in locais}
+    combinadas = list(locais)
+    for item in extraidas:
+        chave = deduplicar(item["nome"])
+        if chave not in vistos:
+            vistos.add(chave)
+            combinadas.append(item)
+    return combinadas
+
+
+LIMITES_LATENCIA = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)  # segundos
+_latencia_modelo = Histograma(LIMITES_LATENCIA)  # apenas a chamada ao modelo (sem espera na fila de concorrência)
+_latencia_extracao = Histograma(LIMITES_LATENCIA)  # extração completa (dicionário, cache, modelo e interpretação)
+_contadores_extracao = Contadores()
+
+
+def _registrar_chamada_modelo(duracao: float, resposta) -> None:
+    """Registra latência, tokens de entrada/saída (usage da resposta) e falhas de uma chamada ao modelo"""
+    _latencia_modelo.registrar(duracao)
+    _contadores_extracao.incrementar("modelo_chamadas")
+    if resposta is None:
+        _contadores_extracao.incrementar("modelo_erros")
+        return
+    uso = getattr(resposta, "usage", None)
+    _contadores_extracao.incrementar("tokens_entrada", int(getattr(uso, "input_tokens", 0) or 0))
+    _contadores_extracao.incrementar("tokens_saida", int(getattr(uso, "output_tokens", 0) or 0))
+
+
+def resumo_metricas_extracao() -> dict:
+    """Resumo das métricas de extração acumuladas neste processo (cada worker do servidor mantém as suas)"""
+    contadores = _contadores_extracao.resumo()
+    chamadas = contadores.get("modelo_chamadas", 0)
+    sucesso = chamadas - contadores.get("modelo_erros", 0)
+    return {
+        "latencia_extracao_segundos": _latencia_extracao.resumo(),
+        "latencia_modelo_segundos": _latencia_modelo.resumo(),
+        "modelo": {
+            "chamadas": chamadas,
+            "erros": contadores.get("modelo_erros", 0),
+            "tokens_entrada": contadores.get("tokens_entrada", 0),
+            "tokens_saida": contadores.get("tokens_saida", 0),
+            "tokens_entrada_media": round(contadores.get("tokens_entrada", 0) / sucesso, 1) if sucesso else None,
+            "tokens_saida_media": round(contadores.get("tokens_saida", 0) / sucesso, 1) if sucesso else None,
+        },
+        "origem": {
+            nome: contadores.get(f"origem_{nome}", 0) for nome in ("local", "cache", "modelo")
+        },
+        "interpretacao": {
+            nome: contadores.get(f"interpretacao_{nome}", 0) for nome in ("json_direto", "json_embutido", "sem_json")
+        },
+        "resiliencia": {
+            "retentativas": contadores.get("modelo_retentativas", 0),
+            "recusadas_circuito": contadores.get("modelo_recusadas", 0),
+            "circuito": disjuntor_openai.resumo(),
+        },
+    }
+
+
+def reiniciar_metricas_extracao() -> None:
+    """Zera as métricas de extração deste processo"""
+    _latencia_extracao.reiniciar()
+    _latencia_modelo.reiniciar()
+    _contadores_extracao.reiniciar()
+
+
+OPENAI_TIMEOUT_SEGUNDOS = float(os.getenv("OPENAI_TIMEOUT_SEGUNDOS", "30"))  # prazo de cada tentativa de chamada ao modelo
+OPENAI_TENTATIVAS = int(os.getenv("OPENAI_TENTATIVAS", "3"))  # tentativas por extração em falhas transitórias
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))  # segundos; espera máxima dobra a cada tentativa
+OPENAI_BACKOFF_MAXIMO = float(os.getenv("OPENAI_BACKOFF_MAXIMO", "8"))
+politica_openai = PoliticaRetentativa(OPENAI_TENTATIVAS, OPENAI_BACKOFF_BASE, OPENAI_BACKOFF_MAXIMO)
+disjuntor_openai = DisjuntorCircuito(
+    "openai",
+    limite_falhas=int(os.getenv("OPENAI_CIRCUITO_FALHAS", "5")),  # falhas transitórias seguidas que abrem o circuito
+    tempo_recuperacao=float(os.getenv("OPENAI_CIRCUITO_RECUPERACAO", "30")),  # segundos recusando chamadas antes de testar de novo
+)
+
+
+class ResultadoExtracao(list):
+    """Lista de habilidades extraídas que informa se a consulta ao modelo falhou
+
+    Compara como uma lista comum; falha é None quando a extração foi concluída (mesmo sem habilidades) e,
+    quando o modelo não respondeu, resume o motivo ("tempo_esgotado", "indisponivel", "circuito_aberto" ou "erro").
+    Nesse caso a lista traz apenas o que foi reconhecido localmente.
+    """
+
+    def __init__(self, itens=(), falha: str | None = None):
+        super().__init__(itens)
+        self.falha = falha
+
+    @property
+    def falhou(self) -> bool:
+        return self.falha is not None
+
+
+def _falha_transitoria(exc: Exception) -> bool:
+    """Falhas que valem nova tentativa e contam para o circuito: tempo esgotado, conexão, limite de taxa e erros 5xx"""
+    if isinstance(exc, (TimeoutError, APIConnectionError)):  # APITimeoutError é subclasse de APIConnectionError
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+def _registrar_falha_extracao(exc: Exception) -> str:
+    """Contabiliza recusas do circuito e resume a causa de uma falha na consulta ao modelo para ResultadoExtracao.falha"""
+    if isinstance(exc, CircuitoAberto):
+        _contadores_extracao.incrementar("modelo_recusadas")
+        return "circuito_aberto"
+    if isinstance(exc, TimeoutError) or "Timeout" in exc.__class__.__name__:
+        return "tempo_esgotado"
+    if _falha_transitoria(exc):
+        return "indisponivel"
+    return "erro"
+
+
+def _contar_retentativa(exc: Exception) -> None:
+    _contadores_extracao.incrementar("modelo_retentativas")
+
+
+MODELO_EXTRACAO = "gpt-4.1"
+VERSAO_PROMPT = hashlib.sha256(PROMPT_BASE.encode("utf-8")).hexdigest()[:12]  # muda sozinha quando o prompt é alterado
+EXTRACAO_CACHE_TTL_HORAS = int(os.getenv("EXTRACAO_CACHE_TTL_HORAS", "720"))  # validade das respostas guardadas em extracao_cache
+
+
+def chave_cache_extracao(descricao: str, categorias_lista: list[str], dica: str | None = None) -> str:
+    """Gera a chave do cache de extração a partir da descrição padronizada, versão do prompt, modelo, categorias ordenadas
+    e da dica do dicionário local (modo híbrido), quando houver"""
+    partes = [padronizar_descricao(descricao), VERSAO_PROMPT, MODELO_EXTRACAO, *sorted(categorias_lista)]
+    if dica:
+        partes.append(dica)
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def ler_cache_extracao(session: Session | None, chave: str) -> str | None:
+    """Retorna a resposta bruta do modelo guardada para a chave, se existir e ainda não tiver expirado"""
+    if session is None:
+        return None
+    try:
+        return session.query(ExtracaoCache.resposta).filter(
+            ExtracaoCache.chave == chave,
+            ExtracaoCache.expira_em > datetime.utcnow(),
+        ).scalar()
+    except Exception:
+        return None
+
+
+def gravar_cache_extracao(session: Session | None, chave: str, resposta: str) -> None:
+    """Guarda (ou renova) a resposta bruta do modelo para a chave com validade de EXTRACAO_CACHE_TTL_HORAS
+
+    Grava com um upsert em uma sessão própria e curta no mesmo banco, sem confirmar nem desfazer o que estiver
+    pendente na sessão do chamador.
+    """
+    if session is None:
+        return
+    agora = datetime.utcnow()
+    valores = {
+        "modelo": MODELO_EXTRACAO,
+        "versao_prompt": VERSAO_PROMPT,
+        "resposta": resposta,
+        "criado_em": agora,
+        "expira_em": agora + timedelta(hours=EXTRACAO_CACHE_TTL_HORAS),
+    }
+    try:
+        with Session(bind=session.get_bind()) as sessao_cache:
+            comando = insert_com_conflito(sessao_cache, ExtracaoCache).values(chave=chave, **valores)
+            sessao_cache.execute(comando.on_conflict_do_update(index_elements=["chave"], set_=valores))
+            sessao_cache.commit()
+    except Exception:
+        pass # falha ao gravar o cache não impede a extração
+
+
+def purgar_cache_extracao(session: Session, somente_expirados: bool = True) -> int:
+    """Remove respostas do cache de extração (apenas as expiradas ou todas) e retorna a quantidade removida"""
+    consulta = session.query(ExtracaoCache)
+    if somente_expirados:
+        consulta = consulta.filter(ExtracaoCache.expira_em <= datetime.utcnow())
+    removidos = consulta.delete(synchronize_session=False)
+    session.commit()
+    return removidos
+
+
+def _dica_dicionario(locais: list[dict], ambiguos: list[dict], recortado: bool = False) -> str | None:
+    """Texto acrescentado ao prompt no modo híbrido com o que o dicionário local encontrou na descrição"""
+    linhas = []
+    if recortado:
+        linhas.append("O texto da vaga abaixo traz apenas os trechos ainda não analisados, separados por [...].")
+    if locais:
+        linhas.append("Habilidades já reconhecidas neste texto (não é preciso repeti-las): " + ", ".join(item["nome"] for item in locais))
+    if ambiguos:
+        linhas.append(
+            "Termos do texto que podem ser habilidades ou palavras comuns (inclua somente se forem habilidades técnicas neste contexto): "
+            + ", ".join(item["nome"] for item in ambiguos)
+        )
+    return "\n".join(linhas) or None
+
+
+def _contexto_extracao(descricao: str, session: Session | None, modo: str) -> tuple[list[str], list[dict], str | None, str | None, str | None, str | None]:
+    """Prepara a extração: categorias, habilidades reconhecidas localmente, texto a enviar à IA (None se dispensada),
+    dica do dicionário para o prompt, chave do cache e resposta do modelo já guardada para esse texto
+
+    No modo híbrido a IA recebe só os trechos que o dicionário não resolveu (_trechos_pendentes), com as habilidades
+    já reconhecidas como dica; as janelas de contexto em volta de cada termo permitem completar nomes maiores
+    (ex.: "Spring" em "Spring Boot"). Sem termos pendentes a IA não é chamada. Candidatas ambíguas só entram no
+    resultado se a IA as confirmar; no modo "local" são descartadas.
+    """
     categorias_lista = listar_categorias_db(session)
+    locais: list[dict] = []
+    texto_ia: str | None = descricao
+    dica: str | None = None
+    if modo != "llm" and session is not None:
+        locais, ambiguos, trechos = _trechos_pendentes(descricao, obter_dicionario_habilidades(session))
+        if modo == "local" or trechos is None:
+            texto_ia = None # o dicionário resolveu a descrição
+        else:
+            texto_ia = trechos
+            dica = _dica_dicionario(locais, ambiguos, recortado=len(trechos) < len(" ".join(descricao.split())))
+    if texto_ia is None:
+        _contadores_extracao.incrementar("origem_local")
+        return categorias_lista, locais, None, None, None, None
+    chave = chave_cache_extracao(texto_ia, categorias_lista, dica)
+    texto_cacheado = ler_cache_extracao(session, chave)
+    _contadores_extracao.incrementar("origem_cache" if texto_cacheado is not None else "origem_modelo")
+    return categorias_lista, locais, texto_ia, dica, chave, texto_cacheado
+
+
+EXTRACAO_PALAVRAS_POR_PEDACO = int(os.getenv("EXTRACAO_PALAVRAS_POR_PEDACO", "350"))  # descrições maiores são divididas (0 desliga)
+EXTRACAO_SOBREPOSICAO_PALAVRAS = int(os.getenv("EXTRACAO_SOBREPOSICAO_PALAVRAS", "30"))  # palavras repetidas entre pedaços vizinhos
+
+
+def dividir_descricao(descricao: str, tamanho: int | None = None, sobreposicao: int | None = None) -> list[str]:
+    """Divide a descrição padronizada em pedaços de até tamanho palavras, sobrepostos em sobreposicao palavras
+
+    A sobreposição garante que uma habilidade de várias palavras cortada na fronteira apareça inteira em algum pedaço.
+    Descrições que cabem em um pedaço (ou tamanho 0) voltam inalteradas, como pedaço único.
+    """
+    tamanho = EXTRACAO_PALAVRAS_POR_PEDACO if tamanho is None else tamanho
+    sobreposicao = EXTRACAO_SOBREPOSICAO_PALAVRAS if sobreposicao is None else sobreposicao
+    palavras = padronizar_descricao(descricao).split()
+    if tamanho <= 0 or len(palavras) <= tamanho:
+        return [descricao]
+    passo = tamanho - min(max(sobreposicao, 0), tamanho - 1)
+    pedacos = []
+    for inicio in range(0, len(palavras), passo):
+        pedacos.append(" ".join(palavras[inicio:inicio + tamanho]))
+        if inicio + tamanho >= len(palavras):
+            break
+    return pedacos
+
+
+def _mesclar_habilidades(listas: list[list[dict]]) -> list[dict]:
+    """Junta as habilidades extraídas de cada pedaço pela chave de deduplicar, mantendo a primeira categoria sugerida válida"""
+    mescladas: dict[str, dict] = {}
+    for itens in listas:
+        for item in itens:
+            chave = deduplicar(item["nome"])
+            if chave not in mescladas:
+                mescladas[chave] = dict(item)
+            elif not mescladas[chave].get("categoria_sugerida"):
+                mescladas[chave]["categoria_sugerida"] = item.get("categoria_sugerida")
+    return list(mescladas.values())
+
+
+def _concluir_extracao(textos: list[str], categorias_lista: list[str], session: Session | None, chave: str | None) -> List[dict]:
+    """Interpreta as respostas do modelo (uma por pedaço), mescla as habilidades e, com chave, guarda o resultado no cache
+
+    Com mais de um pedaço, o cache recebe o JSON já mesclado, que é interpretado como uma resposta comum na leitura.
+    """
+    finais = _mesclar_habilidades([_interpretar_resposta(texto, categorias_lista, session) for texto in textos])
+    if finais and chave is not None:
+        if len(textos) == 1:
+            texto_cache = textos[0]
+        else:
+            texto_cache = json.dumps(
+                {"habilidades": [{"nome": item["nome"], "categoria": item["categoria_sugerida"]} for item in finais]}, ensure_ascii=False
+            )
+        gravar_cache_extracao(session, chave, texto_cache)
+    return finais
+
+
+def _separar_falhas(resultados: list) -> tuple[list[str], Exception | None]:
+    """Separa os textos obtidos por pedaço da primeira falha (resultados de gather com return_exceptions)"""
+    textos = [resultado for resultado in resultados if not isinstance(resultado, BaseException)]
+    falhas = [resultado for resultado in resultados if isinstance(resultado, BaseException)]
+    return textos, (falhas[0] if falhas else None)
+
+
+def _montar_prompt(descricao: str, categorias_lista: list[str], dica: str | None = None) -> str:
+    """Monta o prompt completo com as categorias permitidas, a dica do dicionário local (se houver) e o texto da vaga"""
     categorias_texto = "\n".join(f"- {nome}" for nome in categorias_lista) if categorias_lista else ""
-    prompt = f"{PROMPT_BASE}\n{categorias_texto}\n\nTexto da vaga:\n" + descricao # cria o prompt completo com categorias
-    try:
-        resposta = cliente.responses.create(
-            model="gpt-4.1",
-            input=prompt,
-            temperature=0.15,
-            max_output_tokens=1000
+    dica_texto = f"\n\n{dica}" if dica else ""
+    return f"{PROMPT_BASE}\n{categorias_texto}{dica_texto}\n\nTexto da vaga:\n" + descricao
+
+
+def _parametros_modelo(prompt: str) -> dict:
+    """Parâmetros da chamada ao modelo, compartilhados pelos caminhos síncrono e assíncrono"""
+    return {
+        "model": MODELO_EXTRACAO,
+        "input": prompt,
+        "temperature": 0.15,
+        "max_output_tokens": 1000,
+    }
+
+
+def _texto_resposta(resposta) -> str:
+    """Extrai o texto da resposta do modelo (output_text direto ou blocos de output)"""
+    if hasattr(resposta, "output_text") and resposta.output_text:
+        return resposta.output_text.strip() # resposta direta
+    blocos_puros = [] # lista para armazenar blocos de texto
+    blocos = getattr(resposta, "output", []) or [] # resposta em blocos
+    for bloco in blocos:
+        if getattr(bloco, "type", None) == "output_text": # verifica o tipo do bloco
+            blocos_puros.append(getattr(bloco, "text", "").strip()) # adiciona texto do bloco
+    return "\n".join(t for t in blocos_puros if t).strip() # junta blocos de texto
+
+
+def _validar_categoria_sugerida(cat: str | None, categorias_lista: list[str]) -> str | None:
+    """Valida se a categoria sugerida está na lista de categorias permitidas, retornando o nome correto ou None"""
+    if not cat:
+        return None
+    if not categorias_lista:
+        return None
+    # faz comparação case-insensitive e retorna o nome com a capitalização correta do banco
+    for c in categorias_lista:
+        if c.strip().lower() == str(cat).strip().lower():
+            return c
+    return None
+
+
+def _converter_item_habilidade(item, categorias_lista: list[str], session: Session | None, motor: MotorNormalizacao | None = None) -> dict | None:
+    """Converte um item do array "habilidades" (texto ou objeto) em {"nome", "categoria_sugerida"} normalizado"""
+    if isinstance(item, str):
+        return {"nome": normalizar_habilidade(item, session=session, motor=motor), "categoria_sugerida": None}
+    if isinstance(item, dict):
+        nome_bruto = item.get("nome") or item.get("habilidade") or item.get("skill")
+        cat_bruta = item.get("categoria") or item.get("categoria_sugerida")
+        if isinstance(nome_bruto, str) and nome_bruto.strip():
+            nome_norm = normalizar_habilidade(nome_bruto, session=session, motor=motor)
+            return {"nome": nome_norm, "categoria_sugerida": _validar_categoria_sugerida(cat_bruta, categorias_lista)}
+    return None
+
+
+def _interpretar_resposta(texto_completo: str, categorias_lista: list[str], session: Session | None, contabilizar: bool = True) -> List[dict]:
+    """Interpreta o JSON da resposta do modelo e retorna habilidades normalizadas, deduplicadas e com categoria validada
+
+    contabilizar registra nas métricas qual caminho de interpretação foi usado (desligado para respostas vindas do cache).
+    """
+    # Extrai habilidades do JSON na resposta
+    habilidades_extraidas: List[dict] = []  # cada item: {"nome": str, "categoria_sugerida": Optional[str]}
+
+    # Função auxiliar para tentar interpretar um segmento como JSON
+    def tentar_json(segmento: str):
+        """Tenta interpretar um segmento de texto como JSON e extrair habilidades"""
+        nonlocal habilidades_extraidas # permite modificar a variável externa
+        try:
+            data = json.loads(segmento) # tenta carregar o JSON
+            # Verifica se o JSON contém a chave "habilidades"
+            if isinstance(data, dict) and isinstance(data.get("habilidades"), list):
+                convertidas = (_converter_item_habilidade(item, categorias_lista, session) for item in data["habilidades"])
+                habilidades_extraidas = [item for item in convertidas if item is not None]
+                return True
+        except json.JSONDecodeError:
+            pass
+        return False
+
+    caminho = "sem_json"
+
+    # Tenta interpretar o texto completo como JSON
+    if texto_completo and tentar_json(texto_completo):
+        caminho = "json_direto"
+
+    # Se não conseguiu, tenta encontrar um trecho JSON no texto
+    if not habilidades_extraidas:
+        achado = re.search(r'\{.*"habilidades"\s*:\s*\[.*?\]\s*\}', texto_completo, re.DOTALL)
+        if achado and tentar_json(achado.group(0)):
+            caminho = "json_embutido"
+
+    if contabilizar:
+        _contadores_extracao.incrementar(f"interpretacao_{caminho}")
+
+    finais: List[dict] = [] # lista final deduplicada de objetos
+    vistos = set() # conjunto para rastrear habilidades já vistas
+
+    # Deduplica e filtra habilidades extraídas
+    for item in habilidades_extraidas:
+        nome = item.get("nome") if isinstance(item, dict) else str(item)
+        cat_sug = item.get("categoria_sugerida") if isinstance(item, dict) else None
+        chave = deduplicar(nome)
+        if chave not in vistos and nome:
+            vistos.add(chave)
+            finais.append({"nome": nome, "categoria_sugerida": _validar_categoria_sugerida(cat_sug, categorias_lista)})
+    return finais
+
+
+class LeitorHabilidadesIncremental:
+    """Lê a resposta do modelo em pedaços e devolve cada item do array "habilidades" assim que ele se fecha
+
+    Acompanha strings (com escapes) e a profundidade de objetos/arrays para saber quando um item terminou,
+    sem esperar o JSON completo.
+    """
+
+    _INICIO_ARRAY = re.compile(r'"habilidades"\s*:\s*\[')
+
+    def __init__(self):
+        self.texto = ""
+        self._posicao = 0
+        self._no_array = False
+        self._encerrado = False
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self._inicio_item: int | None = None
+
+    def alimentar(self, pedaco: str) -> list:
+        """Acrescenta um pedaço do texto e retorna os itens (já decodificados) completados por ele"""
+        self.texto += pedaco
+        if self._encerrado:
+            return []
+        if not self._no_array:
+            achado = self._INICIO_ARRAY.search(self.texto)
+            if not achado:
+                return []
+            self._no_array = True
+            self._posicao = achado.end()
+        itens = []
+        texto = self.texto
+        while self._posicao < len(texto):
+            c = texto[self._posicao]
+            fim_item = False
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._em_string = False
+                    fim_item = self._profundidade == 0
+            elif c == '"':
+                self._em_string = True
+                if self._profundidade == 0:
+                    self._inicio_item = self._posicao
+            elif c in "{[":
+                if self._profundidade == 0:
+                    self._inicio_item = self._posicao
+                self._profundidade += 1
+            elif c in "}]":
+                if self._profundidade == 0:  # "]" que fecha o array de habilidades
+                    self._encerrado = True
+                    break
+                self._profundidade -= 1
+                fim_item = self._profundidade == 0
+            if fim_item and self._inicio_item is not None:
+                try:
+                    itens.append(json.loads(texto[self._inicio_item:self._posicao + 1]))
+                except json.JSONDecodeError:
+                    pass
+                self._inicio_item = None
+            self._posicao += 1
+        return itens
+
+
+OPENAI_MAX_CONCORRENCIA = int(os.getenv("OPENAI_MAX_CONCORRENCIA", "4"))  # chamadas simultâneas ao modelo por processo
+OPENAI_MAX_CONEXOES = int(os.getenv("OPENAI_MAX_CONEXOES", "10"))  # tamanho do pool HTTP do cliente assíncrono
+_clientes_async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[AsyncOpenAI, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def obter_cliente_openai_async() -> tuple[AsyncOpenAI, asyncio.Semaphore]:
+    """Retorna o cliente assíncrono compartilhado (pool de conexões reaproveitado) e o semáforo que limita a concorrência
+
+    Cliente e semáforo ficam presos ao event loop em que foram criados, por isso são mantidos um por loop.
+    """
+    loop = asyncio.get_running_loop()
+    recursos = _clientes_async.get(loop)
+    if recursos is None:
+        cliente = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=OPENAI_TIMEOUT_SEGUNDOS,
+            max_retries=0,  # retentativas ficam a cargo de chamar_com_resiliencia_async
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=OPENAI_MAX_CONEXOES, max_keepalive_connections=OPENAI_MAX_CONEXOES),
+            ),
         )
-        texto_completo = ""
-        
-        # Extrai o texto da resposta
-        if hasattr(resposta, "output_text") and resposta.output_text:
-            texto_completo = resposta.output_text.strip() # resposta direta
+        recursos = (cliente, asyncio.Semaphore(OPENAI_MAX_CONCORRENCIA))
+        _clientes_async[loop] = recursos
+    return recursos
+
+
+async def fechar_cliente_openai_async() -> None:
+    """Fecha o cliente assíncrono do loop atual (chamado no encerramento da aplicação)"""
+    recursos = _clientes_async.pop(asyncio.get_running_loop(), None)
+    if recursos is not None:
+        await recursos[0].close()
+
+
+@cronometrar(_latencia_extracao)
+async def extrair_habilidades_descricao_async(
+    descricao: str,
+    session: Session | None = None,
+    *,
+    cliente=None,
+    propagar_erros: bool = False,
+    modo: str | None = None,
+) -> ResultadoExtracao:
+    """Extrai habilidades técnicas da descrição usando OpenAI GPT-4.1 sem bloquear o event loop e retorna lista com
+    nomes normalizados e categorias sugeridas
+
+    modo (padrão EXTRACAO_MODO): "llm" envia a descrição inteira à IA; "hibrido" reconhece antes as habilidades já
+    cadastradas e envia à IA só os trechos ainda pendentes, com as reconhecidas como dica (sem pendências, a IA não é
+    chamada); "local" usa somente o dicionário, sem chamar a IA.
+    Consultas ao banco e normalização rodam no threadpool; a chamada ao modelo usa o cliente compartilhado
+    (ou o cliente informado, com a mesma interface responses.create) e respeita o limite OPENAI_MAX_CONCORRENCIA,
+    ocupando uma vaga do semáforo só durante cada tentativa (não durante o backoff). Cada tentativa tem prazo de
+    OPENAI_TIMEOUT_SEGUNDOS; falhas transitórias são repetidas com backoff e, com o circuito aberto, o modelo nem é chamado.
+    Os pedaços de textos longos (dividir_descricao) são consultados ao mesmo tempo, então a espera acompanha o pedaço
+    mais lento e não o tamanho da descrição; se parte deles falhar, o resultado traz as habilidades dos demais.
+    Se o modelo falhar, o resultado vem com falha preenchida; com propagar_erros=True, a falha é repassada.
+    """
+    categorias_lista, locais, texto_ia, dica, chave, texto_cacheado = await run_in_threadpool(
+        _contexto_extracao, descricao, session, modo or EXTRACAO_MODO
+    )
+    if texto_ia is None:
+        return ResultadoExtracao(locais)
+    if texto_cacheado is not None:
+        return ResultadoExtracao(_combinar_habilidades(locais, await run_in_threadpool(_interpretar_resposta, texto_cacheado, categorias_lista, session, False)))
+    try:
+        cliente_compartilhado, semaforo = obter_cliente_openai_async()
+        cliente = cliente or cliente_compartilhado
+
+        async def _consultar(texto: str) -> str:
+            async def _tentativa():
+                async with semaforo:
+                    inicio, resposta = time.perf_counter(), None
+                    try:
+                        resposta = await cliente.responses.create(**_parametros_modelo(_montar_prompt(texto, categorias_lista, dica)))
+                        return resposta
+                    finally:
+                        _registrar_chamada_modelo(time.perf_counter() - inicio, resposta)
+            resposta = await chamar_com_resiliencia_async(
+                _tentativa, disjuntor_openai, politica_openai, _falha_transitoria, _contar_retentativa, prazo=OPENAI_TIMEOUT_SEGUNDOS
+            )
+            return _texto_resposta(resposta)
+
+        pedacos = dividir_descricao(texto_ia)
+        if len(pedacos) == 1:
+            textos, falha = [await _consultar(texto_ia)], None
         else:
-            blocos_puros = [] # lista para armazenar blocos de texto
-            blocos = getattr(resposta, "output", []) or [] # resposta em blocos
-            for bloco in blocos:
-                if getattr(bloco, "type", None) == "output_text": # verifica o tipo do bloco
-                    blocos_puros.append(getattr(bloco, "text", "").strip()) # adiciona texto do bloco
-            texto_completo = "\n".join(t for t in blocos_puros if t).strip() # junta blocos de texto
-
-        # Extrai habilidades do JSON na resposta
-        habilidades_extraidas: List[dict] = []  # cada item: {"nome": str, "categoria_sugerida": Optional[str]}
-
-        # Função auxiliar para tentar interpretar um segmento como JSON
-        def _validar_categoria_sugerida(cat: str | None) -> str | None:
-            """Valida se a categoria sugerida está na lista de categorias permitidas, retornando o nome correto ou None"""
-            if not cat:
-                return None
-            if not categorias_lista:
-                return None
-            # faz comparação case-insensitive e retorna o nome com a capitalização correta do banco
-            for c in categorias_lista:
-                if c.strip().lower() == str(cat).strip().lower():
-                    return c
-            return None
+            textos, falha = _separar_falhas(await asyncio.gather(*(_consultar(pedaco) for pedaco in pedacos), return_exceptions=True))
+            if falha is not None and propagar_erros:
+                raise falha
+        finais = await run_in_threadpool(_concluir_extracao, textos, categorias_lista, session, None if falha else chave)
+        if falha is not None:
+            return ResultadoExtracao(_combinar_habilidades(locais, finais), falha=_registrar_falha_extracao(falha))
+        return ResultadoExtracao(_combinar_habilidades(locais, finais))
 
-        def tentar_json(segmento: str):
-            """Tenta interpretar um segmento de texto como JSON e extrair habilidades"""
-            nonlocal habilidades_extraidas # permite modificar a variável externa
-            try:
-                data = json.loads(segmento) # tenta carregar o JSON
-                # Verifica se o JSON contém a chave "habilidades"
-                if isinstance(data, dict) and isinstance(data.get("habilidades"), list):
-                    coletadas: list[dict] = []
-                    for item in data["habilidades"]:
-                        if isinstance(item, str):
-                            nome_norm = normalizar_habilidade(item, session=session)
-                            coletadas.append({"nome": nome_norm, "categoria_sugerida": None})
-                        elif isinstance(item, dict):
-                            nome_bruto = item.get("nome") or item.get("habilidade") or item.get("skill")
-                            cat_bruta = item.get("categoria") or item.get("categoria_sugerida")
-                            if isinstance(nome_bruto, str) and nome_bruto.strip():
-                                nome_norm = normalizar_habilidade(nome_bruto, session=session)
-                                cat_ok = _validar_categoria_sugerida(cat_bruta)
-                                coletadas.append({"nome": nome_norm, "categoria_sugerida": cat_ok})
-                    habilidades_extraidas = coletadas
-            except json.JSONDecodeError:
-                pass
-
-        # Tenta interpretar o texto completo como JSON
-        if texto_completo:
-            tentar_json(texto_completo)
-
-        # Se não conseguiu, tenta encontrar um trecho JSON no texto
-        if not habilidades_extraidas:
-            achado = re.search(r'\{.*"habilidades"\s*:\s*\[.*?\]\s*\}', texto_completo, re.DOTALL)
-            if achado:
-                tentar_json(achado.group(0))
-
-        finais: List[dict] = [] # lista final deduplicada de objetos
-        vistos = set() # conjunto para rastrear habilidades já vistas
-
-        # Deduplica e filtra habilidades extraídas
-        for item in habilidades_extraidas:
-            nome = item.get("nome") if isinstance(item, dict) else str(item)
-            cat_sug = item.get("categoria_sugerida") if isinstance(item, dict) else None
-            chave = deduplicar(nome)
-            if chave not in vistos and nome:
-                vistos.add(chave)
-                finais.append({"nome": nome, "categoria_sugerida": _validar_categoria_sugerida(cat_sug)})
-        return finais
-
-    # Em caso de erro, retorna lista vazia
+    # Em caso de erro, retorna apenas o que foi reconhecido localmente (lista vazia no modo "llm"), marcado como falha
     except Exception as exc:
-        return []
+        falha = _registrar_falha_extracao(exc)
+        if propagar_erros:
+            raise
+        return ResultadoExtracao(locais, falha=falha)
+
+
+async def transmitir_habilidades_descricao(
+    descricao: str,
+    session: Session | None = None,
+    *,
+    cliente=None,
+    modo: str | None = None,
+) -> AsyncIterator[dict]:
+    """Versão em fluxo da extração: produz cada habilidade ({"nome", "categoria_sugerida"}) assim que fica disponível
+
+    Primeiro as reconhecidas pelo dicionário local, depois as do cache ou as da resposta do modelo, interpretada
+    incrementalmente enquanto chega. Falhas na chamada ao modelo (inclusive circuito aberto) são propagadas ao
+    consumidor; só a abertura do fluxo é repetida, pois itens já entregues não podem ser desfeitos. A leitura do fluxo
+    roda numa tarefa própria com prazo total de OPENAI_TIMEOUT_SEGUNDOS e libera o slot do semáforo ao terminar,
+    independentemente do ritmo do consumidor.
+    """
+    categorias_lista, locais, texto_ia, dica, chave, texto_cacheado = await run_in_threadpool(
+        _contexto_extracao, descricao, session, modo or EXTRACAO_MODO
+    )
+    vistos = set()
+
+    def _inedito(item: dict | None) -> bool:
+        if not item or not item.get("nome") or deduplicar(item["nome"]) in vistos:
+            return False
+        vistos.add(deduplicar(item["nome"]))
+        return True
+
+    for item in locais:
+        if _inedito(item):
+            yield item
+    if texto_ia is None:
+        return
+    if texto_cacheado is not None:
+        for item in await run_in_threadpool(_interpretar_resposta, texto_cacheado, categorias_lista, session, False):
+            if _inedito(item):
+                yield item
+        return
+
+    cliente_compartilhado, semaforo = obter_cliente_openai_async()
+    cliente = cliente or cliente_compartilhado
+    leitor = LeitorHabilidadesIncremental()
+    parametros = _parametros_modelo(_montar_prompt(texto_ia, categorias_lista, dica))
+    # A leitura roda em paralelo com o consumidor, que também usa a sessão: ela converte com o motor já carregado
+    motor = await run_in_threadpool(obter_motor_normalizacao, session)
+    convertidos: asyncio.Queue = asyncio.Queue()  # itens já convertidos; fim marca o término da leitura
+    fim = None
+
+    async def _ler_eventos(fluxo) -> object | None:
+        resposta = None
+        async for evento in fluxo:
+            tipo = getattr(evento, "type", None)
+            if tipo == "response.output_text.delta":
+                for bruto in leitor.alimentar(evento.delta):
+                    convertidos.put_nowait(await run_in_threadpool(_converter_item_habilidade, bruto, categorias_lista, None, motor))
+            elif tipo == "response.completed":
+                resposta = evento.response
+        return resposta
+
+    async def _ler_fluxo() -> None:
+        # O slot do semáforo cobre só a conversa com o modelo, não o ritmo de quem consome o gerador
+        try:
+            async with semaforo:
+                inicio, resposta, aberto = time.perf_counter(), None, False
+                try:
+                    fluxo = await chamar_com_resiliencia_async(
+                        lambda: cliente.responses.create(**parametros, stream=True),
+                        disjuntor_openai, politica_openai, _falha_transitoria, _contar_retentativa, prazo=OPENAI_TIMEOUT_SEGUNDOS,
+                    )
+                    aberto = True
+                    # Prazo total da leitura: um fluxo que goteja sem parar não prende o slot indefinidamente
+                    resposta = await asyncio.wait_for(_ler_eventos(fluxo), OPENAI_TIMEOUT_SEGUNDOS)
+                    resposta = resposta or object()  # fluxo terminou sem o evento final: sem dados de uso
+                except Exception as exc:
+                    if aberto and _falha_transitoria(exc):  # queda ou prazo esgotado no meio do fluxo indicam dependência degradada
+                        disjuntor_openai.registrar_falha()
+                    raise
+                finally:
+                    _registrar_chamada_modelo(time.perf_counter() - inicio, resposta)
+        finally:
+            convertidos.put_nowait(fim)
+
+    leitura = asyncio.create_task(_ler_fluxo())
+    try:
+        while (item := await convertidos.get()) is not fim:
+            if _inedito(item):
+                yield item
+        await leitura  # propaga a falha da leitura ao consumidor
+    finally:
+        if not leitura.done():  # consumidor desistiu antes do fim: encerra a leitura e libera o slot
+            leitura.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await leitura
+
+    # Interpretação completa ao final: cobre formatos que o leitor incremental não reconhece e alimenta cache e métricas
+    finais = await run_in_threadpool(_interpretar_resposta, leitor.texto.strip(), categorias_lista, session)
+    for item in finais:
+        if _inedito(item):
+            yield item
+    if finais:
+        await run_in_threadpool(gravar_cache_extracao, session, chave, leitor.texto.strip())
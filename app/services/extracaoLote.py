@@ -0,0 +1,191 @@
+import asyncio, json, time
+from collections import deque
+from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, func
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.extracaoLoteModels import ExtracaoLote
+from app.models.extracaoRascunhoModels import ExtracaoRascunho
+from app.models.vagaModels import Vaga
+from app.models.vagaHabilidadeModels import VagaHabilidade
+from app.schemas.extracaoLoteSchemas import ExtracaoLoteOut, ExtracaoRascunhoOut
+from app.services.vaga import extrair_habilidades_vaga_async
+
+
+_lotes_em_execucao: set[int] = set()  # lotes sendo processados neste processo (evita execuções simultâneas do mesmo lote)
+
+
+class LimitadorPorMinuto:
+    """Limita quantas extrações podem começar dentro de uma janela deslizante (por padrão, 60 segundos)"""
+
+    def __init__(self, limite: int, janela: float = 60.0):
+        self.limite = limite
+        self.janela = janela
+        self._inicios: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self) -> None:
+        """Aguarda até que uma nova extração possa começar sem ultrapassar o limite da janela"""
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                while self._inicios and agora - self._inicios[0] >= self.janela:
+                    self._inicios.popleft()
+                if len(self._inicios) < self.limite:
+                    self._inicios.append(agora)
+                    return
+                await asyncio.sleep(self.janela - (agora - self._inicios[0]))
+
+
+# POST - Cria o lote e um rascunho pendente para cada vaga
+def criar_lote(session: Session, vaga_ids: list[int] | None = None, concorrencia: int = 4, por_minuto: int = 30) -> ExtracaoLote:
+    """Cria um lote de extração para as vagas informadas (ou todas as vagas ainda sem habilidades associadas)"""
+    consulta = session.query(Vaga.id)
+    if vaga_ids is None:
+        consulta = consulta.filter(~exists().where(VagaHabilidade.vaga_id == Vaga.id))
+    else:
+        consulta = consulta.filter(Vaga.id.in_(set(vaga_ids))) # ids inexistentes são ignorados
+    ids = [vaga_id for (vaga_id,) in consulta.order_by(Vaga.id.asc()).all()]
+    lote = ExtracaoLote(
+        status="pendente" if ids else "concluido",
+        concorrencia=concorrencia,
+        por_minuto=por_minuto,
+        finalizado_em=None if ids else datetime.utcnow(),
+    )
+    session.add(lote)
+    session.flush()
+    session.add_all([ExtracaoRascunho(lote_id=lote.id, vaga_id=vaga_id, status="pendente") for vaga_id in ids])
+    session.commit()
+    session.refresh(lote)
+    return lote
+
+
+# GET - Situação do lote com contagens por status e rascunhos
+def obter_lote(session: Session, lote_id: int, incluir_rascunhos: bool = True) -> ExtracaoLoteOut | None:
+    """Retorna a situação do lote (contagens agregadas dos rascunhos) e, opcionalmente, os rascunhos gerados"""
+    lote = session.query(ExtracaoLote).filter(ExtracaoLote.id == lote_id).first()
+    if not lote:
+        return None
+    contagem = dict(
+        session.query(ExtracaoRascunho.status, func.count(ExtracaoRascunho.id))
+        .filter(ExtracaoRascunho.lote_id == lote_id)
+        .group_by(ExtracaoRascunho.status)
+        .all()
+    )
+    rascunhos = []
+    if incluir_rascunhos:
+        registros = session.query(ExtracaoRascunho).filter(ExtracaoRascunho.lote_id == lote_id).order_by(ExtracaoRascunho.vaga_id.asc()).all()
+        rascunhos = [
+            ExtracaoRascunhoOut(
+                vaga_id=r.vaga_id,
+                status=r.status,
+                habilidades=json.loads(r.habilidades) if r.habilidades else [],
+                erro=r.erro,
+            )
+            for r in registros
+        ]
+    return ExtracaoLoteOut(
+        id=lote.id,
+        status=lote.status,
+        total=sum(contagem.values()),
+        pendentes=contagem.get("pendente", 0),
+        concluidas=contagem.get("concluido", 0),
+        falhas=contagem.get("erro", 0),
+        criado_em=lote.criado_em,
+        finalizado_em=lote.finalizado_em,
+        rascunhos=rascunhos,
+    )
+
+
+def _iniciar_lote(fabrica: sessionmaker, lote_id: int) -> tuple[int, int, list[int]] | None:
+    """Marca o lote como em processamento e retorna (concorrência, limite por minuto, vagas pendentes)"""
+    with fabrica() as session:
+        lote = session.query(ExtracaoLote).filter(ExtracaoLote.id == lote_id).first()
+        if not lote:
+            return None
+        lote.status = "processando"
+        session.commit()
+        pendentes = session.query(ExtracaoRascunho.vaga_id).filter(
+            ExtracaoRascunho.lote_id == lote_id,
+            ExtracaoRascunho.status == "pendente",
+        ).order_by(ExtracaoRascunho.vaga_id.asc()).all()
+        return lote.concorrencia, lote.por_minuto, [vaga_id for (vaga_id,) in pendentes]
+
+
+def _gravar_rascunho(session: Session, lote_id: int, vaga_id: int, status: str, habilidades: str | None, erro: str | None) -> None:
+    """Grava o resultado da extração de uma vaga no rascunho do lote"""
+    session.query(ExtracaoRascunho).filter(
+        ExtracaoRascunho.lote_id == lote_id,
+        ExtracaoRascunho.vaga_id == vaga_id,
+    ).update({"status": status, "habilidades": habilidades, "erro": erro, "atualizado_em": datetime.utcnow()}, synchronize_session=False)
+    session.commit()
+
+
+def _finalizar_lote(fabrica: sessionmaker, lote_id: int) -> None:
+    """Marca o lote como concluído ou, se restaram rascunhos pendentes (execução interrompida), como "erro" para ser retomado"""
+    with fabrica() as session:
+        restantes = session.query(func.count(ExtracaoRascunho.id)).filter(
+            ExtracaoRascunho.lote_id == lote_id,
+            ExtracaoRascunho.status == "pendente",
+        ).scalar()
+        session.query(ExtracaoLote).filter(ExtracaoLote.id == lote_id).update(
+            {"status": "erro" if restantes else "concluido", "finalizado_em": datetime.utcnow()}, synchronize_session=False
+        )
+        session.commit()
+
+
+def lote_em_execucao(lote_id: int) -> bool:
+    """Indica se o lote está sendo processado por este processo"""
+    return lote_id in _lotes_em_execucao
+
+
+async def _processar_vaga(fabrica: sessionmaker, lote_id: int, vaga_id: int, cliente) -> None:
+    """Extrai as habilidades de uma vaga em sessão própria e grava o resultado (ou o erro) como rascunho"""
+    session = fabrica()
+    try:
+        try:
+            itens = await extrair_habilidades_vaga_async(session, vaga_id, cliente=cliente, propagar_erros=True)
+            status, habilidades, erro = "concluido", json.dumps(itens, ensure_ascii=False), None
+        except Exception as exc:
+            await run_in_threadpool(session.rollback)
+            status, habilidades, erro = "erro", None, str(exc)[:500] or exc.__class__.__name__
+        try:
+            await run_in_threadpool(_gravar_rascunho, session, lote_id, vaga_id, status, habilidades, erro)
+        except Exception:
+            # falha do banco ao gravar: o rascunho continua pendente e a vaga é refeita quando o lote for retomado
+            await run_in_threadpool(session.rollback)
+    finally:
+        session.close()
+
+
+async def executar_lote(lote_id: int, bind, *, cliente=None) -> None:
+    """Processa os rascunhos pendentes do lote com um pool limitado de trabalhadores e limite de extrações por minuto
+
+    bind é a engine do banco (cada trabalhador abre a própria sessão); cliente substitui o cliente OpenAI
+    compartilhado por outro com a mesma interface responses.create (ex.: servidor local em testes).
+    Processa apenas os rascunhos ainda pendentes, então também serve para retomar um lote interrompido; o lote é
+    sempre finalizado, mesmo se a execução falhar, e não roda duas vezes ao mesmo tempo no mesmo processo.
+    """
+    if lote_id in _lotes_em_execucao:
+        return
+    _lotes_em_execucao.add(lote_id)
+    fabrica = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+    try:
+        dados = await run_in_threadpool(_iniciar_lote, fabrica, lote_id)
+        if dados is None:
+            return
+        concorrencia, por_minuto, vaga_ids = dados
+        limitador = LimitadorPorMinuto(por_minuto)
+        pendentes = iter(vaga_ids) # compartilhado pelos trabalhadores: cada vaga é consumida por apenas um
+
+        async def trabalhador() -> None:
+            for vaga_id in pendentes:
+                await limitador.aguardar()
+                await _processar_vaga(fabrica, lote_id, vaga_id, cliente)
+
+        try:
+            await asyncio.gather(*(trabalhador() for _ in range(min(concorrencia, len(vaga_ids)))))
+        finally:
+            await run_in_threadpool(_finalizar_lote, fabrica, lote_id)
+    finally:
+        _lotes_em_execucao.discard(lote_id)
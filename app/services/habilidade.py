@@ -1,7 +1,12 @@
 from app.models.habilidadeModels import Habilidade 
 from app.models.categoriaModels import Categoria
+from app.models.carreiraHabilidadeModels import CarreiraHabilidade
 from app.schemas.habilidadeSchemas import HabilidadeOut, HabilidadeAtualizar
+from app.services.compatibilidade import invalidar_matriz_carreiras, recalcular_scores_carreiras
+from app.services.mapeamento import invalidar_mapa
+from app.services.extracao import invalidar_dicionario_habilidades
 from sqlalchemy.orm import joinedload
+from typing import Iterator
 
 
 def listar_habilidades(session) -> list[HabilidadeOut]:
@@ -10,6 +15,13 @@ def listar_habilidades(session) -> list[HabilidadeOut]:
     return [HabilidadeOut.model_validate(habilidade) for habilidade in habilidades]
 
 
+def iterar_habilidades(session, tamanho_lote: int = 500) -> Iterator[HabilidadeOut]:
+    """Percorre as habilidades em lotes (cursor no servidor) convertendo cada uma para HabilidadeOut sob demanda"""
+    consulta = session.query(Habilidade).options(joinedload(Habilidade.categoria_rel)).yield_per(tamanho_lote)
+    for habilidade in consulta:
+        yield HabilidadeOut.model_validate(habilidade)
+
+
 def buscar_habilidade_por_id(session, id: int) -> HabilidadeOut | None:
     """Busca uma habilidade específica pelo ID no banco de dados e retorna como HabilidadeOut ou None se não encontrada"""
     habilidade = session.query(Habilidade).filter(Habilidade.id == id).first()
@@ -31,6 +43,8 @@ def atualizar_habilidade(session, id: int, habilidade_data: HabilidadeAtualizar)
                 return None
             habilidade.categoria_id = categoria.id
         session.commit()
+        invalidar_mapa(session)  # a categoria da habilidade define a demanda das carreiras
+        invalidar_dicionario_habilidades(session)
         session.refresh(habilidade)
         return HabilidadeOut.model_validate(habilidade)
     return None
@@ -46,7 +60,12 @@ def deletar_habilidade(session, id: int) -> HabilidadeOut | None:
     )
     if habilidade:
         dto = HabilidadeOut.model_validate(habilidade)
+        carreira_ids = [c for (c,) in session.query(CarreiraHabilidade.carreira_id).filter(CarreiraHabilidade.habilidade_id == id).all()]
         session.delete(habilidade)
+        recalcular_scores_carreiras(session, carreira_ids)
         session.commit()
+        invalidar_matriz_carreiras(session)  # remove relações carreira-habilidade em cascata
+        invalidar_mapa(session)
+        invalidar_dicionario_habilidades(session)
         return dto
     return None
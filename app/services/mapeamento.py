@@ -1,12 +1,17 @@
-from typing import Dict, List, Tuple
+import hashlib
+import heapq
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Float, cast, func, select
 from app.models.cursoModels import Curso
 from app.models.carreiraModels import Carreira
 from app.models.habilidadeModels import Habilidade
 from app.models.cursoConhecimentoModels import CursoConhecimento
 from app.models.conhecimentoCategoriaModels import ConhecimentoCategoria
 from app.models.carreiraHabilidadeModels import  CarreiraHabilidade 
+from app.schemas.mapeamentoSchemas import MapaOut
+from app.utils.cache import CachePorBanco
 
 
 def carregar_listas_base(session: Session) -> Tuple[List[dict], List[dict]]:
@@ -26,9 +31,9 @@ def carregar_listas_base(session: Session) -> Tuple[List[dict], List[dict]]:
     return cursos, carreiras
 
 
-def agregar_oferta_por_curso(session: Session) -> Dict[int, Dict[int, float]]:
-    """Agrega oferta por curso somando pesos dos conhecimentos por categoria usando JOIN entre CursoConhecimento e ConhecimentoCategoria"""
-    rows = (
+def agregar_oferta_por_curso(session: Session, curso_ids: Iterable[int] | None = None) -> Dict[int, Dict[int, float]]:
+    """Agrega oferta por curso somando pesos dos conhecimentos por categoria usando JOIN entre CursoConhecimento e ConhecimentoCategoria (opcionalmente apenas dos cursos informados)"""
+    query = (
         session.query(
             CursoConhecimento.curso_id.label("curso_id"),
             ConhecimentoCategoria.categoria_id.label("categoria_id"),
@@ -39,17 +44,19 @@ def agregar_oferta_por_curso(session: Session) -> Dict[int, Dict[int, float]]:
             ConhecimentoCategoria.conhecimento_id == CursoConhecimento.conhecimento_id,
         )
         .group_by(CursoConhecimento.curso_id, ConhecimentoCategoria.categoria_id)
-        .all()
     )
+    if curso_ids is not None:
+        query = query.filter(CursoConhecimento.curso_id.in_(list(curso_ids)))
+    rows = query.all()
     oferta: Dict[int, Dict[int, float]] = {}
     for r in rows:
         oferta.setdefault(r.curso_id, {})[r.categoria_id] = float(r.peso_sum)
     return oferta
 
 
-def agregar_demanda_por_carreira(session: Session) -> Dict[int, Dict[int, float]]:
-    """Agrega demanda por carreira somando frequências das habilidades por categoria usando JOIN entre CarreiraHabilidade e Habilidade"""
-    rows = (
+def agregar_demanda_por_carreira(session: Session, carreira_ids: Iterable[int] | None = None) -> Dict[int, Dict[int, float]]:
+    """Agrega demanda por carreira somando frequências das habilidades por categoria usando JOIN entre CarreiraHabilidade e Habilidade (opcionalmente apenas das carreiras informadas)"""
+    query = (
         session.query(
             CarreiraHabilidade.carreira_id.label("carreira_id"),
             Habilidade.categoria_id.label("categoria_id"),
@@ -57,8 +64,10 @@ def agregar_demanda_por_carreira(session: Session) -> Dict[int, Dict[int, float]
         )
         .join(Habilidade, Habilidade.id == CarreiraHabilidade.habilidade_id)
         .group_by(CarreiraHabilidade.carreira_id, Habilidade.categoria_id)
-        .all()
     )
+    if carreira_ids is not None:
+        query = query.filter(CarreiraHabilidade.carreira_id.in_(list(carreira_ids)))
+    rows = query.all()
     demanda: Dict[int, Dict[int, float]] = {}
     for r in rows:
         if r.categoria_id is None:
@@ -87,39 +96,187 @@ def calcular_score(
     return numer / denom
 
 
-def montar_mapa(session: Session) -> dict:
-    """Monta o mapa completo curso×carreira calculando scores de compatibilidade e organizando em estruturas bidirecionais ordenadas"""
-    cursos, carreiras = carregar_listas_base(session)
-    oferta_por_curso = agregar_oferta_por_curso(session)
-    demanda_por_carreira = agregar_demanda_por_carreira(session)
-
-    cursoToCarreiras: Dict[int, list] = {}
-    for curso in cursos:
-        relacoes: list = []
-        for carreira in carreiras:
-            score = calcular_score(oferta_por_curso, demanda_por_carreira, curso["id"], carreira["id"])
-            if score > 0:
-                relacoes.append({
-                    "id": carreira["id"],
-                    "nome": carreira["nome"],
-                    "score": round(float(score), 6),
-                })
-        relacoes.sort(key=lambda x: x["score"], reverse=True)
-        cursoToCarreiras[curso["id"]] = relacoes
-
-    carreiraToCursos: Dict[int, list] = {}
-    for carreira in carreiras:
-        relacoes: list = []
-        for curso in cursos:
-            score = calcular_score(oferta_por_curso, demanda_por_carreira, curso["id"], carreira["id"])
-            if score > 0:
-                relacoes.append({
-                    "id": curso["id"],
-                    "nome": curso["nome"],
-                    "score": round(float(score), 6),
-                })
-        relacoes.sort(key=lambda x: x["score"], reverse=True)
-        carreiraToCursos[carreira["id"]] = relacoes
+def calcular_matriz_scores(
+    oferta_por_curso: Dict[int, Dict[int, float]],
+    demanda_por_carreira: Dict[int, Dict[int, float]],
+) -> Dict[int, Dict[int, float]]:
+    """Calcula de uma vez a matriz esparsa curso×carreira de scores (mesmo valor de calcular_score para cada par)
+
+    Produto esparso oferta × demanda pelas categorias: um índice invertido categoria -> [(carreira, demanda)]
+    faz com que cada curso visite apenas as carreiras que compartilham alguma categoria com ele. Pares sem
+    categoria em comum (score 0) não aparecem no resultado. Retorna {curso_id: {carreira_id: score}}.
+    """
+    denominadores: Dict[int, float] = {}
+    indice_demanda: Dict[int, List[Tuple[int, float]]] = {}
+    for carreira_id, demanda in demanda_por_carreira.items():
+        denominadores[carreira_id] = sum(demanda.values())
+        for categoria_id, demanda_valor in demanda.items():
+            indice_demanda.setdefault(categoria_id, []).append((carreira_id, demanda_valor))
+
+    matriz: Dict[int, Dict[int, float]] = {}
+    for curso_id, oferta in oferta_por_curso.items():
+        numeradores: Dict[int, float] = {}
+        for categoria_id, oferta_valor in oferta.items():
+            for carreira_id, demanda_valor in indice_demanda.get(categoria_id, ()):
+                numeradores[carreira_id] = numeradores.get(carreira_id, 0.0) + oferta_valor * demanda_valor
+        matriz[curso_id] = {
+            carreira_id: (numer / denominadores[carreira_id] if denominadores[carreira_id] > 0 else 0.0)
+            for carreira_id, numer in numeradores.items()
+        }
+    return matriz
+
+
+def _ordenar_relacoes(
+    relacoes: Iterable[Tuple[int, float]],
+    itens: Dict[int, Tuple[int, str]],
+    limite: int | None = None,
+) -> list:
+    """Monta a lista de relações com score > 0 ordenada por score decrescente e, no empate, pela ordem alfabética
+
+    itens mapeia id -> (posição na lista alfabética, nome). Com limite, seleciona apenas o top-K via heap.
+    """
+    selecionadas = [(item_id, score) for item_id, score in relacoes if score > 0 and item_id in itens]
+    chave = lambda t: (-t[1], itens[t[0]][0])
+    if limite is None:
+        selecionadas.sort(key=chave)
+    else:
+        selecionadas = heapq.nsmallest(max(0, int(limite)), selecionadas, key=chave)
+    return [
+        {"id": item_id, "nome": itens[item_id][1], "score": round(float(score), 6)}
+        for item_id, score in selecionadas
+    ]
+
+
+class IndiceMapa:
+    """Estado do mapa: vetores por categoria da oferta dos cursos e da demanda das carreiras, índices invertidos por
+    categoria e a matriz esparsa de scores curso×carreira
+
+    Permite calcular as relações de um único curso ou carreira visitando apenas as categorias dele e, em cada
+    uma, os itens do outro lado que a possuem, e atualizar a matriz por deltas: a oferta de um curso recalcula
+    apenas sua linha e a demanda de uma carreira apenas sua coluna. Os scores são os de calcular_score.
+    """
+
+    __slots__ = (
+        "cursos", "carreiras", "posicao_cursos", "posicao_carreiras", "oferta_por_curso", "demanda_por_carreira",
+        "denominadores", "indice_oferta", "indice_demanda", "scores", "_lock",
+    )
+
+    def __init__(
+        self,
+        cursos: List[dict],
+        carreiras: List[dict],
+        oferta_por_curso: Dict[int, Dict[int, float]],
+        demanda_por_carreira: Dict[int, Dict[int, float]],
+    ):
+        self._lock = threading.RLock()
+        self.cursos = cursos
+        self.carreiras = carreiras
+        self.posicao_cursos: Dict[int, Tuple[int, str]] = {c["id"]: (i, c["nome"]) for i, c in enumerate(cursos)}
+        self.posicao_carreiras: Dict[int, Tuple[int, str]] = {c["id"]: (i, c["nome"]) for i, c in enumerate(carreiras)}
+        self.oferta_por_curso: Dict[int, Dict[int, float]] = {}
+        self.demanda_por_carreira: Dict[int, Dict[int, float]] = {}
+        self.denominadores: Dict[int, float] = {}
+        self.indice_oferta: Dict[int, Dict[int, float]] = {}  # categoria -> {curso_id: oferta}
+        self.indice_demanda: Dict[int, Dict[int, float]] = {}  # categoria -> {carreira_id: demanda}
+        for curso_id, oferta in oferta_por_curso.items():
+            self._indexar_oferta(curso_id, oferta)
+        for carreira_id, demanda in demanda_por_carreira.items():
+            self._indexar_demanda(carreira_id, demanda)
+        self.scores: Dict[int, Dict[int, float]] = calcular_matriz_scores(oferta_por_curso, demanda_por_carreira)
+
+    def _indexar_oferta(self, curso_id: int, oferta: Dict[int, float]) -> None:
+        """Substitui o vetor de oferta do curso e suas entradas no índice por categoria"""
+        for categoria_id in self.oferta_por_curso.pop(curso_id, {}):
+            self.indice_oferta[categoria_id].pop(curso_id, None)
+        if oferta:
+            self.oferta_por_curso[curso_id] = oferta
+            for categoria_id, oferta_valor in oferta.items():
+                self.indice_oferta.setdefault(categoria_id, {})[curso_id] = oferta_valor
+
+    def _indexar_demanda(self, carreira_id: int, demanda: Dict[int, float]) -> None:
+        """Substitui o vetor de demanda da carreira, seu denominador e suas entradas no índice por categoria"""
+        for categoria_id in self.demanda_por_carreira.pop(carreira_id, {}):
+            self.indice_demanda[categoria_id].pop(carreira_id, None)
+        self.denominadores.pop(carreira_id, None)
+        if demanda:
+            self.demanda_por_carreira[carreira_id] = demanda
+            self.denominadores[carreira_id] = sum(demanda.values())
+            for categoria_id, demanda_valor in demanda.items():
+                self.indice_demanda.setdefault(categoria_id, {})[carreira_id] = demanda_valor
+
+    def _score(self, carreira_id: int, numer: float) -> float:
+        """Divide o numerador acumulado pela demanda total da carreira (0 quando não há demanda)"""
+        denom = self.denominadores.get(carreira_id, 0.0)
+        return numer / denom if denom > 0 else 0.0
+
+    def _linha(self, curso_id: int) -> Dict[int, float]:
+        """Calcula os scores do curso com cada carreira que compartilha alguma categoria com ele"""
+        numeradores: Dict[int, float] = {}
+        for categoria_id, oferta_valor in self.oferta_por_curso.get(curso_id, {}).items():
+            for carreira_id, demanda_valor in self.indice_demanda.get(categoria_id, {}).items():
+                numeradores[carreira_id] = numeradores.get(carreira_id, 0.0) + oferta_valor * demanda_valor
+        return {carreira_id: self._score(carreira_id, numer) for carreira_id, numer in numeradores.items()}
+
+    def _coluna(self, carreira_id: int) -> Dict[int, float]:
+        """Calcula os scores da carreira com cada curso que compartilha alguma categoria com ela"""
+        numeradores: Dict[int, float] = {}
+        for categoria_id, demanda_valor in self.demanda_por_carreira.get(carreira_id, {}).items():
+            for curso_id, oferta_valor in self.indice_oferta.get(categoria_id, {}).items():
+                numeradores[curso_id] = numeradores.get(curso_id, 0.0) + oferta_valor * demanda_valor
+        return {curso_id: self._score(carreira_id, numer) for curso_id, numer in numeradores.items()}
+
+    def definir_oferta(self, curso_id: int, oferta: Dict[int, float]) -> None:
+        """Atualiza o vetor de oferta de um curso e recalcula apenas a linha dele na matriz"""
+        with self._lock:
+            self._indexar_oferta(curso_id, oferta)
+            self.scores[curso_id] = self._linha(curso_id)
+
+    def definir_demanda(self, carreira_id: int, demanda: Dict[int, float]) -> None:
+        """Atualiza o vetor de demanda de uma carreira e recalcula apenas a coluna dela na matriz"""
+        with self._lock:
+            for curso_id in self._coluna(carreira_id): # remove a coluna antiga
+                self.scores.get(curso_id, {}).pop(carreira_id, None)
+            self._indexar_demanda(carreira_id, demanda)
+            for curso_id, score in self._coluna(carreira_id).items():
+                self.scores.setdefault(curso_id, {})[carreira_id] = score
+
+    def carreiras_do_curso(self, curso_id: int, limite: int | None = None) -> list | None:
+        """Retorna as carreiras relacionadas ao curso ordenadas por score (None se o curso não existir)"""
+        with self._lock:
+            if curso_id not in self.posicao_cursos:
+                return None
+            return _ordenar_relacoes(self.scores.get(curso_id, {}).items(), self.posicao_carreiras, limite)
+
+    def cursos_da_carreira(self, carreira_id: int, limite: int | None = None) -> list | None:
+        """Retorna os cursos relacionados à carreira ordenados por score (None se a carreira não existir)"""
+        with self._lock:
+            if carreira_id not in self.posicao_carreiras:
+                return None
+            return _ordenar_relacoes(self._coluna(carreira_id).items(), self.posicao_cursos, limite)
+
+    def montar(self) -> dict:
+        """Monta o mapa completo (as duas visões ordenadas) a partir da matriz de scores"""
+        with self._lock:
+            return _montar_visoes(self.cursos, self.carreiras, self.scores)
+
+
+def _montar_visoes(cursos: List[dict], carreiras: List[dict], scores: Dict[int, Dict[int, float]]) -> dict:
+    """Monta o dicionário do mapa (listas base e as duas visões ordenadas) a partir da matriz {curso_id: {carreira_id: score}}"""
+    posicao_cursos = {c["id"]: (i, c["nome"]) for i, c in enumerate(cursos)}
+    posicao_carreiras = {c["id"]: (i, c["nome"]) for i, c in enumerate(carreiras)}
+    relacoes_por_carreira: Dict[int, List[Tuple[int, float]]] = {}
+    for curso_id, linha in scores.items():
+        for carreira_id, score in linha.items():
+            relacoes_por_carreira.setdefault(carreira_id, []).append((curso_id, score))
+
+    cursoToCarreiras: Dict[int, list] = {
+        curso["id"]: _ordenar_relacoes(scores.get(curso["id"], {}).items(), posicao_carreiras)
+        for curso in cursos
+    }
+    carreiraToCursos: Dict[int, list] = {
+        carreira["id"]: _ordenar_relacoes(relacoes_por_carreira.get(carreira["id"], []), posicao_cursos)
+        for carreira in carreiras
+    }
 
     return {
         "cursos": cursos,
@@ -127,3 +284,174 @@ def montar_mapa(session: Session) -> dict:
         "cursoToCarreiras": cursoToCarreiras,
         "carreiraToCursos": carreiraToCursos,
     }
+
+
+def _construir_indice(session: Session) -> IndiceMapa:
+    """Lê cursos, carreiras, oferta e demanda do banco e monta o estado do mapa"""
+    cursos, carreiras = carregar_listas_base(session)
+    return IndiceMapa(cursos, carreiras, agregar_oferta_por_curso(session), agregar_demanda_por_carreira(session))
+
+
+def montar_mapa(session: Session) -> dict:
+    """Monta o mapa completo curso×carreira calculando scores de compatibilidade e organizando em estruturas bidirecionais ordenadas"""
+    # Matriz de scores calculada uma única vez; as duas visões são lidas dela
+    return _construir_indice(session).montar()
+
+
+def calcular_scores_sql(session: Session, min_score: float | None = None) -> List[Tuple[int, int, float]]:
+    """Calcula no banco, em uma única consulta agregada, o score de todos os pares curso×carreira
+
+    score = sum(oferta * demanda) / sum(demanda), como em calcular_score, via CTEs de oferta (curso × categoria),
+    demanda (carreira × categoria) e demanda total por carreira. Apenas pares com score > min_score (padrão 0)
+    são retornados, com o filtro aplicado no próprio banco. Retorna lista de (curso_id, carreira_id, score).
+    """
+    oferta = (
+        select(
+            CursoConhecimento.curso_id.label("curso_id"),
+            ConhecimentoCategoria.categoria_id.label("categoria_id"),
+            func.sum(func.coalesce(ConhecimentoCategoria.peso, 0)).label("valor"),
+        )
+        .join(ConhecimentoCategoria, ConhecimentoCategoria.conhecimento_id == CursoConhecimento.conhecimento_id)
+        .group_by(CursoConhecimento.curso_id, ConhecimentoCategoria.categoria_id)
+        .cte("oferta")
+    )
+    demanda = (
+        select(
+            CarreiraHabilidade.carreira_id.label("carreira_id"),
+            Habilidade.categoria_id.label("categoria_id"),
+            func.coalesce(func.sum(CarreiraHabilidade.frequencia), 0).label("valor"),
+        )
+        .join(Habilidade, Habilidade.id == CarreiraHabilidade.habilidade_id)
+        .where(Habilidade.categoria_id.is_not(None))
+        .group_by(CarreiraHabilidade.carreira_id, Habilidade.categoria_id)
+        .cte("demanda")
+    )
+    total = (
+        select(demanda.c.carreira_id, func.sum(demanda.c.valor).label("valor"))
+        .group_by(demanda.c.carreira_id)
+        .cte("demanda_total")
+    )
+    # cast para Float evita divisão inteira no SQLite e numeric no PostgreSQL
+    score = cast(func.sum(oferta.c.valor * demanda.c.valor), Float) / total.c.valor
+    consulta = (
+        select(oferta.c.curso_id, demanda.c.carreira_id, score.label("score"))
+        .join(demanda, demanda.c.categoria_id == oferta.c.categoria_id)
+        .join(total, total.c.carreira_id == demanda.c.carreira_id)
+        .where(total.c.valor > 0)
+        .group_by(oferta.c.curso_id, demanda.c.carreira_id, total.c.valor)
+        .having(score > float(min_score or 0.0))
+    )
+    return [(curso_id, carreira_id, float(valor)) for curso_id, carreira_id, valor in session.execute(consulta)]
+
+
+def montar_mapa_sql(session: Session, min_score: float | None = None) -> dict:
+    """Monta o mapa completo com os scores calculados no banco (calcular_scores_sql), sem trazer as agregações por categoria"""
+    cursos, carreiras = carregar_listas_base(session)
+    scores: Dict[int, Dict[int, float]] = {}
+    for curso_id, carreira_id, score in calcular_scores_sql(session, min_score):
+        scores.setdefault(curso_id, {})[carreira_id] = score
+    return _montar_visoes(cursos, carreiras, scores)
+
+
+_cache_indice = CachePorBanco()
+_cache_mapa = CachePorBanco()
+
+
+def obter_indice_mapa(session: Session) -> IndiceMapa:
+    """Retorna o estado do mapa residente em memória, construindo-o na primeira chamada"""
+    return _cache_indice.obter(session, _construir_indice)
+
+
+class MapaSerializado:
+    """Resposta de /mapa já validada e serializada em JSON, com o ETag forte calculado sobre os bytes"""
+
+    __slots__ = ("corpo", "etag")
+
+    def __init__(self, corpo: bytes):
+        self.corpo = corpo
+        self.etag = '"' + hashlib.sha256(corpo).hexdigest() + '"'
+
+
+def _serializar_mapa(session: Session) -> MapaSerializado:
+    """Monta o mapa a partir do estado residente, valida com MapaOut e serializa em bytes JSON"""
+    return MapaSerializado(MapaOut.model_validate(obter_indice_mapa(session).montar()).model_dump_json().encode("utf-8"))
+
+
+def obter_mapa_serializado(session: Session) -> MapaSerializado:
+    """Retorna o mapa serializado em cache, montando-o apenas após uma alteração (sem acessar o banco no acerto)"""
+    return _cache_mapa.obter(session, _serializar_mapa)
+
+
+def invalidar_mapa(session: Session | None = None) -> None:
+    """Descarta o estado e o mapa serializado em cache; deve ser chamada após escritas em cursos, carreiras, conhecimentos ou habilidades que não tenham atualização incremental"""
+    _cache_indice.invalidar(session)
+    _cache_mapa.invalidar(session)
+
+
+def atualizar_mapa_cursos(session: Session, curso_ids: Iterable[int]) -> None:
+    """Recalcula a oferta e a linha de scores apenas dos cursos informados (após commit de CursoConhecimento)"""
+    if _cache_indice.atual(session) is None:
+        invalidar_mapa(session)  # nada residente: a próxima leitura reconstrói tudo
+        return
+    curso_ids = sorted(set(curso_ids))
+    oferta_por_curso = agregar_oferta_por_curso(session, curso_ids) if curso_ids else {}
+
+    def aplicar(indice: IndiceMapa) -> None:
+        for curso_id in curso_ids:
+            indice.definir_oferta(curso_id, oferta_por_curso.get(curso_id, {}))
+
+    _cache_indice.atualizar(session, aplicar)
+    _cache_mapa.invalidar(session)
+
+
+def atualizar_mapa_conhecimento(session: Session, conhecimento_id: int) -> None:
+    """Recalcula apenas os cursos que incluem o conhecimento (após commit de ConhecimentoCategoria)"""
+    curso_ids = [
+        curso_id for (curso_id,) in
+        session.query(CursoConhecimento.curso_id).filter(CursoConhecimento.conhecimento_id == conhecimento_id).all()
+    ]
+    atualizar_mapa_cursos(session, curso_ids)
+
+
+def atualizar_mapa_carreira(session: Session, carreira_id: int) -> None:
+    """Recalcula a demanda e a coluna de scores apenas da carreira informada (após commit de CarreiraHabilidade)"""
+    if _cache_indice.atual(session) is None:
+        invalidar_mapa(session)  # nada residente: a próxima leitura reconstrói tudo
+        return
+    demanda = agregar_demanda_por_carreira(session, [carreira_id]).get(carreira_id, {})
+    _cache_indice.atualizar(session, lambda indice: indice.definir_demanda(carreira_id, demanda))
+    _cache_mapa.invalidar(session)
+
+
+def iterar_mapa(session: Session, min_score: float | None = None) -> Iterator[dict]:
+    """Percorre o mapa entidade a entidade (cada curso e depois cada carreira, com suas relações ordenadas) para envio em NDJSON
+
+    Com min_score, mantém apenas as relações com score > min_score (mesmo critério de montar_mapa_sql).
+    """
+    indice = obter_indice_mapa(session)
+
+    def filtrar(relacoes: list | None) -> list:
+        return [r for r in relacoes or [] if min_score is None or r["score"] > min_score]
+
+    for curso in indice.cursos:
+        yield {"tipo": "curso", "id": curso["id"], "nome": curso["nome"], "relacoes": filtrar(indice.carreiras_do_curso(curso["id"]))}
+    for carreira in indice.carreiras:
+        yield {"tipo": "carreira", "id": carreira["id"], "nome": carreira["nome"], "relacoes": filtrar(indice.cursos_da_carreira(carreira["id"]))}
+
+
+def relacoes_do_curso(session: Session, curso_id: int, limite: int | None = None) -> dict | None:
+    """Retorna {"id", "nome", "relacoes"} com as top-K carreiras do curso ou None se o curso não existir"""
+    indice = obter_indice_mapa(session)
+    relacoes = indice.carreiras_do_curso(curso_id, limite)
+    if relacoes is None:
+        return None
+    return {"id": curso_id, "nome": indice.posicao_cursos[curso_id][1], "relacoes": relacoes}
+
+
+def relacoes_da_carreira(session: Session, carreira_id: int, limite: int | None = None) -> dict | None:
+    """Retorna {"id", "nome", "relacoes"} com os top-K cursos da carreira ou None se a carreira não existir"""
+    indice = obter_indice_mapa(session)
+    relacoes = indice.cursos_da_carreira(carreira_id, limite)
+    if relacoes is None:
+        return None
+    return {"id": carreira_id, "nome": indice.posicao_carreiras[carreira_id][1], "relacoes": relacoes}
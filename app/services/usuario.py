@@ -1,12 +1,15 @@
 from app.models.usuarioModels import Usuario
 from app.schemas.usuarioSchemas import UsuarioOut, UsuarioBase
+from app.services.compatibilidade import materializar_scores_usuario
 from typing import Any, Mapping
 
 
 def criar_usuario(session, usuario_data: Mapping[str, Any]) -> UsuarioOut:
-    """Cria um novo usuário com dados mínimos (dict), salva e retorna como UsuarioOut."""
+    """Cria um novo usuário com dados mínimos (dict), materializa seus scores de compatibilidade, salva e retorna como UsuarioOut."""
     novo_usuario = Usuario(**dict(usuario_data))
     session.add(novo_usuario)
+    session.flush()
+    materializar_scores_usuario(session, novo_usuario.id) # mesma transação: leituras de compatibilidade nunca precisam gravar
     session.commit()
     session.refresh(novo_usuario)
     return UsuarioOut.model_validate(novo_usuario)
@@ -1,11 +1,13 @@
 from app.models.usuarioHabilidadeModels import UsuarioHabilidade # modelo de tabela
 from app.schemas.usuarioHabilidadeSchemas import UsuarioHabilidadeBase, UsuarioHabilidadeOut # schema de entrada e saída
+from app.services.compatibilidade import registrar_habilidade_adicionada, registrar_habilidade_removida
 
 
 def criar_usuario_habilidade(session, usuario_habilidade_data: UsuarioHabilidadeBase) -> UsuarioHabilidadeOut:
     """Cria uma nova associação entre usuário e habilidade no banco de dados e retorna como UsuarioHabilidadeOut"""
     novo_usuario_habilidade = UsuarioHabilidade(**usuario_habilidade_data.model_dump())
     session.add(novo_usuario_habilidade)
+    registrar_habilidade_adicionada(session, novo_usuario_habilidade.usuario_id, novo_usuario_habilidade.habilidade_id)
     session.commit()
     session.refresh(novo_usuario_habilidade)
     return UsuarioHabilidadeOut.model_validate(novo_usuario_habilidade)
@@ -22,6 +24,7 @@ def remover_usuario_habilidade(session, usuario_id: int, habilidade_id: int) ->
     usuario_habilidade = session.query(UsuarioHabilidade).filter_by(usuario_id=usuario_id, habilidade_id=habilidade_id).first()
     if usuario_habilidade:
         session.delete(usuario_habilidade)
+        registrar_habilidade_removida(session, usuario_id, habilidade_id)
         session.commit()
         return UsuarioHabilidadeOut.model_validate(usuario_habilidade)
     return None
@@ -3,10 +3,17 @@ from app.models.habilidadeModels import Habilidade
 from app.models.vagaHabilidadeModels import VagaHabilidade
 from app.models.carreiraHabilidadeModels import CarreiraHabilidade
 from app.models.categoriaModels import Categoria 
+from app.models.carreiraModels import Carreira
 from app.schemas.vagaSchemas import VagaBase, VagaOut
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
 from sqlalchemy.exc import IntegrityError
-from app.services.extracao import padronizar_descricao, extrair_habilidades_descricao, normalizar_habilidade, deduplicar
+from typing import AsyncIterator, Iterator
+from fastapi.concurrency import run_in_threadpool
+from app.services.extracao import padronizar_descricao, extrair_habilidades_descricao_async, transmitir_habilidades_descricao, normalizar_habilidade, deduplicar, invalidar_dicionario_habilidades, obter_catalogo_habilidades
+from app.services.compatibilidade import invalidar_matriz_carreiras, recalcular_scores_carreiras
+from app.services.mapeamento import atualizar_mapa_carreira, invalidar_mapa
+from app.utils.sql import insert_com_conflito
 
 
 # POST - Cria a vaga sem processar habilidades
@@ -35,40 +42,65 @@ def criar_vaga(session: Session, vaga_data: VagaBase) -> VagaOut:
 
 
 # PREVIEW - Extrai habilidades da descrição da vaga sem salvar as habilidades e relacioná-las com a carreira
-def extrair_habilidades_vaga(session: Session, vaga_id: int) -> list[dict]:
-    """Extrai habilidades da descrição da vaga usando IA e retorna lista para preview com informações de categoria"""
-    vaga = session.query(Vaga).filter(Vaga.id == vaga_id).first()
+async def extrair_habilidades_vaga_async(session: Session, vaga_id: int, *, cliente=None, propagar_erros: bool = False) -> list[dict]:
+    """Extrai habilidades da descrição da vaga usando IA e retorna lista para preview com informações de categoria
+
+    Aguarda a IA sem bloquear o event loop e roda as consultas no threadpool.
+    """
+    vaga = await run_in_threadpool(lambda: session.query(Vaga).filter(Vaga.id == vaga_id).first())
     if not vaga:
         return []
-    # Usa a versão atual da extração que aceita sessão e retorna apenas os nomes para o preview
-    itens = extrair_habilidades_descricao(vaga.descricao, session=session)
+    itens = await extrair_habilidades_descricao_async(vaga.descricao, session=session, cliente=cliente, propagar_erros=propagar_erros)
+    return await run_in_threadpool(_montar_preview, session, itens)
+
+
+async def transmitir_preview_habilidades(session: Session, vaga_id: int, *, cliente=None) -> AsyncIterator[dict]:
+    """Versão em fluxo do preview: produz cada habilidade já associada ao banco assim que o modelo a conclui"""
+    vaga = await run_in_threadpool(lambda: session.query(Vaga).filter(Vaga.id == vaga_id).first())
+    if not vaga:
+        return
+    vistos = set()
+    async for item in transmitir_habilidades_descricao(vaga.descricao, session=session, cliente=cliente):
+        for preview in await run_in_threadpool(_montar_preview, session, [item]):
+            # nomes distintos do modelo podem apontar para a mesma habilidade do banco
+            chave = deduplicar(preview["nome"])
+            if chave not in vistos:
+                vistos.add(chave)
+                yield preview
+
+
+def _montar_preview(session: Session, itens: list[dict]) -> list[dict]:
+    """Deduplica as habilidades extraídas e as associa a habilidades e categorias existentes no banco
+
+    Nomes e categorias sugeridas são resolvidos no catálogo em memória (sem acento nem diferença de maiúsculas),
+    então o número de consultas não depende de quantas habilidades vieram da extração.
+    """
     finais: list[dict] = []
     vistos = set()
+    catalogo = obter_catalogo_habilidades(session)
     for item in itens:
         nome_original = item.get("nome") if isinstance(item, dict) else str(item)
         cat_sug = item.get("categoria_sugerida") if isinstance(item, dict) else None
         chave = deduplicar(nome_original)
         if chave not in vistos and nome_original:
             vistos.add(chave)
-            # Verifica se a habilidade já existe no banco usando nome normalizado para busca
+            # Verifica se a habilidade já existe no banco usando nome normalizado para busca (motor em cache, sem consultas)
             nome_normalizado = normalizar_habilidade(nome_original, session=session)
-            habilidade_db = session.query(Habilidade).filter(Habilidade.nome.ilike(nome_normalizado)).first()
-            habilidade_id = habilidade_db.id if habilidade_db else ""
+            habilidade_db = catalogo.habilidade(nome_normalizado)  # (id, nome, categoria_id, categoria_nome)
+            habilidade_id = habilidade_db[0] if habilidade_db else ""
             # Se existir no banco, preferir a categoria atual do banco e o nome do banco
-            if habilidade_db and habilidade_db.categoria_id:
-                categoria_id = habilidade_db.categoria_id
-                categoria_nome = session.query(Categoria.nome).filter(Categoria.id == habilidade_db.categoria_id).scalar() or ""
+            if habilidade_db and habilidade_db[2]:
+                categoria_id = habilidade_db[2]
+                categoria_nome = habilidade_db[3] or ""
                 # Se existe no banco, usa o nome do banco (que pode estar editado/corrigido)
-                nome_para_preview = habilidade_db.nome
+                nome_para_preview = habilidade_db[1]
             else:
                 # Caso contrário, tenta casar sugestão com categoria existente
                 categoria_id = ""
                 categoria_nome = ""
-                if cat_sug:
-                    cat_db = session.query(Categoria).filter(Categoria.nome.ilike(cat_sug)).first()
-                    if cat_db:
-                        categoria_id = cat_db.id
-                        categoria_nome = cat_db.nome
+                cat_db = catalogo.categoria(cat_sug)
+                if cat_db:
+                    categoria_id, categoria_nome = cat_db
                 # Se não existe no banco, usa o nome normalizado como sugestão inicial
                 nome_para_preview = nome_normalizado
             finais.append({
@@ -83,8 +115,22 @@ def extrair_habilidades_vaga(session: Session, vaga_id: int) -> list[dict]:
 
 
 # CONFIRM - Confirma lista final de habilidades para a vaga e associa na carreira
+def _inteiro_ou_none(valor) -> int | None:
+    """Converte ids vindos do payload ("12", 12, "" ou None) em inteiro"""
+    try:
+        return int(valor) if valor not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
 def confirmar_habilidades_vaga(session: Session, vaga_id: int, habilidades_finais: list) -> dict:
-    """Confirma e associa lista final de habilidades editadas à vaga e incrementa frequência na carreira"""
+    """Confirma e associa lista final de habilidades editadas à vaga e incrementa frequência na carreira
+
+    Trabalha por conjuntos: uma consulta resolve todas as habilidades (por id ou nome, sem diferenciar maiúsculas),
+    outra as categorias; as habilidades novas entram num único INSERT e as relações com vaga e carreira em
+    INSERT ... ON CONFLICT. A frequência na carreira é incrementada no próprio banco, só para relações novas com a
+    vaga, de modo que confirmações simultâneas ou repetidas não perdem nem duplicam incrementos.
+    """
     vaga = session.query(Vaga).filter(Vaga.id == vaga_id).first()
     if not vaga:
         raise ValueError("Vaga não encontrada")
@@ -116,82 +162,124 @@ def confirmar_habilidades_vaga(session: Session, vaga_id: int, habilidades_finai
         vistos.add(chave)
         finais_norm.append({
             "nome": nome_editado.strip(),  # preserva nome editado, apenas remove espaços extras
-            "categoria_id": categoria_id_raw,
-            "habilidade_id": habilidade_id_raw,
+            "categoria_id": _inteiro_ou_none(categoria_id_raw),
+            "habilidade_id": _inteiro_ou_none(habilidade_id_raw),
+            "categoria_sugerida": categoria_por_chave.get(chave),
         })
 
+    # Resolve de uma vez as habilidades citadas por id ou por nome (inclui possíveis conflitos de renomeação)
+    ids_informados = {item["habilidade_id"] for item in finais_norm if item["habilidade_id"]}
+    nomes_minusculos = {item["nome"].lower() for item in finais_norm}
+    habilidades_db = session.query(Habilidade).filter(
+        or_(Habilidade.id.in_(ids_informados), func.lower(Habilidade.nome).in_(nomes_minusculos))
+    ).all() if finais_norm else []
+    habilidade_por_id = {h.id: h for h in habilidades_db}
+    habilidade_por_nome: dict[str, Habilidade] = {}
+    for h in sorted(habilidades_db, key=lambda h: h.id):
+        habilidade_por_nome.setdefault(h.nome.lower(), h)
+
+    # Categorias informadas, sugeridas e a "categoria pendente" numa única consulta
+    categoria_ids = {item["categoria_id"] for item in finais_norm if item["categoria_id"]}
+    categoria_nomes = {item["categoria_sugerida"].lower() for item in finais_norm if item["categoria_sugerida"]} | {"categoria pendente"}
+    categorias_db = session.query(Categoria).filter(
+        or_(Categoria.id.in_(categoria_ids), func.lower(Categoria.nome).in_(categoria_nomes))
+    ).all() if finais_norm else []
+    categoria_por_id = {c.id: c for c in categorias_db}
+    categoria_por_nome: dict[str, Categoria] = {}
+    for c in sorted(categorias_db, key=lambda c: c.id):
+        categoria_por_nome.setdefault(c.nome.lower(), c)
+
     habilidades_criadas = []
     habilidades_ja_existiam = []
+    categoria_alterada = False  # mudar a categoria de uma habilidade existente afeta a demanda de todas as carreiras
+    habilidade_ids: list[int] = []  # na ordem do payload
+    novas: list[dict] = []  # habilidades a inserir em lote
 
     for item in finais_norm:
         nome_editado = item["nome"]  # nome editado pelo usuário
-        categoria_id_informada = item.get("categoria_id")
-        habilidade_id_informada = item.get("habilidade_id")
-
-        habilidade = None
-        if habilidade_id_informada:
-            habilidade = session.query(Habilidade).filter(Habilidade.id == habilidade_id_informada).first()
+        habilidade = habilidade_por_id.get(item["habilidade_id"]) if item["habilidade_id"] else None
         if not habilidade:
             # Verifica por nome (case-insensitive) usando o nome editado
-            habilidade = session.query(Habilidade).filter(Habilidade.nome.ilike(nome_editado)).first()
+            habilidade = habilidade_por_nome.get(nome_editado.lower())
 
         if not habilidade:
-            # Usa a categoria sugerida pela IA para esta habilidade; se ausente, "categoria pendente"
-            chave = deduplicar(nome_editado)
-            categoria_sugerida = categoria_por_chave.get(chave)
-            categoria = None
-            if categoria_id_informada:
-                categoria = session.query(Categoria).filter(Categoria.id == categoria_id_informada).first()
-            if not categoria and categoria_sugerida:
-                categoria = session.query(Categoria).filter(Categoria.nome.ilike(categoria_sugerida)).first()
+            # Usa a categoria informada ou a sugerida pela IA para esta habilidade; se ausente, "categoria pendente"
+            categoria = categoria_por_id.get(item["categoria_id"]) if item["categoria_id"] else None
+            if not categoria and item["categoria_sugerida"]:
+                categoria = categoria_por_nome.get(item["categoria_sugerida"].lower())
             if not categoria:
                 # fallback estrito: não criar novas categorias com o nome sugerido; usar/garantir 'categoria pendente'
-                categoria = session.query(Categoria).filter(Categoria.nome.ilike("categoria pendente")).first()
+                categoria = categoria_por_nome.get("categoria pendente")
                 if not categoria:
                     categoria = Categoria(nome="categoria pendente")
                     session.add(categoria)
                     session.flush()
-            habilidade = Habilidade(nome=nome_editado, categoria_id=categoria.id)  # salva com nome editado
-            session.add(habilidade)
-            session.flush()
-            habilidades_criadas.append(nome_editado)
+                    categoria_por_nome["categoria pendente"] = categoria
+            novas.append({"nome": nome_editado, "categoria_id": categoria.id})  # salva com nome editado
         else:
             # Atualiza nome/categoria se informado
             if habilidade.nome.lower() != nome_editado.lower():
-                conflito = session.query(Habilidade).filter(Habilidade.nome.ilike(nome_editado)).first()
+                conflito = habilidade_por_nome.get(nome_editado.lower())
                 if conflito and conflito.id != habilidade.id:
                     raise ValueError(f"Já existe uma habilidade com o nome '{nome_editado}'.")
                 habilidade.nome = nome_editado  # atualiza com nome editado
             # Atualizar categoria se fornecida e existir
-            if categoria_id_informada:
-                categoria_db = session.query(Categoria).filter(Categoria.id == categoria_id_informada).first()
-                if categoria_db:
-                    habilidade.categoria_id = categoria_db.id
+            categoria_db = categoria_por_id.get(item["categoria_id"]) if item["categoria_id"] else None
+            if categoria_db and categoria_db.id != habilidade.categoria_id:
+                habilidade.categoria_id = categoria_db.id
+                categoria_alterada = True
             habilidades_ja_existiam.append(nome_editado)
+            habilidade_ids.append(habilidade.id)
+    session.flush()  # renomeações e mudanças de categoria
 
-        # Associa à vaga (se ainda não existe a relação)
-        existe_rel_vaga = session.query(VagaHabilidade).filter_by(
-            vaga_id=vaga.id, habilidade_id=habilidade.id
-        ).first()
-        if not existe_rel_vaga:
-            session.add(VagaHabilidade(vaga_id=vaga.id, habilidade_id=habilidade.id))
-
-        # Associa/incrementa na carreira conforme lógica atual (frequência)
-        if vaga.carreira_id:
-            rel_carreira = session.query(CarreiraHabilidade).filter_by(
-                carreira_id=vaga.carreira_id, habilidade_id=habilidade.id
-            ).first()
-            if rel_carreira:
-                rel_carreira.frequencia += 1
-            else:
-                rel_carreira = CarreiraHabilidade(
-                    carreira_id=vaga.carreira_id,
-                    habilidade_id=habilidade.id,
-                    frequencia=1
-                )
-                session.add(rel_carreira)
+    if novas:
+        # Insere as habilidades novas de uma vez; se outra confirmação criou o mesmo nome no meio tempo, reaproveita
+        inseridas = dict(session.execute(
+            insert_com_conflito(session, Habilidade).on_conflict_do_nothing(index_elements=["nome"])
+            .returning(Habilidade.nome, Habilidade.id),
+            novas,
+        ).all())
+        faltantes = [n["nome"] for n in novas if n["nome"] not in inseridas]
+        concorrentes = dict(session.query(Habilidade.nome, Habilidade.id).filter(Habilidade.nome.in_(faltantes)).all()) if faltantes else {}
+        for n in novas:
+            if n["nome"] in inseridas:
+                habilidades_criadas.append(n["nome"])
+                habilidade_ids.append(inseridas[n["nome"]])
+            elif n["nome"] in concorrentes:
+                habilidades_ja_existiam.append(n["nome"])
+                habilidade_ids.append(concorrentes[n["nome"]])
 
+    novas_na_vaga: list[int] = []
+    if habilidade_ids:
+        # Associa à vaga ignorando relações já existentes; RETURNING traz só as criadas agora
+        novas_na_vaga = session.execute(
+            insert_com_conflito(session, VagaHabilidade)
+            .values([{"vaga_id": vaga.id, "habilidade_id": hid} for hid in dict.fromkeys(habilidade_ids)])
+            .on_conflict_do_nothing(index_elements=["vaga_id", "habilidade_id"])
+            .returning(VagaHabilidade.habilidade_id)
+        ).scalars().all()
+
+    # Associa/incrementa na carreira (frequência) atomicamente, uma vez por relação nova com a vaga
+    if vaga.carreira_id and novas_na_vaga:
+        stmt = insert_com_conflito(session, CarreiraHabilidade).values(
+            [{"carreira_id": vaga.carreira_id, "habilidade_id": hid, "frequencia": 1} for hid in novas_na_vaga]
+        )
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["carreira_id", "habilidade_id"],
+            set_={"frequencia": func.coalesce(CarreiraHabilidade.frequencia, 0) + 1},
+        ))
+
+    if vaga.carreira_id:
+        recalcular_scores_carreiras(session, [vaga.carreira_id])
     session.commit()
+    if vaga.carreira_id:
+        invalidar_matriz_carreiras(session)
+    if categoria_alterada:
+        invalidar_mapa(session)
+    elif vaga.carreira_id:
+        atualizar_mapa_carreira(session, vaga.carreira_id)
+    if habilidades_criadas or categoria_alterada:
+        invalidar_dicionario_habilidades(session)  # novas habilidades passam a ser reconhecidas sem a IA
     session.refresh(vaga)
 
     return {
@@ -223,6 +311,19 @@ def listar_vagas(session: Session) -> list[VagaOut]:
     return resultado
 
 
+# GET - Percorre as vagas sob demanda (streaming)
+def iterar_vagas(session: Session, tamanho_lote: int = 500) -> Iterator[VagaOut]:
+    """Percorre as vagas ordenadas por data de criação decrescente em lotes (cursor no servidor), já com o nome da carreira"""
+    consulta = (
+        session.query(Vaga.id, Vaga.titulo, Vaga.descricao, Vaga.carreira_id, Carreira.nome)
+        .outerjoin(Carreira, Carreira.id == Vaga.carreira_id)
+        .order_by(Vaga.criado_em.desc())
+        .yield_per(tamanho_lote)
+    )
+    for vaga_id, titulo, descricao, carreira_id, carreira_nome in consulta:
+        yield VagaOut(id=vaga_id, titulo=titulo, descricao=descricao, carreira_id=carreira_id, carreira_nome=carreira_nome)
+
+
 # DELETE - Remove a relação vaga-habilidade
 def remover_relacao_vaga_habilidade(session, vaga_id: int, habilidade_id: int) -> bool:
     """Remove a associação entre uma vaga e uma habilidade específica retornando True se removida"""
@@ -267,8 +368,15 @@ def excluir_vaga_decrementando(session: Session, vaga_id: int) -> bool:
                 rel.frequencia = nova
 
     # Exclui a vaga (relações VagaHabilidade devem ser removidas por CASCADE se mapeado)
+    carreira_alterada = bool(vaga.carreira_id and habilidade_ids)
+    carreira_id = vaga.carreira_id
     session.delete(vaga)
+    if carreira_alterada:
+        recalcular_scores_carreiras(session, [carreira_id])
     session.commit()
+    if carreira_alterada:
+        invalidar_matriz_carreiras(session)
+        atualizar_mapa_carreira(session, carreira_id)
     return True
 
 
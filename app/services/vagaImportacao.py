@@ -0,0 +1,161 @@
+import csv, io, json
+from typing import BinaryIO, Iterator
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models.carreiraModels import Carreira
+from app.models.vagaModels import Vaga
+from app.schemas.vagaSchemas import VagaBase, VagaImportacaoLinha, VagaImportacaoOut
+from app.services.extracao import padronizar_descricao
+from app.utils.errors import format_validation_error
+from app.utils.sql import insert_com_conflito
+
+
+FORMATOS_IMPORTACAO = ("csv", "jsonl")
+TAMANHO_LOTE_IMPORTACAO = 1000  # registros gravados (e confirmados) por vez
+
+
+def detectar_formato(nome_arquivo: str | None, tipo_conteudo: str | None) -> str | None:
+    """Deduz o formato do arquivo pela extensão ou pelo Content-Type ("csv", "jsonl" ou None se desconhecido)"""
+    nome = (nome_arquivo or "").lower()
+    tipo = (tipo_conteudo or "").lower()
+    if nome.endswith(".csv") or "csv" in tipo:
+        return "csv"
+    if nome.endswith((".jsonl", ".ndjson")) or "ndjson" in tipo or "jsonl" in tipo:
+        return "jsonl"
+    return None
+
+
+def _ler_registros(arquivo: BinaryIO, formato: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Percorre o arquivo sob demanda produzindo (linha, registro, erro) sem carregá-lo inteiro na memória"""
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace", newline="")
+    if formato == "csv":
+        leitor = csv.DictReader(texto)
+        for registro in leitor:
+            yield leitor.line_num, registro, None
+        return
+    for numero, conteudo in enumerate(texto, start=1):
+        if not conteudo.strip():
+            continue
+        try:
+            registro = json.loads(conteudo)
+        except json.JSONDecodeError as e:
+            yield numero, None, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, "A linha deve conter um objeto JSON"
+            continue
+        yield numero, registro, None
+
+
+def _validar_registro(registro: dict, carreiras: set[int]) -> tuple[dict | None, str | None]:
+    """Valida os campos da vaga e padroniza a descrição, retornando os valores a gravar ou a mensagem de erro"""
+    campos = {campo: registro.get(campo) for campo in ("titulo", "descricao", "carreira_id")}
+    if campos["carreira_id"] in ("", None):
+        campos["carreira_id"] = None  # coluna vazia no CSV
+    try:
+        vaga = VagaBase.model_validate(campos)
+    except ValidationError as e:
+        return None, format_validation_error(e)
+    titulo = vaga.titulo.strip()
+    descricao = padronizar_descricao(vaga.descricao)
+    if not titulo or not descricao:
+        return None, "titulo e descricao são obrigatórios"
+    if len(titulo) > 200:
+        return None, "titulo: deve ter no máximo 200 caracteres"
+    if vaga.carreira_id is not None and vaga.carreira_id not in carreiras:
+        return None, "carreira_id: carreira não encontrada"
+    return {"titulo": titulo, "descricao": descricao, "carreira_id": vaga.carreira_id}, None
+
+
+def _inserir_executemany(session: Session, valores: list[dict]) -> dict[str, int]:
+    """INSERT em lote (executemany) ignorando descrições já cadastradas; retorna descricao -> id das vagas criadas"""
+    resultado = session.execute(
+        insert_com_conflito(session, Vaga).on_conflict_do_nothing(index_elements=["descricao"]).returning(Vaga.descricao, Vaga.id),
+        valores,
+    )
+    return dict(resultado.all())
+
+
+def _inserir_copy(session: Session, valores: list[dict]) -> dict[str, int]:
+    """PostgreSQL: COPY para uma tabela temporária e um único INSERT ... SELECT ... ON CONFLICT DO NOTHING na tabela vaga"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for valor in valores:
+        escritor.writerow([valor["titulo"], valor["descricao"], "" if valor["carreira_id"] is None else valor["carreira_id"]])
+    buffer.seek(0)
+    session.execute(text(
+        "CREATE TEMP TABLE vaga_importacao (titulo varchar(200), descricao text, carreira_id integer) ON COMMIT DROP"
+    ))
+    cursor = session.connection().connection.cursor()  # conexão psycopg2 da transação atual
+    try:
+        cursor.copy_expert("COPY vaga_importacao (titulo, descricao, carreira_id) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    resultado = session.execute(text(
+        "INSERT INTO vaga (titulo, descricao, carreira_id) "
+        "SELECT titulo, descricao, carreira_id FROM vaga_importacao "
+        "ON CONFLICT (descricao) DO NOTHING RETURNING descricao, id"
+    ))
+    return dict(resultado.all())
+
+
+def _gravar_lote(session: Session, pendentes: list[tuple[int, dict]], linhas: list[VagaImportacaoLinha]) -> None:
+    """Grava um lote de registros válidos (sem descrições repetidas entre si), confirma e marca o status de cada linha"""
+    valores = [valor for _, valor in pendentes]
+    inserir = _inserir_copy if session.get_bind().dialect.name == "postgresql" else _inserir_executemany
+    try:
+        criadas = inserir(session, valores)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    for numero, valor in pendentes:
+        vaga_id = criadas.get(valor["descricao"])
+        if vaga_id is not None:
+            linhas.append(VagaImportacaoLinha(linha=numero, status="inserida", id=vaga_id))
+        else:
+            linhas.append(VagaImportacaoLinha(linha=numero, status="duplicada", erro="Já existe uma vaga com a mesma descrição."))
+
+
+# POST - Importa vagas em lote a partir de CSV ou JSONL
+def importar_vagas(session: Session, arquivo: BinaryIO, formato: str, tamanho_lote: int = TAMANHO_LOTE_IMPORTACAO) -> VagaImportacaoOut:
+    """Importa vagas de um arquivo CSV (cabeçalho titulo,descricao,carreira_id) ou JSONL (um objeto por linha)
+
+    O arquivo é lido sob demanda e gravado em lotes de tamanho_lote registros (COPY no PostgreSQL, executemany nos
+    demais bancos), cada um confirmado ao ser gravado. Descrições já cadastradas ou repetidas no arquivo são
+    ignoradas via ON CONFLICT e marcadas como "duplicada"; registros inválidos não interrompem a importação.
+    """
+    if formato not in FORMATOS_IMPORTACAO:
+        raise ValueError("FORMATO_NAO_SUPORTADO")
+    carreiras = {carreira_id for (carreira_id,) in session.query(Carreira.id).all()}
+    linhas: list[VagaImportacaoLinha] = []
+    pendentes: list[tuple[int, dict]] = []
+    no_lote: set[str] = set()  # descrições do lote em montagem (ON CONFLICT não indica qual linha repetida venceu)
+    for numero, registro, erro in _ler_registros(arquivo, formato):
+        valor = None
+        if erro is None:
+            valor, erro = _validar_registro(registro, carreiras)
+        if erro is not None:
+            linhas.append(VagaImportacaoLinha(linha=numero, status="invalida", erro=erro))
+            continue
+        if valor["descricao"] in no_lote:
+            linhas.append(VagaImportacaoLinha(linha=numero, status="duplicada", erro="Descrição repetida no arquivo."))
+            continue
+        no_lote.add(valor["descricao"])
+        pendentes.append((numero, valor))
+        if len(pendentes) >= tamanho_lote:
+            _gravar_lote(session, pendentes, linhas)
+            pendentes, no_lote = [], set()
+    if pendentes:
+        _gravar_lote(session, pendentes, linhas)
+
+    linhas.sort(key=lambda linha: linha.linha)
+    contagem = {status: sum(1 for linha in linhas if linha.status == status) for status in ("inserida", "duplicada", "invalida")}
+    return VagaImportacaoOut(
+        total=len(linhas),
+        inseridas=contagem["inserida"],
+        duplicadas=contagem["duplicada"],
+        invalidas=contagem["invalida"],
+        linhas=linhas,
+    )
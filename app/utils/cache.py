@@ -0,0 +1,71 @@
+import threading
+import weakref
+from typing import Any, Callable
+from sqlalchemy.orm import Session
+
+
+class CachePorBanco:
+    """Cache em memória do processo, separado por engine do banco, com construção preguiçosa e invalidação explícita.
+
+    - o valor é construído na primeira leitura (obter) e reaproveitado até ser invalidado
+    - cada invalidação incrementa a versão; um valor construído durante uma invalidação concorrente é descartado
+    - chaveado pela engine da sessão para que bancos distintos (ex.: testes em SQLite) não compartilhem dados
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+        self._versoes: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _chave(session: Session):
+        """Retorna a engine associada à sessão, usada como chave do cache"""
+        bind = session.get_bind()
+        return getattr(bind, "engine", bind)
+
+    def versao(self, session: Session) -> int:
+        """Retorna a versão atual dos dados cacheados para o banco da sessão"""
+        with self._lock:
+            return self._versoes.get(self._chave(session), 0)
+
+    def obter(self, session: Session, construir: Callable[[Session], Any]) -> Any:
+        """Retorna o valor cacheado ou o constrói com construir(session) caso ainda não exista"""
+        chave = self._chave(session)
+        with self._lock:
+            valor = self._valores.get(chave)
+            versao = self._versoes.get(chave, 0)
+        if valor is not None:
+            return valor
+        valor = construir(session)
+        with self._lock:
+            # só guarda se nenhuma invalidação ocorreu durante a construção
+            if self._versoes.get(chave, 0) == versao:
+                self._valores[chave] = valor
+        return valor
+
+    def atual(self, session: Session) -> Any:
+        """Retorna o valor cacheado sem construí-lo (None se ainda não construído ou invalidado)"""
+        with self._lock:
+            return self._valores.get(self._chave(session))
+
+    def atualizar(self, session: Session, aplicar: Callable[[Any], None]) -> bool:
+        """Aplica uma alteração incremental ao valor cacheado sem descartá-lo; retorna False se não havia valor
+
+        A versão é incrementada para que construções concorrentes (iniciadas antes da alteração) não sobrescrevam o valor.
+        """
+        chave = self._chave(session)
+        with self._lock:
+            valor = self._valores.get(chave)
+            self._versoes[chave] = self._versoes.get(chave, 0) + 1
+        if valor is None:
+            return False
+        aplicar(valor)
+        return True
+
+    def invalidar(self, session: Session | None = None) -> None:
+        """Descarta o valor cacheado do banco da sessão (ou de todos os bancos quando session é None)"""
+        with self._lock:
+            chaves = [self._chave(session)] if session is not None else list(self._valores.keys())
+            for chave in chaves:
+                self._valores.pop(chave, None)
+                self._versoes[chave] = self._versoes.get(chave, 0) + 1
@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import threading
+import time
+from typing import Callable, Iterable
+
+
+class Histograma:
+    """Histograma com limites fixos (ex.: latências em segundos), acumulado em memória do processo e seguro entre threads"""
+
+    def __init__(self, limites: Iterable[float]):
+        self.limites = tuple(sorted(limites))
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        """Zera as contagens"""
+        with self._lock:
+            self._contagens = [0] * (len(self.limites) + 1)  # última posição: acima do maior limite
+            self._total = 0
+            self._soma = 0.0
+            self._maximo = 0.0
+
+    def registrar(self, valor: float) -> None:
+        """Contabiliza uma observação no primeiro intervalo cujo limite superior a comporta"""
+        posicao = next((i for i, limite in enumerate(self.limites) if valor <= limite), len(self.limites))
+        with self._lock:
+            self._contagens[posicao] += 1
+            self._total += 1
+            self._soma += valor
+            self._maximo = max(self._maximo, valor)
+
+    def _percentil(self, contagens: list[int], total: int, fracao: float) -> float | None:
+        """Estima o percentil pelo limite superior do intervalo que o contém (o máximo observado no último intervalo)"""
+        if not total:
+            return None
+        alvo = fracao * total
+        acumulado = 0
+        for posicao, contagem in enumerate(contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return self.limites[posicao] if posicao < len(self.limites) else self._maximo
+        return self._maximo
+
+    def resumo(self) -> dict:
+        """Retorna total, soma, média, máximo, percentis estimados e contagem acumulada por limite"""
+        with self._lock:
+            contagens = list(self._contagens)
+            total, soma, maximo = self._total, self._soma, self._maximo
+        acumulado = 0
+        faixas = {}
+        for limite, contagem in zip([*map(str, self.limites), "+Inf"], contagens):
+            acumulado += contagem
+            faixas[limite] = acumulado
+        return {
+            "total": total,
+            "soma": round(soma, 6),
+            "media": round(soma / total, 6) if total else None,
+            "maximo": round(maximo, 6),
+            "p50": self._percentil(contagens, total, 0.50),
+            "p95": self._percentil(contagens, total, 0.95),
+            "p99": self._percentil(contagens, total, 0.99),
+            "faixas": faixas,
+        }
+
+
+class Contadores:
+    """Contadores nomeados acumulados em memória do processo, seguros entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores: dict[str, int] = {}
+
+    def incrementar(self, nome: str, valor: int = 1) -> None:
+        """Soma valor ao contador (criado com zero na primeira vez)"""
+        with self._lock:
+            self._valores[nome] = self._valores.get(nome, 0) + valor
+
+    def valor(self, nome: str) -> int:
+        """Retorna o valor atual do contador"""
+        with self._lock:
+            return self._valores.get(nome, 0)
+
+    def resumo(self) -> dict[str, int]:
+        """Retorna uma cópia de todos os contadores"""
+        with self._lock:
+            return dict(self._valores)
+
+    def reiniciar(self) -> None:
+        """Zera todos os contadores"""
+        with self._lock:
+            self._valores.clear()
+
+
+def cronometrar(histograma: Histograma) -> Callable:
+    """Decorador que registra no histograma a duração (em segundos) de cada chamada, síncrona ou assíncrona"""
+    def decorador(funcao: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(funcao):
+            @functools.wraps(funcao)
+            async def envolvida_async(*args, **kwargs):
+                inicio = time.perf_counter()
+                try:
+                    return await funcao(*args, **kwargs)
+                finally:
+                    histograma.registrar(time.perf_counter() - inicio)
+            return envolvida_async
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                histograma.registrar(time.perf_counter() - inicio)
+        return envolvida
+    return decorador
@@ -0,0 +1,168 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class CircuitoAberto(Exception):
+    """Chamada recusada sem ser tentada: o circuito foi aberto após falhas seguidas da dependência"""
+
+    def __init__(self, nome: str, reabre_em: float):
+        self.nome = nome
+        self.reabre_em = max(0.0, reabre_em)  # segundos até a próxima tentativa de teste
+        super().__init__(f"Circuito '{nome}' aberto; nova tentativa em {self.reabre_em:.0f}s")
+
+
+class DisjuntorCircuito:
+    """Disjuntor (circuit breaker) seguro entre threads para uma dependência externa
+
+    Fechado: chamadas passam e falhas seguidas são contadas. Ao atingir limite_falhas, abre e recusa chamadas
+    por tempo_recuperacao segundos. Depois disso fica meio aberto: uma única chamada de teste passa; sucesso
+    fecha o circuito e falha o reabre. Uma chamada de teste abandonada (ex.: cancelada) libera a vaga após
+    outro tempo_recuperacao.
+    """
+
+    def __init__(self, nome: str, limite_falhas: int = 5, tempo_recuperacao: float = 30.0, relogio: Callable[[], float] = time.monotonic):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        """Fecha o circuito e zera as falhas"""
+        with self._lock:
+            self._falhas = 0
+            self._aberto_em: float | None = None
+            self._teste_iniciado_em: float | None = None
+
+    @property
+    def estado(self) -> str:
+        """Estado atual: "fechado", "aberto" ou "meio_aberto" (tempo de recuperação já passou)"""
+        with self._lock:
+            return self._estado()
+
+    def _estado(self) -> str:
+        if self._aberto_em is None:
+            return "fechado"
+        if self._relogio() - self._aberto_em >= self.tempo_recuperacao:
+            return "meio_aberto"
+        return "aberto"
+
+    def verificar(self) -> None:
+        """Autoriza uma chamada ou levanta CircuitoAberto; no estado meio aberto só a primeira chamada passa"""
+        with self._lock:
+            estado = self._estado()
+            if estado == "fechado":
+                return
+            agora = self._relogio()
+            if estado == "meio_aberto" and (self._teste_iniciado_em is None or agora - self._teste_iniciado_em >= self.tempo_recuperacao):
+                self._teste_iniciado_em = agora
+                return
+            restante = self.tempo_recuperacao - (agora - (self._aberto_em if self._teste_iniciado_em is None else self._teste_iniciado_em))
+            raise CircuitoAberto(self.nome, restante)
+
+    def registrar_sucesso(self) -> None:
+        """A dependência respondeu: fecha o circuito e zera as falhas seguidas"""
+        with self._lock:
+            self._falhas = 0
+            self._aberto_em = None
+            self._teste_iniciado_em = None
+
+    def registrar_falha(self) -> None:
+        """Contabiliza uma falha; abre (ou reabre, se era a chamada de teste) o circuito ao atingir o limite"""
+        with self._lock:
+            self._falhas += 1
+            if self._teste_iniciado_em is not None or self._falhas >= self.limite_falhas:
+                self._aberto_em = self._relogio()
+            self._teste_iniciado_em = None
+
+    def resumo(self) -> dict:
+        """Estado atual e falhas seguidas"""
+        with self._lock:
+            return {"estado": self._estado(), "falhas_seguidas": self._falhas}
+
+
+class PoliticaRetentativa:
+    """Número de tentativas e espera entre elas com backoff exponencial e jitter completo
+
+    A espera antes da tentativa n+1 é sorteada entre 0 e min(maximo, base * 2**n), o que espalha as
+    retentativas de vários clientes em vez de sincronizá-las contra a dependência degradada.
+    """
+
+    def __init__(self, tentativas: int = 3, base: float = 0.5, maximo: float = 8.0, sorteio: Callable[[], float] = random.random):
+        self.tentativas = max(1, tentativas)
+        self.base = base
+        self.maximo = maximo
+        self._sorteio = sorteio
+
+    def atraso(self, tentativa: int) -> float:
+        """Segundos de espera após a falha da tentativa de índice tentativa (começando em 0)"""
+        return self._sorteio() * min(self.maximo, self.base * (2 ** tentativa))
+
+
+def chamar_com_resiliencia(
+    funcao: Callable[[], T],
+    disjuntor: DisjuntorCircuito,
+    politica: PoliticaRetentativa,
+    transitorio: Callable[[Exception], bool],
+    ao_retentar: Callable[[Exception], None] | None = None,
+) -> T:
+    """Executa funcao passando pelo disjuntor e repetindo falhas transitórias conforme a política
+
+    Só falhas transitórias contam para o disjuntor e são repetidas; as demais (ex.: requisição inválida)
+    mostram que a dependência respondeu e são repassadas de imediato. Com o circuito aberto, levanta CircuitoAberto.
+    """
+    for tentativa in range(politica.tentativas):
+        disjuntor.verificar()
+        try:
+            resultado = funcao()
+        except Exception as exc:
+            if not transitorio(exc):
+                disjuntor.registrar_sucesso()
+                raise
+            disjuntor.registrar_falha()
+            if tentativa + 1 >= politica.tentativas:
+                raise
+            if ao_retentar is not None:
+                ao_retentar(exc)
+            time.sleep(politica.atraso(tentativa))
+        else:
+            disjuntor.registrar_sucesso()
+            return resultado
+
+
+async def chamar_com_resiliencia_async(
+    funcao: Callable[[], Awaitable[T]],
+    disjuntor: DisjuntorCircuito,
+    politica: PoliticaRetentativa,
+    transitorio: Callable[[Exception], bool],
+    ao_retentar: Callable[[Exception], None] | None = None,
+    prazo: float | None = None,
+) -> T:
+    """Versão assíncrona de chamar_com_resiliencia; prazo (segundos) limita cada tentativa com asyncio.wait_for
+
+    Tentativas que estouram o prazo levantam TimeoutError, que transitorio deve tratar como falha transitória.
+    """
+    for tentativa in range(politica.tentativas):
+        disjuntor.verificar()
+        try:
+            resultado = await asyncio.wait_for(funcao(), prazo)
+        except Exception as exc:
+            if not transitorio(exc):
+                disjuntor.registrar_sucesso()
+                raise
+            disjuntor.registrar_falha()
+            if tentativa + 1 >= politica.tentativas:
+                raise
+            if ao_retentar is not None:
+                ao_retentar(exc)
+            await asyncio.sleep(politica.atraso(tentativa))
+        else:
+            disjuntor.registrar_sucesso()
+            return resultado
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert_com_conflito(session: Session, modelo):
+    """Retorna o INSERT do dialeto do banco da sessão, que oferece on_conflict_do_nothing/on_conflict_do_update
+
+    Suporta PostgreSQL (produção) e SQLite (testes); ambos aceitam ON CONFLICT sobre uma restrição única.
+    """
+    dialeto = session.get_bind().dialect.name
+    if dialeto == "postgresql":
+        return postgresql.insert(modelo)
+    if dialeto == "sqlite":
+        return sqlite.insert(modelo)
+    raise NotImplementedError(f"INSERT ... ON CONFLICT não suportado para o dialeto '{dialeto}'")
@@ -0,0 +1,94 @@
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+
+MIDIA_NDJSON = "application/x-ndjson"
+MIDIA_SSE = "text/event-stream"
+TAMANHO_PEDACO = 64 * 1024  # bytes acumulados antes de enviar um pedaço da resposta
+
+
+def aceita_ndjson(request: Request) -> bool:
+    """Verifica se o cliente pediu registros delimitados por linha (Accept: application/x-ndjson)"""
+    return MIDIA_NDJSON in request.headers.get("accept", "").lower()
+
+
+def _serializar(registro: Any) -> bytes:
+    """Serializa um registro (schema Pydantic ou dicionário) em JSON compacto"""
+    if isinstance(registro, BaseModel):
+        return registro.model_dump_json().encode("utf-8")
+    return json.dumps(jsonable_encoder(registro), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _gerar_pedacos(registros: Iterable[Any], ndjson: bool, session: Session | None) -> Iterator[bytes]:
+    """Serializa os registros sob demanda, agrupando-os em pedaços de até TAMANHO_PEDACO bytes"""
+    try:
+        buffer = bytearray() if ndjson else bytearray(b"[")
+        primeiro = True
+        for registro in registros:
+            if ndjson:
+                buffer += _serializar(registro) + b"\n"
+            else:
+                if not primeiro:
+                    buffer += b","
+                buffer += _serializar(registro)
+            primeiro = False
+            if len(buffer) >= TAMANHO_PEDACO:
+                yield bytes(buffer)
+                buffer.clear()
+        if not ndjson:
+            buffer += b"]"
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        # a dependência pegar_sessao já encerrou antes do envio; a sessão reaberta pelo gerador é fechada aqui
+        if session is not None:
+            session.close()
+
+
+def resposta_streaming(request: Request, registros: Iterable[Any], session: Session | None = None) -> StreamingResponse:
+    """Retorna os registros como array JSON transmitido em pedaços ou, se pedido no Accept, como NDJSON (um registro por linha)
+
+    registros deve ser um gerador preguiçoso (ex.: consulta com yield_per) para que a memória não cresça com o catálogo.
+    """
+    ndjson = aceita_ndjson(request)
+    return StreamingResponse(
+        _gerar_pedacos(registros, ndjson, session),
+        media_type=MIDIA_NDJSON if ndjson else "application/json",
+    )
+
+
+def _evento_sse(evento: str, dados: Any) -> bytes:
+    """Formata um evento Server-Sent Events com os dados em JSON"""
+    return b"event: " + evento.encode("utf-8") + b"\ndata: " + _serializar(dados) + b"\n\n"
+
+
+async def _gerar_eventos(registros: AsyncIterable[Any], evento: str, session: Session | None) -> AsyncIterator[bytes]:
+    """Envia cada registro como um evento assim que é produzido, encerrando com o evento "fim" (total enviado) ou "erro" em caso de falha"""
+    total = 0
+    try:
+        async for registro in registros:
+            total += 1
+            yield _evento_sse(evento, registro)
+        yield _evento_sse("fim", {"total": total})
+    except Exception as e:
+        yield _evento_sse("erro", {"detail": str(e) or e.__class__.__name__, "total": total})
+    finally:
+        if session is not None:
+            session.close()
+
+
+def resposta_sse(registros: AsyncIterable[Any], evento: str = "mensagem", session: Session | None = None) -> StreamingResponse:
+    """Transmite os registros de um gerador assíncrono como Server-Sent Events, um evento por registro
+
+    Desliga cache e buffering de proxies (X-Accel-Buffering) para que cada evento chegue ao cliente sem atraso.
+    """
+    return StreamingResponse(
+        _gerar_eventos(registros, evento, session),
+        media_type=MIDIA_SSE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -118,16 +118,16 @@ def test_preview_habilidades_monkeypatched(app_client, monkeypatch):
 		"""Normaliza o nome retornando-o inalterado (simulação)."""
 		return name
 
-	monkeypatch.setattr(extr, "extrair_habilidades_descricao", fake_extract)
 	monkeypatch.setattr(extr, "normalizar_habilidade", fake_norm)
 	# Patch também das referências importadas em app.services.vaga
 	import app.services.vaga as vaga_srv
-	monkeypatch.setattr(vaga_srv, "extrair_habilidades_descricao", fake_extract)
 	monkeypatch.setattr(vaga_srv, "normalizar_habilidade", fake_norm)
 
-	import app.services.vaga as vaga_srv
-	monkeypatch.setattr(vaga_srv, "extrair_habilidades_descricao", fake_extract)
-	monkeypatch.setattr(vaga_srv, "normalizar_habilidade", fake_norm)
+	async def fake_extract_async(desc, session=None, **kwargs):
+		"""Versão assíncrona da extração simulada usada pelo endpoint de preview."""
+		return fake_extract(desc, session=session)
+
+	monkeypatch.setattr(vaga_srv, "extrair_habilidades_descricao_async", fake_extract_async)
 
 	r = client.get(f"/vaga/{vaga_id}/preview-habilidades")
 	assert r.status_code == 200
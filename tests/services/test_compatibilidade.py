@@ -130,3 +130,252 @@ def test_compatibilidade_carreiras_por_usuario_ordenacao(session):
     assert len(resultados) == 2
     assert resultados[0]["carreira_nome"] == "A"
     assert resultados[1]["carreira_nome"] == "B"
+
+
+def test_compatibilidade_carreiras_por_usuario_equivale_calculo_individual(session):
+    """Motor em lote retorna exatamente o mesmo resultado do cálculo carreira a carreira."""
+    usuario = cria_usuario(session, "Lote", "lote@e.com")
+    cat = cria_categoria(session)
+    carreiras = [cria_carreira(session, nome) for nome in ("Dados", "Infra", "Web", "Vazia")]
+    habilidades = [cria_habilidade(session, f"H{i}", cat.id) for i in range(6)]
+
+    frequencias = {
+        carreiras[0].id: [5, 3, 3, 1, 0, 2],
+        carreiras[1].id: [1, 4, 4, 4, 6, 0],
+        carreiras[2].id: [2, 2, 0, 7, 3, 3],
+    }
+    for carreira_id, freqs in frequencias.items():
+        for habilidade, freq in zip(habilidades, freqs):
+            if freq:
+                vincula_carreira_habilidade(session, carreira_id, habilidade.id, freq)
+    for habilidade in (habilidades[0], habilidades[2], habilidades[4]):
+        vincula_usuario_habilidade(session, usuario.id, habilidade.id)
+
+    for min_freq in (None, 1, 3, 5):
+        for taxa in (None, 0.3, 0.5, 0.8, 1.0):
+            lote = compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=min_freq, taxa_cobertura=taxa)
+            individual = [
+                calcular_compatibilidade_usuario_carreira(session, usuario.id, c.id, min_freq=min_freq, taxa_cobertura=taxa)
+                for c in carreiras
+            ]
+            individual.sort(
+                key=lambda r: (r["percentual"], r["peso_coberto"], r["peso_total"], (r["carreira_nome"] or "").lower()),
+                reverse=True,
+            )
+            assert lote == individual
+
+
+def test_matriz_carreiras_cacheada_e_invalidada_nas_escritas(session):
+    """Matriz carreira×habilidade é reaproveitada entre chamadas e recalculada após escrita em CarreiraHabilidade."""
+    from app.schemas.carreiraHabilidadeSchemas import CarreiraHabilidadeBase
+    from app.services.compatibilidade import obter_matriz_carreiras
+    from app.services.carreiraHabilidade import criar_carreira_habilidade, remover_carreira_habilidade
+
+    usuario = cria_usuario(session, "Matriz", "matriz@e.com")
+    cat = cria_categoria(session)
+    carreira = cria_carreira(session, "Dados")
+    h1 = cria_habilidade(session, "Python", cat.id)
+    h2 = cria_habilidade(session, "SQL", cat.id)
+    vincula_carreira_habilidade(session, carreira.id, h1.id, 4)
+    vincula_usuario_habilidade(session, usuario.id, h2.id)
+
+    matriz = obter_matriz_carreiras(session)
+    assert obter_matriz_carreiras(session) is matriz
+    assert matriz.relacoes(carreira.id) == [(h1.id, 4)]
+    assert calcular_compatibilidade_usuario_carreira(session, usuario.id, carreira.id, min_freq=None)["percentual"] == 0.0
+
+    criar_carreira_habilidade(session, CarreiraHabilidadeBase(carreira_id=carreira.id, habilidade_id=h2.id, frequencia=4))
+    assert obter_matriz_carreiras(session) is not matriz
+    assert calcular_compatibilidade_usuario_carreira(session, usuario.id, carreira.id, min_freq=None)["percentual"] == 50.0
+
+    remover_carreira_habilidade(session, carreira.id, h2.id)
+    assert obter_matriz_carreiras(session).relacoes(carreira.id) == [(h1.id, 4)]
+
+
+def _nucleo_por_ordenacao(relacoes, min_freq, taxa):
+    """Referência: calcula (denominador, ids do núcleo) ordenando e percorrendo as habilidades."""
+    consideradas = [(h, float(f)) for h, f in relacoes if min_freq is None or f >= min_freq]
+    total = sum(p for _, p in consideradas)
+    if taxa is None or not (0 < taxa < 1) or total <= 0:
+        return total, {h for h, _ in consideradas}
+    alvo, acumulado, nucleo = taxa * total, 0.0, set()
+    for h, p in sorted(consideradas, key=lambda t: t[1], reverse=True):
+        nucleo.add(h)
+        acumulado += p
+        if acumulado >= alvo:
+            break
+    return acumulado, nucleo
+
+
+def test_tabela_nucleo_busca_binaria_equivale_ordenacao(session):
+    """Corte do núcleo via somas acumuladas coincide com o percurso ordenado para várias taxas."""
+    from app.services.compatibilidade import obter_matriz_carreiras
+
+    cat = cria_categoria(session)
+    carreira = cria_carreira(session, "Núcleo")
+    freqs = [9, 1, 4, 4, 2, 7, 3, 3, 5]
+    habilidades = [cria_habilidade(session, f"N{i}", cat.id) for i in range(len(freqs))]
+    for habilidade, freq in zip(habilidades, freqs):
+        vincula_carreira_habilidade(session, carreira.id, habilidade.id, freq)
+    relacoes = [(h.id, f) for h, f in zip(habilidades, freqs)]
+
+    matriz = obter_matriz_carreiras(session)
+    for min_freq in (None, 3):
+        tabela = matriz.tabela_nucleo(carreira.id, min_freq)
+        assert matriz.tabela_nucleo(carreira.id, min_freq) is tabela
+        for taxa in (None, 0.01, 0.1, 0.25, 0.5, 0.63, 0.75, 0.9, 0.99, 1.0):
+            tamanho, denominador = tabela.corte(taxa)
+            esperado_denominador, esperado_nucleo = _nucleo_por_ordenacao(relacoes, min_freq, taxa)
+            assert denominador == esperado_denominador
+            assert set(tabela.ids_ordenados[:tamanho]) == esperado_nucleo
+
+
+def test_compatibilidade_carreiras_por_usuario_paginacao(session):
+    """Limite/deslocamento retornam a mesma fatia da lista completa ordenada."""
+    usuario = cria_usuario(session, "Pagina", "pagina@e.com")
+    cat = cria_categoria(session)
+    habilidades = [cria_habilidade(session, f"P{i}", cat.id) for i in range(4)]
+    for i in range(7):
+        carreira = cria_carreira(session, f"Carreira {i}")
+        for j, habilidade in enumerate(habilidades):
+            vincula_carreira_habilidade(session, carreira.id, habilidade.id, (i * 3 + j * 5) % 7 + 1)
+    vincula_usuario_habilidade(session, usuario.id, habilidades[0].id)
+    vincula_usuario_habilidade(session, usuario.id, habilidades[3].id)
+
+    completa = compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None)
+    assert len(completa) == 7
+    assert compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None, limite=3) == completa[:3]
+    assert compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None, limite=3, deslocamento=3) == completa[3:6]
+    assert compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None, limite=5, deslocamento=6) == completa[6:]
+    assert compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None, deslocamento=2) == completa[2:]
+
+
+def test_compatibilidade_detalhes_e_faltantes_sob_demanda(session):
+    """Sem detalhes retorna só campos numéricos; faltantes lista o núcleo não coberto por peso decrescente."""
+    usuario = cria_usuario(session, "Detalhe", "detalhe@e.com")
+    cat = cria_categoria(session)
+    carreira = cria_carreira(session, "Fullstack")
+    react = cria_habilidade(session, "React", cat.id)
+    node = cria_habilidade(session, "Node", cat.id)
+    postgres = cria_habilidade(session, "Postgres", cat.id)
+    vincula_carreira_habilidade(session, carreira.id, react.id, 5)
+    vincula_carreira_habilidade(session, carreira.id, node.id, 3)
+    vincula_carreira_habilidade(session, carreira.id, postgres.id, 2)
+    vincula_usuario_habilidade(session, usuario.id, node.id)
+
+    numerico = compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None, detalhes=False)
+    assert numerico == [{
+        "carreira_id": carreira.id,
+        "carreira_nome": "Fullstack",
+        "percentual": 30.0,
+        "peso_coberto": 3.0,
+        "peso_total": 10.0,
+    }]
+
+    completo = compatibilidade_carreiras_por_usuario(session, usuario.id, min_freq=None, faltantes=True)
+    assert completo[0]["habilidades_cobertas"] == ["Node"]
+    assert completo[0]["habilidades_faltantes"] == ["React", "Postgres"]
+
+    nucleo = calcular_compatibilidade_usuario_carreira(
+        session, usuario.id, carreira.id, min_freq=None, taxa_cobertura=0.6, detalhes=False, faltantes=True
+    )
+    assert "habilidades_cobertas" not in nucleo
+    assert nucleo["habilidades_faltantes"] == ["React"]
+
+
+def test_compatibilidade_materializada_acompanha_escritas(session):
+    """Scores materializados são atualizados incrementalmente e equivalem ao cálculo completo com parâmetros padrão."""
+    from app.models.usuarioCarreiraScoreModels import UsuarioCarreiraScore
+    from app.schemas.carreiraHabilidadeSchemas import CarreiraHabilidadeBase
+    from app.schemas.usuarioHabilidadeSchemas import UsuarioHabilidadeBase
+    from app.services.compatibilidade import compatibilidade_materializada_por_usuario, materializar_scores_usuario
+    from app.services.carreiraHabilidade import criar_carreira_habilidade, remover_carreira_habilidade
+    from app.services.usuarioHabilidade import criar_usuario_habilidade, remover_usuario_habilidade
+
+    usuario = cria_usuario(session, "Mat", "mat@e.com")
+    cat = cria_categoria(session)
+    dados = cria_carreira(session, "Dados")
+    web = cria_carreira(session, "Web")
+    h1 = cria_habilidade(session, "Python", cat.id)
+    h2 = cria_habilidade(session, "SQL", cat.id)
+    h3 = cria_habilidade(session, "CSS", cat.id)
+    vincula_carreira_habilidade(session, dados.id, h1.id, 5)
+    vincula_carreira_habilidade(session, dados.id, h2.id, 3)
+    vincula_carreira_habilidade(session, web.id, h1.id, 2) # abaixo do min_freq padrão
+    vincula_carreira_habilidade(session, web.id, h3.id, 4)
+    vincula_usuario_habilidade(session, usuario.id, h1.id)
+
+    def confere():
+        esperado = compatibilidade_carreiras_por_usuario(session, usuario.id, detalhes=False)
+        assert compatibilidade_materializada_por_usuario(session, usuario.id) == esperado
+        assert compatibilidade_materializada_por_usuario(session, usuario.id, limite=1, deslocamento=1) == esperado[1:2]
+
+    # leitura de usuário ainda não materializado calcula na hora, sem gravar
+    confere()
+    assert session.query(UsuarioCarreiraScore).count() == 0
+
+    materializar_scores_usuario(session, usuario.id)  # como em criar_usuario
+    materializar_scores_usuario(session, usuario.id)  # repetir (ou concorrer) não viola uq_usuario_carreira_score
+    session.commit()
+    assert session.query(UsuarioCarreiraScore).filter_by(usuario_id=usuario.id).count() == 2
+    confere()
+
+    criar_usuario_habilidade(session, UsuarioHabilidadeBase(usuario_id=usuario.id, habilidade_id=h3.id))
+    confere()
+    remover_usuario_habilidade(session, usuario.id, h1.id)
+    confere()
+
+    criar_carreira_habilidade(session, CarreiraHabilidadeBase(carreira_id=dados.id, habilidade_id=h3.id, frequencia=6))
+    confere()
+    remover_carreira_habilidade(session, web.id, h3.id)
+    confere()
+
+    # carreira criada após a materialização recebe linhas quando ganha habilidades
+    mobile = cria_carreira(session, "Mobile")
+    criar_carreira_habilidade(session, CarreiraHabilidadeBase(carreira_id=mobile.id, habilidade_id=h3.id, frequencia=3))
+    assert session.query(UsuarioCarreiraScore).filter_by(usuario_id=usuario.id, carreira_id=mobile.id).count() == 1
+    confere()
+
+
+def test_proximas_habilidades_equivale_recalculo_por_candidata(session):
+    """Ganho calculado em uma passada é igual a recalcular a compatibilidade adicionando cada habilidade candidata."""
+    from app.services.compatibilidade import proximas_habilidades_usuario, invalidar_matriz_carreiras
+
+    usuario = cria_usuario(session, "Prox", "prox@e.com")
+    cat = cria_categoria(session)
+    dados = cria_carreira(session, "Dados")
+    web = cria_carreira(session, "Web")
+    habilidades = [cria_habilidade(session, f"H{i}", cat.id) for i in range(5)]
+    for habilidade, freq in zip(habilidades, [6, 4, 3, 3, 0]):
+        if freq:
+            vincula_carreira_habilidade(session, dados.id, habilidade.id, freq)
+    for habilidade, freq in zip(habilidades, [0, 2, 5, 3, 8]):
+        if freq:
+            vincula_carreira_habilidade(session, web.id, habilidade.id, freq)
+    vincula_usuario_habilidade(session, usuario.id, habilidades[0].id)
+    invalidar_matriz_carreiras(session)
+
+    def ganho_recalculado(habilidade_id, carreira_id, taxa):
+        antes = calcular_compatibilidade_usuario_carreira(session, usuario.id, carreira_id, taxa_cobertura=taxa)["percentual"]
+        rel = vincula_usuario_habilidade(session, usuario.id, habilidade_id)
+        depois = calcular_compatibilidade_usuario_carreira(session, usuario.id, carreira_id, taxa_cobertura=taxa)["percentual"]
+        session.delete(rel)
+        session.commit()
+        return round(depois - antes, 2)
+
+    for taxa in (0.5, 0.8, 1.0):
+        sugestoes = proximas_habilidades_usuario(session, usuario.id, dados.id, taxa_cobertura=taxa, limite=10)
+        for s in sugestoes:
+            assert s["carreira_id"] == dados.id
+            assert s["ganho"] == ganho_recalculado(s["habilidade_id"], dados.id, taxa)
+        assert [s["ganho"] for s in sugestoes] == sorted((s["ganho"] for s in sugestoes), reverse=True)
+        assert habilidades[0].id not in {s["habilidade_id"] for s in sugestoes}
+
+    todas = proximas_habilidades_usuario(session, usuario.id, limite=2)
+    assert len(todas) == 2
+    for s in todas:
+        melhor = max(ganho_recalculado(s["habilidade_id"], c.id, 1.0) for c in (dados, web))
+        assert s["ganho"] == melhor
+    assert todas[0]["habilidade_nome"] == "H4" and todas[0]["carreira_nome"] == "Web"
+
+    assert proximas_habilidades_usuario(session, usuario.id, carreira_id=999) == []
@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 import pytest
 
 os.environ.setdefault("KEY_CRYPT", "test-key")
@@ -18,9 +19,21 @@ from tests.services.utils_test_services import session as session
 from tests.services.utils_test_services import (
 	adiciona_padrao,
 	cria_categoria as adiciona_categoria,
+	cria_habilidade,
 	fake_openai_factory,
+	servidor_responses_fake,
 )
 
+
+def extrair(descricao, session=None, **kwargs):
+	"""Executa a extração assíncrona em um loop próprio e fecha o cliente compartilhado criado nele."""
+	async def executar():
+		try:
+			return await extracao.extrair_habilidades_descricao_async(descricao, session=session, **kwargs)
+		finally:
+			await extracao.fechar_cliente_openai_async()
+	return asyncio.run(executar())
+
 def test_normalizar_habilidade_sem_db(session):
 	"""Normaliza nomes de habilidades sem consultar o banco de dados."""
 	assert extracao.normalizar_habilidade("  PyThOn 3.11  ", session=None) == "Python"
@@ -36,6 +49,63 @@ def test_normalizar_habilidade_com_db(session):
 	assert extracao.normalizar_habilidade("Kúbérnetes", session=session) == "Kubernetes"
 
 
+
+def test_motor_normalizacao_equivale_a_regras_em_ordem(session, monkeypatch):
+	"""Motor compilado (literais + alternância) respeita a prioridade por id e não consulta o banco a cada chamada."""
+	from sqlalchemy import event
+
+	adiciona_padrao(session, r"^(react|reactjs)$", "React")
+	adiciona_padrao(session, r"^node(js)?$", "Node.js")
+	adiciona_padrao(session, r"^nodejs$", "NodeJS")  # literal de id maior perde para o regex anterior
+	adiciona_padrao(session, r"^c\+\+$", "C++")
+	adiciona_padrao(session, r"^(\w+)\s\1$", "Repetido")  # retrorreferência: avaliado isoladamente
+	adiciona_padrao(session, r"^kubernetes$", "Kubernetes")
+	adiciona_padrao(session, r"^k8s|kube$", "Kubernetes")
+	adiciona_padrao(session, r"^[", "Inválido")  # padrão inválido é ignorado
+
+	motor = extracao.obter_motor_normalizacao(session)
+	assert set(motor.literais) == {"nodejs", "c++", "kubernetes"}
+
+	consultas = []
+	event.listen(session.get_bind(), "before_cursor_execute", lambda *args: consultas.append(args[2]))
+	entradas = {
+		"ReactJS": "React",
+		"NodeJS": "Node.js",
+		"C++ 17": "C++",
+		"go go": "Repetido",
+		"Kúbérnetes": "Kubernetes",
+		"kube": "Kubernetes",
+		"Rust 1.70": "Rust",
+		"spring-boot": "Spring Boot",
+	}
+	for _ in range(5):
+		for entrada, esperado in entradas.items():
+			assert extracao.normalizar_habilidade(entrada, session=session) == esperado
+	assert consultas == []
+
+	# Alteração na tabela é detectada na próxima verificação da assinatura
+	monkeypatch.setattr(extracao, "INTERVALO_VERIFICACAO", 0)
+	adiciona_padrao(session, r"^spring( boot)?$", "Spring Boot Framework")
+	assert extracao.normalizar_habilidade("spring-boot", session=session) == "Spring Boot Framework"
+
+def test_motor_normalizacao_percebe_edicao_de_regra_existente(session, monkeypatch):
+	"""Editar o padrão ou o valor de uma regra (inclusive por SQL direto, sem mexer em atualizado_em) recompila o motor."""
+	from sqlalchemy import text
+
+	regra = adiciona_padrao(session, r"^k8s$", "K8s")
+	assert extracao.normalizar_habilidade("k8s", session=session) == "K8s"
+	monkeypatch.setattr(extracao, "INTERVALO_VERIFICACAO", 0)
+
+	regra.nome_padronizado = "Kubernetes"
+	session.commit()
+	assert extracao.normalizar_habilidade("k8s", session=session) == "Kubernetes"
+
+	session.execute(text("UPDATE normalizacao SET nome = :padrao WHERE id = :id"), {"padrao": r"^kube$", "id": regra.id})
+	session.commit()
+	assert extracao.normalizar_habilidade("kube", session=session) == "Kubernetes"
+	assert extracao.normalizar_habilidade("k8s", session=session) == "K8s"
+
+
 def test_padronizar_descricao():
 	"""Padroniza descrição removendo acentos, pontuação e normalizando espaços."""
 	entrada = "Desenvolvedor(a) BACKEND — APIs REST!"
@@ -63,10 +133,10 @@ def test_extrair_habilidades_output_text_json(monkeypatch, session):
 		})
 	})()
 
-	monkeypatch.setattr(extracao, "OpenAI", fake_openai_factory(payload))
+	cliente = fake_openai_factory(payload)()
 
 	texto = "Vaga para dev com Python e Docker"
-	itens = extracao.extrair_habilidades_descricao(texto, session=session)
+	itens = extrair(texto, session=session, cliente=cliente)
 	assert itens == [
 		{"nome": "Python", "categoria_sugerida": "Linguagens e formatos"},
 		{"nome": "Docker", "categoria_sugerida": "DevOps"},
@@ -83,9 +153,9 @@ def test_extrair_habilidades_output_blocks(monkeypatch, session):
 	})})()
 	payload = type("Resp", (), {"output": [bloco]})()
 
-	monkeypatch.setattr(extracao, "OpenAI", fake_openai_factory(payload))
+	cliente = fake_openai_factory(payload)()
 
-	itens = extracao.extrair_habilidades_descricao("qualquer", session=session)
+	itens = extrair("qualquer", session=session, cliente=cliente)
 	assert itens == [{"nome": "Python", "categoria_sugerida": "Linguagens e formatos"}]
 
 
@@ -98,9 +168,9 @@ def test_extrair_habilidades_json_embutido_e_dedup(monkeypatch, session):
 	texto = f"Conteudo antes... {json_embutido} ...e depois"
 	payload = type("Resp", (), {"output_text": texto})()
 
-	monkeypatch.setattr(extracao, "OpenAI", fake_openai_factory(payload))
+	cliente = fake_openai_factory(payload)()
 
-	itens = extracao.extrair_habilidades_descricao("vaga", session=session)
+	itens = extrair("vaga", session=session, cliente=cliente)
 	assert itens == [{"nome": "Python", "categoria_sugerida": None}]
 
 
@@ -114,21 +184,531 @@ def test_extrair_habilidades_categoria_desconhecida(monkeypatch, session):
 		})
 	})()
 
-	monkeypatch.setattr(extracao, "OpenAI", fake_openai_factory(payload))
-	itens = extracao.extrair_habilidades_descricao("texto", session=session)
+	cliente = fake_openai_factory(payload)()
+	itens = extrair("texto", session=session, cliente=cliente)
 	assert itens == [{"nome": "Kubernetes", "categoria_sugerida": None}]
 
 
 def test_extrair_habilidades_quando_openai_falha(monkeypatch, session):
 	"""Retorna lista vazia quando cliente OpenAI lança exceção."""
 	class FailingClient:
-		def __init__(self, api_key=None):
+		def __init__(self):
 			class R:
-				def create(self, **kwargs):
+				async def create(self, **kwargs):
 					raise RuntimeError("boom")
 			self.responses = R()
 
-	monkeypatch.setattr(extracao, "OpenAI", FailingClient)
-	itens = extracao.extrair_habilidades_descricao("texto", session=session)
+	cliente = FailingClient()
+	itens = extrair("texto", session=session, cliente=cliente)
 	assert itens == []
 
+
+def test_extrair_habilidades_async_limita_concorrencia(monkeypatch):
+	"""Caminho assíncrono reaproveita o cliente compartilhado e respeita o limite de chamadas simultâneas."""
+	estado = {"ativas": 0, "pico": 0}
+	payload = type("Resp", (), {"output_text": json.dumps({"habilidades": [{"nome": "docker", "categoria": "devops"}]})})()
+
+	class FakeResponses:
+		async def create(self, **kwargs):
+			estado["ativas"] += 1
+			estado["pico"] = max(estado["pico"], estado["ativas"])
+			await asyncio.sleep(0.01)
+			estado["ativas"] -= 1
+			return payload
+
+	async def cenario():
+		cliente, semaforo = extracao.obter_cliente_openai_async()
+		assert extracao.obter_cliente_openai_async() == (cliente, semaforo)  # mesmo cliente/pool no loop
+		await extracao.fechar_cliente_openai_async()
+		fake = type("Cliente", (), {"responses": FakeResponses()})()
+		recursos = (fake, asyncio.Semaphore(2))
+		monkeypatch.setattr(extracao, "obter_cliente_openai_async", lambda: recursos)
+		return await asyncio.gather(*(extracao.extrair_habilidades_descricao_async(f"vaga {i}") for i in range(6)))
+
+	resultados = asyncio.run(cenario())
+	assert resultados == [[{"nome": "Docker", "categoria_sugerida": None}]] * 6
+	assert estado["pico"] == 2
+
+
+def test_cache_extracao_reaproveita_resposta_e_purga(monkeypatch, session):
+	"""Descrição já extraída não chama a IA de novo; categorias diferentes, expiração e purga invalidam o cache."""
+	from datetime import datetime, timedelta
+	from app.models.extracaoCacheModels import ExtracaoCache
+
+	adiciona_categoria(session, "DevOps")
+	chamadas = []
+	payload = type("Resp", (), {"output_text": json.dumps({"habilidades": [{"nome": "docker", "categoria": "devops"}]})})()
+
+	class ContaChamadas:
+		def __init__(self):
+			self.responses = self
+
+		async def create(self, **kwargs):
+			chamadas.append(kwargs["input"])
+			return payload
+
+	cliente = ContaChamadas()
+	esperado = [{"nome": "Docker", "categoria_sugerida": "DevOps"}]
+
+	assert extrair("Vaga DevOps: Docker!", session=session, cliente=cliente) == esperado
+	assert extrair("vaga devops docker", session=session, cliente=cliente) == esperado  # mesma descrição padronizada
+	assert len(chamadas) == 1
+
+	# Normalização aplicada na leitura: novas regras valem para respostas já guardadas
+	adiciona_padrao(session, r"^docker$", "Docker Engine")
+	extracao.invalidar_normalizacao(session)
+	assert extrair("vaga devops docker", session=session, cliente=cliente)[0]["nome"] == "Docker Engine"
+	assert len(chamadas) == 1
+
+	adiciona_categoria(session, "Dados")  # lista de categorias faz parte da chave
+	extrair("vaga devops docker", session=session, cliente=cliente)
+	assert len(chamadas) == 2
+
+	session.query(ExtracaoCache).update({"expira_em": datetime.utcnow() - timedelta(minutes=1)})
+	session.commit()
+	extrair("vaga devops docker", session=session, cliente=cliente)
+	assert len(chamadas) == 3
+
+	assert extracao.purgar_cache_extracao(session) == 1  # a entrada expirada das categorias antigas
+	assert extracao.purgar_cache_extracao(session, somente_expirados=False) == 1
+	assert session.query(ExtracaoCache).count() == 0
+
+
+def test_gravar_cache_extracao_nao_confirma_a_sessao_do_chamador(session):
+	"""O cache é gravado (e renovado) em sessão própria: o que o chamador deixou pendente não é confirmado junto."""
+	from app.models.extracaoCacheModels import ExtracaoCache
+
+	session.add(Categoria(nome="Pendente"))
+	extracao.gravar_cache_extracao(session, "chave", '{"habilidades": []}')
+	extracao.gravar_cache_extracao(session, "chave", '{"habilidades": ["Go"]}')
+	session.rollback()
+
+	assert session.query(Categoria).count() == 0
+	assert session.query(ExtracaoCache.resposta).all() == [('{"habilidades": ["Go"]}',)]
+
+
+def test_dicionario_local_reconhece_habilidades_e_reduz_prompt(monkeypatch, session):
+	"""Modo local dispensa a IA; modo híbrido envia à IA só o trecho pendente, com as habilidades já reconhecidas como dica."""
+	linguagens = adiciona_categoria(session, "Linguagens e formatos")
+	frameworks = adiciona_categoria(session, "Frameworks")
+	cria_habilidade(session, "Python", linguagens.id)
+	cria_habilidade(session, "C", linguagens.id)  # uma letra: ignorada no texto livre
+	cria_habilidade(session, "Spring Boot", frameworks.id)
+	cria_habilidade(session, "Node.js", frameworks.id)
+	adiciona_padrao(session, r"^node$", "Node.js")
+
+	prompts = []
+	payload = type("Resp", (), {"output_text": json.dumps({"habilidades": [{"nome": "Kubernetes", "categoria": None}]})})()
+
+	class Registra:
+		def __init__(self):
+			self.responses = self
+
+		async def create(self, **kwargs):
+			prompts.append(kwargs["input"])
+			return payload
+
+	cliente = Registra()
+	descricao = "Buscamos pessoa com Python, Spring-Boot e Node; letra c isolada; desejavel orquestracao com Kubernetes em nuvem"
+	conhecidas = [
+		{"nome": "Python", "categoria_sugerida": "Linguagens e formatos"},
+		{"nome": "Spring Boot", "categoria_sugerida": "Frameworks"},
+		{"nome": "Node.js", "categoria_sugerida": "Frameworks"},
+	]
+
+	assert extrair(descricao, session=session, cliente=cliente, modo="local") == conhecidas
+	assert prompts == []
+
+	itens = extrair(descricao, session=session, cliente=cliente, modo="hibrido")
+	assert itens == conhecidas + [{"nome": "Kubernetes", "categoria_sugerida": None}]
+	assert prompts[0].endswith("Texto da vaga:\nc isolada; desejavel orquestracao com Kubernetes em nuvem")
+	assert "(não é preciso repeti-las): Python, Spring Boot, Node.js" in prompts[0]
+
+	# Descrição resolvida quase por inteiro pelo dicionário não chama a IA
+	assert extrair("Python e Spring Boot", session=session, cliente=cliente, modo="hibrido") == conhecidas[:2]
+	assert len(prompts) == 1
+
+	# Modo "llm" mantém o comportamento anterior (descrição inteira para a IA)
+	extrair(descricao, session=session, cliente=cliente, modo="llm")
+	assert prompts[-1].endswith(descricao)
+
+	# Habilidade nova passa a ser reconhecida após a invalidação
+	cria_habilidade(session, "Kubernetes", frameworks.id)
+	extracao.invalidar_dicionario_habilidades(session)
+	assert extrair(descricao, session=session, cliente=cliente, modo="local")[-1] == {"nome": "Kubernetes", "categoria_sugerida": "Frameworks"}
+
+
+def test_dicionario_local_nao_aceita_termos_ambiguos_em_texto_comum(session):
+	"""Siglas curtas e palavras comuns (redes, ia, rest, spring) não viram habilidades sem a IA confirmar pelo contexto."""
+	dados = adiciona_categoria(session, "Dados")
+	for nome in ("Redes", "IA", "REST", "Spring", "Power BI", "Banco de Dados Relacional"):
+		cria_habilidade(session, nome, dados.id)
+	prompts = []
+
+	class Registra:
+		def __init__(self):
+			self.responses = self
+
+		async def create(self, **kwargs):
+			prompts.append(kwargs["input"])
+			return type("Resp", (), {"output_text": json.dumps({"habilidades": [{"nome": "Spring Boot"}]})})()
+
+	cliente = Registra()
+	prosa = "Vaga de social media: cuidar das redes sociais da marca, ela ia apoiar o rest do time no dia a dia."
+	assert extrair(prosa, session=session, cliente=cliente, modo="local") == []
+	assert prompts == []
+
+	confirmados, ambiguos, *_ = extracao.obter_dicionario_habilidades(session).encontrar(extracao.padronizar_descricao(prosa))
+	assert confirmados == [] and [item["nome"] for item in ambiguos] == ["Redes", "IA", "REST"]
+
+	# No modo híbrido a IA vê o contexto do termo ambíguo e decide; "Spring" não é aceito no lugar de "Spring Boot"
+	descricao = "Experiência com Spring Boot e Power BI"
+	itens = extrair(descricao, session=session, cliente=cliente, modo="hibrido")
+	assert itens == [{"nome": "Power BI", "categoria_sugerida": "Dados"}, {"nome": "Spring Boot", "categoria_sugerida": None}]
+	assert prompts[-1].endswith("Texto da vaga:\n" + descricao)
+	assert "(inclua somente se forem habilidades técnicas neste contexto): Spring\n" in prompts[-1]
+
+
+def test_modo_hibrido_dispensa_a_ia_ou_envia_so_trechos_pendentes_de_descricao_real(session):
+	"""Descrição real com todas as habilidades cadastradas não chama a IA; uma habilidade nova manda só a janela em volta dela."""
+	backend = adiciona_categoria(session, "Backend")
+	for nome in ("Python", "Django", "PostgreSQL", "Docker", "Kubernetes"):
+		cria_habilidade(session, nome, backend.id)
+	prompts = []
+
+	class Registra:
+		def __init__(self):
+			self.responses = self
+
+		async def create(self, **kwargs):
+			prompts.append(kwargs["input"])
+			return type("Resp", (), {"output_text": json.dumps({"habilidades": [{"nome": "Kafka"}]})})()
+
+	cliente = Registra()
+	descricao = (
+		"Estamos contratando uma pessoa desenvolvedora para o nosso time de produtos.\n"
+		"Responsabilidades:\n"
+		"- Desenvolver e manter os serviços em Python e Django, com banco PostgreSQL.\n"
+		"- Empacotar as aplicações com Docker e publicar em Kubernetes.\n"
+		"- Participar das cerimônias do time e apoiar a evolução do produto.\n"
+		"Requisitos: experiência com Python, boa comunicação e vontade de aprender."
+	)
+	conhecidas = ["Python", "Django", "PostgreSQL", "Docker", "Kubernetes"]
+	assert [item["nome"] for item in extrair(descricao, session=session, cliente=cliente, modo="hibrido")] == conhecidas
+	assert prompts == []
+
+	com_kafka = descricao.replace("com Docker e", "com Docker, filas no Kafka e")
+	assert [item["nome"] for item in extrair(com_kafka, session=session, cliente=cliente, modo="hibrido")] == conhecidas + ["Kafka"]
+	extrair(com_kafka, session=session, cliente=cliente, modo="llm")
+	hibrido, completo = prompts
+	trecho = hibrido.split("Texto da vaga:\n")[1]
+	assert "filas no Kafka" in trecho and "Estamos contratando" not in trecho and "vontade de aprender" not in trecho
+	assert len(hibrido) < len(completo)
+
+
+def test_metricas_extracao_registram_tokens_latencia_e_caminhos(monkeypatch, session):
+	"""Métricas contabilizam chamadas, tokens do usage, latências, origem dos resultados e o fallback de JSON embutido."""
+	extracao.reiniciar_metricas_extracao()
+	uso = type("Uso", (), {"input_tokens": 120, "output_tokens": 30})()
+	respostas = [
+		type("Resp", (), {"output_text": json.dumps({"habilidades": ["Go"]}), "usage": uso})(),
+		type("Resp", (), {"output_text": 'Segue: {"habilidades": ["Rust"]} fim', "usage": uso})(),
+		type("Resp", (), {"output_text": "sem json", "usage": uso})(),
+	]
+
+	class Sequencia:
+		def __init__(self):
+			self.responses = self
+
+		async def create(self, **kwargs):
+			return respostas.pop(0)
+
+	cliente = Sequencia()
+	extrair("vaga golang backend", session=session, cliente=cliente)
+	extrair("vaga rust sistemas", session=session, cliente=cliente)
+	extrair("vaga sem nada", session=session, cliente=cliente)
+	extrair("vaga golang backend", session=session, cliente=cliente)  # cache: sem nova chamada nem nova interpretação contabilizada
+
+	resumo = extracao.resumo_metricas_extracao()
+	assert resumo["modelo"] == {
+		"chamadas": 3, "erros": 0, "tokens_entrada": 360, "tokens_saida": 90,
+		"tokens_entrada_media": 120.0, "tokens_saida_media": 30.0,
+	}
+	assert resumo["origem"] == {"local": 0, "cache": 1, "modelo": 3}
+	assert resumo["interpretacao"] == {"json_direto": 1, "json_embutido": 1, "sem_json": 1}
+	assert resumo["latencia_modelo_segundos"]["total"] == 3
+	assert resumo["latencia_extracao_segundos"]["total"] == 4
+	assert resumo["latencia_extracao_segundos"]["faixas"]["+Inf"] == 4
+
+	extracao.reiniciar_metricas_extracao()
+	assert extracao.resumo_metricas_extracao()["modelo"]["chamadas"] == 0
+
+
+def test_leitor_incremental_emite_itens_ao_fechar():
+	"""Itens do array saem assim que fecham, mesmo com pedaços cortados no meio e chaves/aspas escapadas dentro de strings."""
+	texto = '{"habilidades": [{"nome": "C{#}", "categoria": "x"}, "Say \\"hi\\" ]", {"nome": "Go"}], "extra": [1]}'
+	leitor = extracao.LeitorHabilidadesIncremental()
+	emitidos = []
+	for i in range(0, len(texto), 3):
+		emitidos.append(leitor.alimentar(texto[i:i + 3]))
+	itens = [item for lote in emitidos for item in lote]
+	assert itens == [{"nome": "C{#}", "categoria": "x"}, 'Say "hi" ]', {"nome": "Go"}]
+	assert leitor.texto == texto
+	# o primeiro item é entregue antes de o texto terminar
+	assert next(i for i, lote in enumerate(emitidos) if lote) * 3 < texto.index('"Say')
+
+
+def test_transmitir_habilidades_entrega_antes_do_fim_do_fluxo(monkeypatch, session):
+	"""Fluxo do modelo é interpretado incrementalmente: a primeira habilidade chega antes do último pedaço da resposta."""
+	adiciona_categoria(session, "DevOps")
+	texto = json.dumps({"habilidades": [{"nome": "docker", "categoria": "devops"}, {"nome": "kubernetes", "categoria": "nuvem"}]})
+	pedacos = [texto[i:i + 7] for i in range(0, len(texto), 7)]
+	enviados = []
+
+	class Evento:
+		def __init__(self, **campos):
+			self.__dict__.update(campos)
+
+	class FakeResponses:
+		async def create(self, stream=False, **kwargs):
+			assert stream is True
+			async def fluxo():
+				for pedaco in pedacos:
+					enviados.append(pedaco)
+					yield Evento(type="response.output_text.delta", delta=pedaco)
+				yield Evento(type="response.completed", response=Evento(usage=None))
+			return fluxo()
+
+	async def cenario():
+		fake = type("Cliente", (), {"responses": FakeResponses()})()
+		monkeypatch.setattr(extracao, "obter_cliente_openai_async", lambda: (fake, asyncio.Semaphore(1)))
+		recebidos = []
+		async for item in extracao.transmitir_habilidades_descricao("vaga de infraestrutura", modo="llm"):
+			recebidos.append((item, len(enviados)))
+		return recebidos
+
+	recebidos = asyncio.run(cenario())
+	assert [item for item, _ in recebidos] == [
+		{"nome": "Docker", "categoria_sugerida": None},
+		{"nome": "Kubernetes", "categoria_sugerida": None},
+	]
+	assert recebidos[0][1] < len(pedacos)
+
+
+def test_transmitir_habilidades_nao_usa_a_sessao_na_leitura_do_fluxo(monkeypatch, session):
+	"""A tarefa que lê o fluxo converte com o motor carregado antes, sem tocar na sessão que o consumidor usa ao mesmo tempo."""
+	adiciona_padrao(session, r"^k8s$", "Kubernetes")
+	texto = json.dumps({"habilidades": [{"nome": "k8s", "categoria": "devops"}]})
+	sessoes = []
+	converter = extracao._converter_item_habilidade
+
+	def converter_espiao(item, categorias_lista, sessao, motor=None):
+		sessoes.append(sessao)
+		return converter(item, categorias_lista, sessao, motor)
+
+	class Evento:
+		def __init__(self, **campos):
+			self.__dict__.update(campos)
+
+	class FakeResponses:
+		async def create(self, stream=False, **kwargs):
+			async def fluxo():
+				yield Evento(type="response.output_text.delta", delta=texto)
+				yield Evento(type="response.completed", response=Evento(usage=None))
+			return fluxo()
+
+	async def cenario():
+		fake = type("Cliente", (), {"responses": FakeResponses()})()
+		monkeypatch.setattr(extracao, "obter_cliente_openai_async", lambda: (fake, asyncio.Semaphore(1)))
+		return [item async for item in extracao.transmitir_habilidades_descricao("vaga de infraestrutura", session=session, modo="llm")]
+
+	monkeypatch.setattr(extracao, "_converter_item_habilidade", converter_espiao)
+	assert asyncio.run(cenario()) == [{"nome": "Kubernetes", "categoria_sugerida": None}]
+	assert sessoes[0] is None  # conversão feita pela tarefa de leitura
+
+
+@pytest.fixture
+def resiliencia_rapida(monkeypatch):
+	"""Política sem espera entre tentativas, prazo curto e circuito fechado para os testes de falha do modelo."""
+	from app.utils.resiliencia import DisjuntorCircuito, PoliticaRetentativa
+
+	monkeypatch.setattr(extracao, "politica_openai", PoliticaRetentativa(tentativas=3, base=0))
+	monkeypatch.setattr(extracao, "disjuntor_openai", DisjuntorCircuito("openai", limite_falhas=3, tempo_recuperacao=60))
+	monkeypatch.setattr(extracao, "OPENAI_TIMEOUT_SEGUNDOS", 0.3)
+	extracao.reiniciar_metricas_extracao()
+
+
+def test_transmitir_habilidades_limita_duracao_total_do_fluxo(monkeypatch, session, resiliencia_rapida):
+	"""Fluxo que goteja além do prazo total é interrompido, conta como falha no circuito e não prende o semáforo."""
+	from app.utils.resiliencia import DisjuntorCircuito
+
+	adiciona_categoria(session, "DevOps")
+	texto = json.dumps({"habilidades": [{"nome": "docker", "categoria": "devops"}, {"nome": "kubernetes", "categoria": "nuvem"}]})
+
+	class Evento:
+		def __init__(self, **campos):
+			self.__dict__.update(campos)
+
+	class FakeResponses:
+		def __init__(self, pausa):
+			self.pausa = pausa
+
+		async def create(self, stream=False, **kwargs):
+			async def fluxo():
+				for i in range(0, len(texto), 5):
+					if i > texto.index("kubernetes"):  # a primeira habilidade chega logo; o resto goteja
+						await asyncio.sleep(self.pausa)
+					yield Evento(type="response.output_text.delta", delta=texto[i:i + 5])
+				yield Evento(type="response.completed", response=Evento(usage=None))
+			return fluxo()
+
+	async def cenario():
+		semaforo = asyncio.Semaphore(1)
+		lento = type("Cliente", (), {"responses": FakeResponses(0.2)})()
+		monkeypatch.setattr(extracao, "obter_cliente_openai_async", lambda: (lento, semaforo))
+		recebidos = []
+		with pytest.raises(TimeoutError):  # nenhuma pausa passa do prazo de 0.3s, mas a soma passa
+			async for item in extracao.transmitir_habilidades_descricao("vaga de infraestrutura", modo="llm"):
+				recebidos.append(item)
+		assert extracao.disjuntor_openai.estado == "aberto" and not semaforo.locked()
+
+		# consumidor lento não segura o slot: o fluxo termina de ser lido enquanto o primeiro item é processado
+		extracao.disjuntor_openai.reiniciar()
+		rapido = type("Cliente", (), {"responses": FakeResponses(0)})()
+		monkeypatch.setattr(extracao, "obter_cliente_openai_async", lambda: (rapido, semaforo))
+		gerador = extracao.transmitir_habilidades_descricao("vaga de infraestrutura", modo="llm")
+		primeiro = await gerador.__anext__()
+		await asyncio.sleep(0.1)
+		livre = not semaforo.locked()
+		restantes = [item async for item in gerador]
+		return recebidos, livre, [primeiro] + restantes
+
+	monkeypatch.setattr(extracao, "disjuntor_openai", DisjuntorCircuito("openai", limite_falhas=1, tempo_recuperacao=60))
+	recebidos, livre, itens = asyncio.run(cenario())
+	assert recebidos == [{"nome": "Docker", "categoria_sugerida": None}]
+	assert livre and [item["nome"] for item in itens] == ["Docker", "Kubernetes"]
+
+
+def test_extracao_repete_erros_transitorios_e_distingue_vazio_de_falha(monkeypatch, session, resiliencia_rapida):
+	"""Erros 5xx são repetidos até a resposta; resposta sem habilidades é vazia sem falha; erro 400 não é repetido."""
+	monkeypatch.setattr(extracao, "OPENAI_TIMEOUT_SEGUNDOS", 5)  # só erros de status aqui; a primeira conexão do cliente pode passar do prazo curto
+	texto = json.dumps({"habilidades": [{"nome": "docker", "categoria": "devops"}]})
+	with servidor_responses_fake([{"status": 503}, {"status": 500}, {"texto": texto}, {}, {"status": 400}]) as (url, chamadas):
+		monkeypatch.setenv("OPENAI_BASE_URL", url)
+		itens = extrair("vaga de infraestrutura", session=session, modo="llm")
+		assert itens == [{"nome": "Docker", "categoria_sugerida": None}] and not itens.falhou
+		assert len(chamadas) == 3
+
+		vazio = extrair("vaga sem requisitos", session=session, modo="llm")
+		assert vazio == [] and vazio.falha is None
+
+		invalida = extrair("vaga com erro de requisição", session=session, modo="llm")
+		assert invalida == [] and invalida.falha == "erro"
+		assert len(chamadas) == 5
+
+	resumo = extracao.resumo_metricas_extracao()
+	assert resumo["resiliencia"]["retentativas"] == 2
+	assert resumo["resiliencia"]["circuito"] == {"estado": "fechado", "falhas_seguidas": 0}
+
+
+def test_extracao_com_prazo_esgotado_abre_circuito_e_falha_rapido(monkeypatch, session, resiliencia_rapida):
+	"""Upstream lento estoura o prazo de cada tentativa; após o limite de falhas o circuito recusa sem chamar o modelo."""
+	import time
+
+	with servidor_responses_fake([{"atraso": 1}] * 3) as (url, chamadas):
+		monkeypatch.setenv("OPENAI_BASE_URL", url)
+
+		async def cenario():
+			try:
+				lenta = await extracao.extrair_habilidades_descricao_async("vaga de dados", modo="llm")
+				inicio = time.perf_counter()
+				recusada = await extracao.extrair_habilidades_descricao_async("outra vaga de dados", modo="llm")
+				return lenta, recusada, time.perf_counter() - inicio
+			finally:
+				await extracao.fechar_cliente_openai_async()
+
+		lenta, recusada, duracao = asyncio.run(cenario())
+
+	assert lenta == [] and lenta.falha == "tempo_esgotado"
+	assert recusada == [] and recusada.falha == "circuito_aberto"
+	assert len(chamadas) == 3 and duracao < 0.1
+	assert extracao.disjuntor_openai.estado == "aberto"
+	assert extracao.resumo_metricas_extracao()["resiliencia"]["recusadas_circuito"] == 1
+	com_sessao = extrair("mais uma vaga de dados", session=session, modo="llm")
+	assert com_sessao.falha == "circuito_aberto"
+
+
+
+def test_dividir_descricao_em_pedacos_sobrepostos():
+	"""Pedaços têm no máximo o tamanho pedido, repetem a sobreposição e cobrem o texto inteiro; textos curtos não mudam."""
+	texto = " ".join(f"p{i}" for i in range(24))
+	pedacos = extracao.dividir_descricao(texto, tamanho=10, sobreposicao=3)
+	assert [p.split()[0] for p in pedacos] == ["p0", "p7", "p14"]
+	assert pedacos[0].split()[-3:] == pedacos[1].split()[:3]
+	assert pedacos[-1].split()[-1] == "p23" and all(len(p.split()) <= 10 for p in pedacos)
+	assert extracao.dividir_descricao("Vaga Curta", tamanho=10) == ["Vaga Curta"]
+	assert extracao.dividir_descricao(texto, tamanho=0) == [texto]
+
+
+def test_extracao_em_pedacos_paralela_mescla_e_guarda_no_cache(monkeypatch, session):
+	"""Descrição longa vira pedaços consultados ao mesmo tempo; habilidades repetidas entre pedaços são mescladas."""
+	import time
+
+	monkeypatch.setattr(extracao, "EXTRACAO_PALAVRAS_POR_PEDACO", 20)
+	monkeypatch.setattr(extracao, "EXTRACAO_SOBREPOSICAO_PALAVRAS", 4)
+	adiciona_categoria(session, "DevOps")
+	descricao = " ".join(["docker"] + ["texto"] * 30 + ["kubernetes"] + ["texto"] * 20)
+	prompts = []
+
+	class Pedacos:
+		def __init__(self):
+			self.responses = self
+
+		async def create(self, **kwargs):
+			prompts.append(kwargs["input"])
+			await asyncio.sleep(0.2)
+			trecho = kwargs["input"].split("Texto da vaga:\n")[1]
+			habilidades = [{"nome": nome, "categoria": "devops" if nome == "docker" else None} for nome in ("docker", "kubernetes") if nome in trecho]
+			habilidades.append({"nome": "Docker"})  # repetida em todos os pedaços
+			return type("Resp", (), {"output_text": json.dumps({"habilidades": habilidades})})()
+
+	cliente = Pedacos()
+	inicio = time.perf_counter()
+	itens = extrair(descricao, session=session, cliente=cliente, modo="llm")
+	duracao = time.perf_counter() - inicio
+	assert len(prompts) == 3 and duracao < 0.5  # acompanha o pedaço mais lento, não a soma
+	assert itens == [
+		{"nome": "Docker", "categoria_sugerida": "DevOps"},
+		{"nome": "Kubernetes", "categoria_sugerida": None},
+	] and not itens.falhou
+	# a resposta mesclada fica no cache: a mesma descrição não chama o modelo de novo
+	assert extrair(descricao, session=session, cliente=cliente, modo="llm") == itens
+	assert len(prompts) == 3
+
+
+def test_extracao_em_pedacos_assincrona_com_falha_parcial(monkeypatch):
+	"""No caminho assíncrono os pedaços rodam juntos; falha em um deles mantém os demais e marca o resultado como falho."""
+	import time
+
+	monkeypatch.setattr(extracao, "EXTRACAO_PALAVRAS_POR_PEDACO", 10)
+	monkeypatch.setattr(extracao, "EXTRACAO_SOBREPOSICAO_PALAVRAS", 0)
+	descricao = " ".join(["python"] + ["texto"] * 9 + ["erro"] + ["texto"] * 9 + ["golang"] + ["texto"] * 9)
+
+	class FakeResponses:
+		async def create(self, **kwargs):
+			await asyncio.sleep(0.2)
+			trecho = kwargs["input"].split("Texto da vaga:\n")[1]
+			if "erro" in trecho:
+				raise ValueError("resposta inválida")
+			return type("Resp", (), {"output_text": json.dumps({"habilidades": [n for n in ("python", "golang") if n in trecho]})})()
+
+	async def cenario():
+		fake = type("Cliente", (), {"responses": FakeResponses()})()
+		monkeypatch.setattr(extracao, "obter_cliente_openai_async", lambda: (fake, asyncio.Semaphore(4)))
+		inicio = time.perf_counter()
+		itens = await extracao.extrair_habilidades_descricao_async(descricao, modo="llm")
+		return itens, time.perf_counter() - inicio
+
+	itens, duracao = asyncio.run(cenario())
+	assert duracao < 0.5
+	assert [item["nome"] for item in itens] == ["Python", "Golang"] and itens.falha == "erro"
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("KEY_CRYPT", "test-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("DB_USER", "user")
+os.environ.setdefault("DB_PASSWORD", "pass")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "testdb")
+
+from openai import AsyncOpenAI
+from app.dependencies import Base
+from app.models import Vaga, VagaHabilidade
+import app.services.extracao as extracao
+from app.services.extracao import fechar_cliente_openai_async
+from app.utils.resiliencia import PoliticaRetentativa
+import app.services.extracaoLote as extracaoLote
+from app.services.extracaoLote import LimitadorPorMinuto, criar_lote, executar_lote, lote_em_execucao, obter_lote
+from tests.services.utils_test_services import cria_categoria, cria_habilidade
+
+
+@pytest.fixture(scope="function")
+def banco():
+	"""Banco SQLite em memória compartilhado entre threads (os trabalhadores do lote usam o threadpool)."""
+	engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+	Base.metadata.create_all(bind=engine)
+	SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+	db = SessionLocal()
+	try:
+		yield engine, db
+	finally:
+		db.close()
+		Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def servidor_fake():
+	"""Servidor HTTP local que imita o endpoint /v1/responses da OpenAI e registra o pico de chamadas simultâneas."""
+	estado = {"ativas": 0, "pico": 0, "chamadas": 0}
+	lock = threading.Lock()
+
+	class Handler(BaseHTTPRequestHandler):
+		def do_POST(self):
+			corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+			with lock:
+				estado["ativas"] += 1
+				estado["chamadas"] += 1
+				estado["pico"] = max(estado["pico"], estado["ativas"])
+			time.sleep(0.05)
+			with lock:
+				estado["ativas"] -= 1
+			if "falha" in corpo["input"]:
+				self.send_response(500)
+				self.end_headers()
+				return
+			texto = json.dumps({"habilidades": [{"nome": "docker", "categoria": "devops"}]})
+			resposta = json.dumps({
+				"id": "resp_1", "object": "response", "created_at": 0, "model": corpo["model"], "status": "completed",
+				"output": [{"type": "message", "id": "msg_1", "role": "assistant", "status": "completed",
+							"content": [{"type": "output_text", "text": texto, "annotations": []}]}],
+				"parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+			}).encode("utf-8")
+			self.send_response(200)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(resposta)))
+			self.end_headers()
+			self.wfile.write(resposta)
+
+		def log_message(self, *args):
+			pass
+
+	servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+	threading.Thread(target=servidor.serve_forever, daemon=True).start()
+	try:
+		yield f"http://127.0.0.1:{servidor.server_port}/v1", estado
+	finally:
+		servidor.shutdown()
+		servidor.server_close()
+
+
+def test_lote_processa_vagas_sem_habilidades_com_concorrencia_limitada(banco, servidor_fake, monkeypatch):
+	"""Lote sem ids seleciona vagas sem habilidades, respeita a concorrência e grava rascunhos e erros."""
+	engine, session = banco
+	url, estado = servidor_fake
+	monkeypatch.setattr(extracao, "politica_openai", PoliticaRetentativa(tentativas=2, base=0))
+	extracao.disjuntor_openai.reiniciar()
+	cat = cria_categoria(session, "DevOps")
+	hab = cria_habilidade(session, "Docker", cat.id)
+	vagas = [Vaga(titulo=f"V{i}", descricao=f"vaga {i} docker e nuvem publica") for i in range(4)] + [Vaga(titulo="F", descricao="vaga falha")]
+	session.add_all(vagas)
+	session.commit()
+	session.add(VagaHabilidade(vaga_id=vagas[0].id, habilidade_id=hab.id))  # já processada: fica fora do lote
+	session.commit()
+
+	lote = criar_lote(session, None, concorrencia=2, por_minuto=100)
+	situacao = obter_lote(session, lote.id)
+	assert situacao.status == "pendente" and situacao.total == 4 and situacao.pendentes == 4
+
+	async def rodar():
+		cliente = AsyncOpenAI(api_key="test", base_url=url, max_retries=0)
+		try:
+			await executar_lote(lote.id, engine, cliente=cliente)
+		finally:
+			await cliente.close()
+			await fechar_cliente_openai_async()
+
+	asyncio.run(rodar())
+	session.expire_all()
+	situacao = obter_lote(session, lote.id)
+	assert situacao.status == "concluido" and situacao.finalizado_em is not None
+	assert (situacao.total, situacao.concluidas, situacao.falhas, situacao.pendentes) == (4, 3, 1, 0)
+	assert [r.vaga_id for r in situacao.rascunhos] == [v.id for v in vagas[1:]]
+	for rascunho in situacao.rascunhos[:3]:
+		assert rascunho.status == "concluido"
+		assert rascunho.habilidades[0]["nome"] == "Docker" and rascunho.habilidades[0]["habilidade_id"] == hab.id
+	assert situacao.rascunhos[3].status == "erro" and situacao.rascunhos[3].erro
+	assert estado["chamadas"] == 5 and estado["pico"] <= 2  # o erro 500 é repetido uma vez antes de virar falha
+
+
+def test_lote_interrompido_e_finalizado_e_pode_ser_retomado(banco, monkeypatch):
+	"""Falha ao gravar um rascunho não derruba o lote: ele termina como "erro" com pendentes e é concluído ao ser retomado."""
+	engine, session = banco
+	vagas = [Vaga(titulo=f"V{i}", descricao=f"vaga {i}") for i in range(3)]
+	session.add_all(vagas)
+	session.commit()
+	lote = criar_lote(session, None, concorrencia=1, por_minuto=100)
+
+	async def extrair_fake(sessao, vaga_id, **kwargs):
+		return [{"nome": "Docker", "categoria": "DevOps"}]
+
+	gravar_original = extracaoLote._gravar_rascunho
+	def gravar_instavel(sessao, lote_id, vaga_id, *args):
+		if vaga_id == vagas[1].id:
+			raise RuntimeError("banco indisponível")
+		return gravar_original(sessao, lote_id, vaga_id, *args)
+
+	monkeypatch.setattr(extracaoLote, "extrair_habilidades_vaga_async", extrair_fake)
+	monkeypatch.setattr(extracaoLote, "_gravar_rascunho", gravar_instavel)
+	asyncio.run(executar_lote(lote.id, engine))
+	session.expire_all()
+	situacao = obter_lote(session, lote.id)
+	assert situacao.status == "erro" and situacao.finalizado_em is not None
+	assert (situacao.concluidas, situacao.pendentes) == (2, 1)
+	assert not lote_em_execucao(lote.id)
+
+	monkeypatch.setattr(extracaoLote, "_gravar_rascunho", gravar_original)
+	asyncio.run(executar_lote(lote.id, engine))
+	session.expire_all()
+	situacao = obter_lote(session, lote.id)
+	assert situacao.status == "concluido" and (situacao.concluidas, situacao.pendentes) == (3, 0)
+
+
+def test_criar_lote_ignora_ids_inexistentes(banco):
+	"""Ids informados que não existem são ignorados; lote vazio nasce concluído."""
+	_, session = banco
+	vaga = Vaga(titulo="A", descricao="desc a")
+	session.add(vaga)
+	session.commit()
+
+	lote = criar_lote(session, [vaga.id, 9999])
+	assert obter_lote(session, lote.id).total == 1
+
+	vazio = criar_lote(session, [9999])
+	assert vazio.status == "concluido"
+	assert obter_lote(session, 424242) is None
+
+
+def test_limitador_por_minuto_respeita_janela():
+	"""Com limite 2 por janela, a terceira e a quarta extrações aguardam a janela deslizar."""
+	async def rodar():
+		limitador = LimitadorPorMinuto(2, janela=0.2)
+		inicio = time.monotonic()
+		instantes = []
+		for _ in range(4):
+			await limitador.aguardar()
+			instantes.append(time.monotonic() - inicio)
+		return instantes
+
+	instantes = asyncio.run(rodar())
+	assert instantes[1] < 0.1
+	assert instantes[2] >= 0.19 and instantes[3] >= 0.19
@@ -14,6 +14,7 @@ from app.models import Categoria, Habilidade as HabilidadeModel
 from app.schemas import HabilidadeAtualizar
 from app.services.habilidade import (
 	listar_habilidades,
+	iterar_habilidades,
 	buscar_habilidade_por_id,
 	atualizar_habilidade,
 	deletar_habilidade,
@@ -46,6 +47,17 @@ def test_listar_habilidades_populado(session):
 	assert categorias == {"Dados"}
 
 
+
+def test_iterar_habilidades_equivale_listar(session):
+	"""Iteração em lotes (streaming) produz os mesmos DTOs de listar_habilidades, com o nome da categoria."""
+	cat = cria_categoria(session, "Dados")
+	for nome in ("Python", "SQL", "Spark"):
+		cria_habilidade(session, nome, cat.id)
+
+	itens = list(iterar_habilidades(session, tamanho_lote=2))
+	assert itens == listar_habilidades(session)
+	assert {i.categoria for i in itens} == {"Dados"}
+
 def test_buscar_habilidade_por_id(session):
 	"""Busca habilidade por ID e valida atributos e categoria."""
 	cat = cria_categoria(session, "Infra")
@@ -26,7 +26,14 @@ from app.services.mapeamento import (
 	agregar_oferta_por_curso,
 	agregar_demanda_por_carreira,
 	calcular_score,
+	calcular_matriz_scores,
 	montar_mapa,
+	obter_mapa_serializado,
+	relacoes_do_curso,
+	relacoes_da_carreira,
+	obter_indice_mapa,
+	montar_mapa_sql,
+	iterar_mapa,
 )
 from tests.services.utils_test_services import session as session
 from tests.services.utils_test_services import (
@@ -135,3 +142,166 @@ def test_montar_mapa_end_to_end(session):
 	assert [x["nome"] for x in r2_list] == ["Curso 1", "Curso 2"]
 	assert [x["score"] for x in r2_list] == [5.0, 3.0]
 
+
+def test_calcular_matriz_scores_equivale_calcular_score_por_par():
+	"""Matriz esparsa calculada em uma passada tem o mesmo score de calcular_score para todo par curso×carreira."""
+	import random
+	rnd = random.Random(7)
+	categorias = list(range(1, 9))
+	oferta = {
+		curso_id: {cat: float(rnd.randint(0, 6)) for cat in rnd.sample(categorias, rnd.randint(0, 4))}
+		for curso_id in range(1, 16)
+	}
+	demanda = {
+		carreira_id: {cat: float(rnd.randint(0, 9)) for cat in rnd.sample(categorias, rnd.randint(0, 5))}
+		for carreira_id in range(100, 112)
+	}
+	matriz = calcular_matriz_scores(oferta, demanda)
+	for curso_id in oferta:
+		for carreira_id in demanda:
+			esperado = calcular_score(oferta, demanda, curso_id, carreira_id)
+			assert matriz.get(curso_id, {}).get(carreira_id, 0.0) == esperado
+
+
+def test_mapa_serializado_cacheado_e_invalidado_nas_escritas(session):
+	"""Mapa serializado é reaproveitado entre chamadas e remontado (com novo ETag) após escrita em curso-conhecimento."""
+	import json
+	from app.schemas.cursoConhecimentoSchemas import CursoConhecimentoBase
+	from app.services.cursoConhecimento import criar_curso_conhecimento
+
+	cat = cria_categoria(session, "A")
+	curso = cria_curso(session, "Curso 1")
+	k1 = cria_conhecimento(session, "K1")
+	vincula_conhecimento_categoria(session, k1.id, cat.id, peso=4)
+	carreira = cria_carreira(session, "Carreira X")
+	h = cria_habilidade(session, "HA", categoria_id=cat.id)
+	vincula_carreira_habilidade(session, carreira.id, h.id, frequencia=2)
+
+	mapa = obter_mapa_serializado(session)
+	assert obter_mapa_serializado(session) is mapa
+	assert json.loads(mapa.corpo)["cursoToCarreiras"] == {str(curso.id): []}
+
+	criar_curso_conhecimento(session, CursoConhecimentoBase(curso_id=curso.id, conhecimento_id=k1.id))
+	novo = obter_mapa_serializado(session)
+	assert novo is not mapa and novo.etag != mapa.etag
+	assert json.loads(novo.corpo)["cursoToCarreiras"][str(curso.id)] == [{"id": carreira.id, "nome": "Carreira X", "score": 4.0}]
+
+
+def test_relacoes_por_entidade_equivalem_ao_mapa_completo(session):
+	"""Top-K de um curso ou carreira a partir do índice por categoria coincide com o início das listas do mapa completo."""
+	cat_a = cria_categoria(session, "A")
+	cat_b = cria_categoria(session, "B")
+	cursos = [cria_curso(session, nome) for nome in ("Curso 1", "Curso 2", "Curso 3")]
+	k1 = cria_conhecimento(session, "K1")
+	k2 = cria_conhecimento(session, "K2")
+	vincula_conhecimento_categoria(session, k1.id, cat_a.id, peso=2)
+	vincula_conhecimento_categoria(session, k2.id, cat_b.id, peso=3)
+	vincula_curso_conhecimento(session, cursos[0].id, k1.id)
+	vincula_curso_conhecimento(session, cursos[1].id, k1.id)
+	vincula_curso_conhecimento(session, cursos[1].id, k2.id)
+	carreiras = [cria_carreira(session, nome) for nome in ("Carreira X", "Carreira Y", "Carreira Z")]
+	hA = cria_habilidade(session, "HA", categoria_id=cat_a.id)
+	hB = cria_habilidade(session, "HB", categoria_id=cat_b.id)
+	vincula_carreira_habilidade(session, carreiras[0].id, hA.id, frequencia=1)
+	vincula_carreira_habilidade(session, carreiras[0].id, hB.id, frequencia=1)
+	vincula_carreira_habilidade(session, carreiras[1].id, hA.id, frequencia=4)
+
+	mapa = montar_mapa(session)
+	for curso in cursos:
+		for limite in (None, 1):
+			res = relacoes_do_curso(session, curso.id, limite=limite)
+			assert res["nome"] == curso.nome
+			assert res["relacoes"] == mapa["cursoToCarreiras"][curso.id][:limite]
+	for carreira in carreiras:
+		for limite in (None, 1):
+			res = relacoes_da_carreira(session, carreira.id, limite=limite)
+			assert res["relacoes"] == mapa["carreiraToCursos"][carreira.id][:limite]
+
+	assert relacoes_do_curso(session, 999) is None
+	assert relacoes_da_carreira(session, 999) is None
+
+
+def test_atualizacao_incremental_do_mapa_equivale_reconstrucao(session):
+	"""Escritas em curso-conhecimento, conhecimento-categoria e carreira-habilidade atualizam o estado residente por delta."""
+	import json
+	from app.schemas.cursoConhecimentoSchemas import CursoConhecimentoBase
+	from app.schemas.conhecimentoCategoriaSchemas import ConhecimentoCategoriaAtualizar
+	from app.schemas.carreiraHabilidadeSchemas import CarreiraHabilidadeBase
+	from app.services.cursoConhecimento import criar_curso_conhecimento, remover_curso_conhecimento
+	from app.services.conhecimentoCategoria import atualizar_conhecimento_categoria, remover_conhecimento_categoria
+	from app.services.carreiraHabilidade import criar_carreira_habilidade, remover_carreira_habilidade
+
+	cat_a = cria_categoria(session, "A")
+	cat_b = cria_categoria(session, "B")
+	c1 = cria_curso(session, "Curso 1")
+	c2 = cria_curso(session, "Curso 2")
+	k1 = cria_conhecimento(session, "K1")
+	k2 = cria_conhecimento(session, "K2")
+	rel_k1 = vincula_conhecimento_categoria(session, k1.id, cat_a.id, peso=2)
+	vincula_conhecimento_categoria(session, k2.id, cat_b.id, peso=3)
+	vincula_curso_conhecimento(session, c1.id, k1.id)
+	vincula_curso_conhecimento(session, c2.id, k1.id)
+	r1 = cria_carreira(session, "Carreira X")
+	r2 = cria_carreira(session, "Carreira Y")
+	hA = cria_habilidade(session, "HA", categoria_id=cat_a.id)
+	hB = cria_habilidade(session, "HB", categoria_id=cat_b.id)
+	vincula_carreira_habilidade(session, r1.id, hA.id, frequencia=2)
+
+	indice = obter_indice_mapa(session)
+	obter_mapa_serializado(session)
+
+	def confere():
+		assert obter_indice_mapa(session) is indice # atualizado por delta, sem reconstrução
+		esperado = montar_mapa(session)
+		assert indice.montar() == esperado
+		assert json.loads(obter_mapa_serializado(session).corpo)["cursoToCarreiras"] == {
+			str(k): v for k, v in esperado["cursoToCarreiras"].items()
+		}
+
+	criar_curso_conhecimento(session, CursoConhecimentoBase(curso_id=c1.id, conhecimento_id=k2.id))
+	confere()
+	criar_carreira_habilidade(session, CarreiraHabilidadeBase(carreira_id=r2.id, habilidade_id=hB.id, frequencia=5))
+	confere()
+	atualizar_conhecimento_categoria(session, rel_k1.id, ConhecimentoCategoriaAtualizar(peso=1))
+	confere()
+	remover_conhecimento_categoria(session, k2.id, cat_b.id)
+	confere()
+	remover_carreira_habilidade(session, r1.id, hA.id)
+	confere()
+	remover_curso_conhecimento(session, c2.id, k1.id)
+	confere()
+
+
+def test_montar_mapa_sql_equivale_calculo_em_memoria(session):
+	"""Scores calculados em uma consulta agregada no banco coincidem com o cálculo em Python, com min_score aplicado no banco."""
+	cat_a = cria_categoria(session, "A")
+	cat_b = cria_categoria(session, "B")
+	cursos = [cria_curso(session, nome) for nome in ("Curso 1", "Curso 2", "Curso 3")]
+	k1 = cria_conhecimento(session, "K1")
+	k2 = cria_conhecimento(session, "K2")
+	k3 = cria_conhecimento(session, "K3")
+	vincula_conhecimento_categoria(session, k1.id, cat_a.id, peso=2)
+	vincula_conhecimento_categoria(session, k2.id, cat_b.id, peso=3)
+	vincula_conhecimento_categoria(session, k3.id, cat_a.id, peso=None)
+	vincula_curso_conhecimento(session, cursos[0].id, k1.id)
+	vincula_curso_conhecimento(session, cursos[1].id, k1.id)
+	vincula_curso_conhecimento(session, cursos[1].id, k2.id)
+	vincula_curso_conhecimento(session, cursos[2].id, k3.id)
+	carreiras = [cria_carreira(session, nome) for nome in ("Carreira X", "Carreira Y", "Carreira Z")]
+	hA = cria_habilidade(session, "HA", categoria_id=cat_a.id)
+	hB = cria_habilidade(session, "HB", categoria_id=cat_b.id)
+	vincula_carreira_habilidade(session, carreiras[0].id, hA.id, frequencia=1)
+	vincula_carreira_habilidade(session, carreiras[0].id, hB.id, frequencia=2)
+	vincula_carreira_habilidade(session, carreiras[1].id, hA.id, frequencia=3)
+
+	esperado = montar_mapa(session)
+	assert montar_mapa_sql(session) == esperado
+
+	filtrado = montar_mapa_sql(session, min_score=2.0)
+	for curso in cursos:
+		assert filtrado["cursoToCarreiras"][curso.id] == [r for r in esperado["cursoToCarreiras"][curso.id] if r["score"] > 2.0]
+
+	# o fluxo NDJSON aplica o mesmo filtro às relações do mapa residente
+	registros = list(iterar_mapa(session, min_score=2.0))
+	assert [r["relacoes"] for r in registros if r["tipo"] == "curso"] == [filtrado["cursoToCarreiras"][c.id] for c in cursos]
+	assert [r["relacoes"] for r in registros if r["tipo"] == "carreira"] == [filtrado["carreiraToCursos"][c.id] for c in carreiras]
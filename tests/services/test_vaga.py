@@ -1,4 +1,5 @@
 import os
+import asyncio
 from datetime import datetime, timedelta
 
 os.environ.setdefault("KEY_CRYPT", "test-key")
@@ -76,6 +77,18 @@ def test_listar_vagas_ordem_desc_e_carreira_nome(session):
 	assert all(i.carreira_nome == carreira.nome for i in itens)
 
 
+
+def test_iterar_vagas_equivale_listar_vagas(session):
+	"""Iteração em lotes (streaming) produz os mesmos DTOs e ordem de listar_vagas, inclusive vaga sem carreira."""
+	carreira = criar_carreira(session, "Frontend")
+	v1 = vaga_service.criar_vaga(session, VagaBase(titulo="A", descricao="desc a", carreira_id=carreira.id))
+	vaga_service.criar_vaga(session, VagaBase(titulo="B", descricao="desc b"))
+	v1_db = session.query(Vaga).filter(Vaga.id == v1.id).first()
+	v1_db.criado_em = datetime(2000, 1, 1)
+	session.commit()
+
+	assert list(vaga_service.iterar_vagas(session, tamanho_lote=1)) == vaga_service.listar_vagas(session)
+
 def test_confirmar_habilidades_vaga_cria_atualiza_relaciona(session):
 	"""Confirma habilidades criando, atualizando e relacionando com vaga e carreira."""
 	cat_backend = criar_categoria(session, "Backend")
@@ -111,6 +124,45 @@ def test_confirmar_habilidades_vaga_cria_atualiza_relaciona(session):
 	assert all((r.frequencia or 0) == 1 for r in rels_ch)
 
 
+def test_confirmar_habilidades_vaga_em_lote_incrementa_uma_vez_por_vaga(session):
+	"""Confirmação usa consultas constantes; repetir a confirmação não duplica relações nem frequências."""
+	from sqlalchemy import event
+
+	cat = criar_categoria(session, "Dados")
+	carreira = criar_carreira(session, "Analytics")
+	existente = criar_habilidade(session, "SQL", cat.id)
+	v1 = vaga_service.criar_vaga(session, VagaBase(titulo="A1", descricao="analista um", carreira_id=carreira.id))
+	v2 = vaga_service.criar_vaga(session, VagaBase(titulo="A2", descricao="analista dois", carreira_id=carreira.id))
+	consultas = []
+
+	def contar(*args):
+		consultas.append(1)
+
+	def confirmar(vaga_id, itens):
+		consultas.clear()
+		event.listen(session.bind, "before_cursor_execute", contar)
+		try:
+			return vaga_service.confirmar_habilidades_vaga(session, vaga_id, itens)
+		finally:
+			event.remove(session.bind, "before_cursor_execute", contar)
+
+	poucos = [{"nome": "sql"}, {"nome": "Airflow", "categoria_sugerida": "dados"}]
+	resp = confirmar(v1.id, poucos)
+	consultas_poucos = len(consultas)
+	assert resp["habilidades_criadas"] == ["Airflow"] and resp["habilidades_ja_existiam"] == ["sql"]
+
+	confirmar(v1.id, poucos)  # repetida: relações já existem
+	muitos = [{"nome": f"Ferramenta {i}", "categoria_sugerida": "Dados"} for i in range(30)] + [{"habilidade_id": existente.id, "nome": "SQL"}]
+	resp = confirmar(v2.id, muitos)
+	assert len(consultas) == consultas_poucos  # mesma quantidade de comandos para 2 ou 31 habilidades
+	assert len(resp["habilidades_criadas"]) == 30
+
+	freq = dict(session.query(Habilidade.nome, CarreiraHabilidade.frequencia).join(CarreiraHabilidade, CarreiraHabilidade.habilidade_id == Habilidade.id).all())
+	assert freq["SQL"] == 2 and freq["Airflow"] == 1 and freq["Ferramenta 0"] == 1
+	assert session.query(VagaHabilidade).filter(VagaHabilidade.vaga_id == v1.id).count() == 2
+	assert session.query(Habilidade).filter(Habilidade.nome == "Airflow").one().categoria_id == cat.id
+
+
 def test_confirmar_habilidades_vaga_categoria_pendente_created(session):
 	"""Cria categoria pendente quando sugestão não existe e vincula habilidade."""
 	carreira = criar_carreira(session, "Data")
@@ -193,16 +245,16 @@ def test_extrair_habilidades_vaga_preview(monkeypatch, session):
 	front = criar_categoria(session, "Frontend")
 	py = criar_habilidade(session, "Python", back.id)
 	v = vaga_service.criar_vaga(session, VagaBase(titulo="Dev", descricao="Python e React", carreira_id=None))
-	def fake_extrair(descricao: str, session=None):
+	async def fake_extrair(descricao: str, session=None, **kwargs):
 		return [
 			{"nome": "Python", "categoria_sugerida": "Backend"},
 			{"nome": "React", "categoria_sugerida": "Frontend"},
 			{"nome": "Python", "categoria_sugerida": "Backend"},
 		]
 
-	monkeypatch.setattr(vaga_service, "extrair_habilidades_descricao", fake_extrair)
+	monkeypatch.setattr(vaga_service, "extrair_habilidades_descricao_async", fake_extrair)
 
-	itens = vaga_service.extrair_habilidades_vaga(session, v.id)
+	itens = asyncio.run(vaga_service.extrair_habilidades_vaga_async(session, v.id))
 	assert len(itens) == 2
 	por_nome = {i["nome"]: i for i in itens}
 
@@ -216,7 +268,39 @@ def test_extrair_habilidades_vaga_preview(monkeypatch, session):
 	assert por_nome["React"]["categoria_nome"] == "Frontend"
 
 
+def test_montar_preview_resolve_em_consultas_constantes_sem_acento(session):
+	"""Preview resolve nomes e categorias sem diferenciar acentos/maiúsculas e com o mesmo número de consultas para 2 ou 40 itens."""
+	from sqlalchemy import event
+
+	dados = criar_categoria(session, "Análise de Dados")
+	criar_habilidade(session, "Pandas", dados.id)
+	criar_habilidade(session, "Power BI", dados.id)
+	consultas = []
+
+	def contar(*args):
+		consultas.append(1)
+
+	def resolver(itens):
+		consultas.clear()
+		event.listen(session.bind, "before_cursor_execute", contar)
+		try:
+			return vaga_service._montar_preview(session, itens)
+		finally:
+			event.remove(session.bind, "before_cursor_execute", contar)
+
+	resolver([{"nome": "Pandas"}])  # primeira chamada carrega catálogo e regras de normalização
+	poucos = resolver([{"nome": "PANDAS", "categoria_sugerida": None}, {"nome": "Polars", "categoria_sugerida": "analise de dados"}])
+	consultas_poucos = len(consultas)
+	muitos = resolver([{"nome": f"Ferramenta {i}", "categoria_sugerida": "ANÁLISE DE DADOS"} for i in range(38)] + [{"nome": "power  bi"}, {"nome": "pandas"}])
+	assert len(consultas) == consultas_poucos <= 2
+
+	assert poucos[0]["nome"] == "Pandas" and poucos[0]["categoria_nome"] == "Análise de Dados"
+	assert poucos[1]["habilidade_id"] == "" and poucos[1]["categoria_id"] == dados.id
+	assert len(muitos) == 40 and {m["categoria_id"] for m in muitos} == {dados.id}
+	assert muitos[-2]["nome"] == "Power BI" and muitos[-2]["habilidade_id"] != ""
+
+
 def test_extrair_habilidades_vaga_vaga_inexistente(session):
 	"""Retorna lista vazia ao extrair habilidades de uma vaga inexistente."""
-	assert vaga_service.extrair_habilidades_vaga(session, 9999) == []
+	assert asyncio.run(vaga_service.extrair_habilidades_vaga_async(session, 9999)) == []
 
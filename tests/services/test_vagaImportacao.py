@@ -0,0 +1,70 @@
+import io
+import os
+import json
+
+os.environ.setdefault("KEY_CRYPT", "test-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("DB_USER", "user")
+os.environ.setdefault("DB_PASSWORD", "pass")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "testdb")
+
+import pytest
+
+from app.models import Vaga
+from app.services.vagaImportacao import detectar_formato, importar_vagas
+from tests.services.utils_test_services import session as session
+from tests.services.utils_test_services import cria_carreira, criar_vaga_raw
+
+
+def test_importar_csv_em_lotes_marca_status_por_linha(session):
+	"""CSV é gravado em lotes com descrição padronizada; duplicadas (no banco, no lote ou em lotes anteriores) e inválidas são apontadas por linha."""
+	carreira = cria_carreira(session, "Infra")
+	criar_vaga_raw(session, "Antiga", "vaga existente")
+	conteudo = (
+		"titulo,descricao,carreira_id\n"
+		"Dev,Vaga Existente,\n"
+		f'Ops,"Docker, Kubernetes\ne AWS",{carreira.id}\n'
+		"Sem descricao,,\n"
+		"Repetida,docker kubernetes e aws,\n"
+		"Carreira errada,Outra vaga,999\n"
+		"Backend,Python e FastAPI,\n"
+		"Backend 2,python e fastapi!,\n"
+	)
+	resultado = importar_vagas(session, io.BytesIO(conteudo.encode("utf-8")), "csv", tamanho_lote=2)
+
+	assert (resultado.total, resultado.inseridas, resultado.duplicadas, resultado.invalidas) == (7, 2, 3, 2)
+	assert [(l.linha, l.status) for l in resultado.linhas] == [
+		(2, "duplicada"), (4, "inserida"), (5, "invalida"), (6, "duplicada"), (7, "invalida"), (8, "inserida"), (9, "duplicada"),
+	]
+	ops = session.query(Vaga).filter(Vaga.id == resultado.linhas[1].id).one()
+	assert ops.descricao == "docker kubernetes e aws" and ops.carreira_id == carreira.id
+	assert session.query(Vaga).count() == 3
+
+
+def test_importar_jsonl_aponta_linhas_invalidas(session):
+	"""JSONL aceita um objeto por linha, ignora linhas em branco e marca JSON inválido ou campos ausentes."""
+	linhas = [
+		json.dumps({"titulo": "A", "descricao": "Análise de dados com SQL"}),
+		"",
+		"nao e json",
+		json.dumps(["lista"]),
+		json.dumps({"titulo": "Sem descrição"}),
+	]
+	resultado = importar_vagas(session, io.BytesIO("\n".join(linhas).encode("utf-8")), "jsonl")
+
+	assert [(l.linha, l.status) for l in resultado.linhas] == [(1, "inserida"), (3, "invalida"), (4, "invalida"), (5, "invalida")]
+	assert resultado.linhas[2].erro == "A linha deve conter um objeto JSON"
+	assert "descricao" in resultado.linhas[3].erro
+	assert session.query(Vaga.descricao).scalar() == "analise de dados com sql"
+
+
+def test_detectar_formato_e_formato_invalido(session):
+	"""Formato vem da extensão ou do Content-Type; formatos desconhecidos são recusados."""
+	assert detectar_formato("vagas.CSV", None) == "csv"
+	assert detectar_formato("upload", "application/x-ndjson") == "jsonl"
+	assert detectar_formato("vagas.txt", "text/plain") is None
+	with pytest.raises(ValueError):
+		importar_vagas(session, io.BytesIO(b""), "xml")
@@ -1,7 +1,13 @@
 import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Garantir variáveis mínimas exigidas por app.dependencies
 os.environ.setdefault("KEY_CRYPT", "test-key")
@@ -38,7 +44,11 @@ from app.schemas import (
 
 @pytest.fixture(scope="function")
 def session():
-    engine = create_engine("sqlite+pysqlite:///:memory:", echo=False, future=True)
+    # StaticPool: uma única conexão, para que o threadpool (run_in_threadpool) enxergue o mesmo banco em memória
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:", echo=False, future=True,
+        connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
@@ -145,18 +155,68 @@ def adiciona_padrao(session, regex: str, padronizado: str) -> Normalizacao:
 
 
 def fake_openai_factory(payload):
-    """Retorna uma classe substituta de OpenAI que devolve `payload` ao chamar `responses.create()`."""
+    """Retorna uma classe substituta de AsyncOpenAI que devolve `payload` ao aguardar `responses.create()`."""
     class DummyResponses:
-        def create(self, **kwargs):
+        async def create(self, **kwargs):
             return payload
 
     class DummyClient:
-        def __init__(self, api_key=None):
+        def __init__(self):
             self.responses = DummyResponses()
 
     return DummyClient
 
 
+@contextmanager
+def servidor_responses_fake(roteiro: list[dict] | None = None, texto_padrao: str = '{"habilidades": []}'):
+    """Sobe um servidor HTTP local que imita POST /v1/responses da OpenAI e devolve (base_url, chamadas).
+
+    Cada requisição consome o próximo passo do roteiro: {"atraso": s} espera antes de responder,
+    {"status": 503} responde com erro e {"texto": "..."} define o output_text; sem passos, responde texto_padrao.
+    """
+    roteiro = list(roteiro or [])
+    chamadas: list[dict] = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                chamadas.append(corpo)
+                passo = roteiro.pop(0) if roteiro else {}
+            time.sleep(passo.get("atraso", 0))
+            if passo.get("status", 200) != 200:
+                self.send_response(passo["status"])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            resposta = json.dumps({
+                "id": "resp_1", "object": "response", "created_at": 0, "model": corpo["model"], "status": "completed",
+                "output": [{"type": "message", "id": "msg_1", "role": "assistant", "status": "completed",
+                            "content": [{"type": "output_text", "text": passo.get("texto", texto_padrao), "annotations": []}]}],
+                "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+            }).encode("utf-8")
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(resposta)))
+                self.end_headers()
+                self.wfile.write(resposta)
+            except (BrokenPipeError, ConnectionResetError):  # cliente desistiu por tempo esgotado
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_port}/v1", chamadas
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
 def usuario_payload(
     nome: str = "Usuário Teste",
     email: str = "user@test.com",
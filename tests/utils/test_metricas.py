@@ -0,0 +1,66 @@
+"""
+Testes dos utilitários de métricas (app.utils.metricas)
+
+- test_histograma_percentis_por_faixa:
+	Confere a contagem acumulada por faixa e a estimativa de percentis pelo
+	limite superior da faixa (acima do maior limite, usa o máximo observado).
+
+- test_contadores_incrementam_e_reiniciam:
+	Contadores nomeados começam em zero, acumulam valores e são zerados.
+
+- test_cronometrar_funcoes_sincronas_e_assincronas:
+	O decorador registra a duração de funções síncronas e assíncronas, inclusive
+	quando a chamada termina em exceção.
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.metricas import Contadores, Histograma, cronometrar
+
+
+def test_histograma_percentis_por_faixa():
+	h = Histograma([1, 2, 4])
+	for valor in (0.5, 0.7, 1.5, 3, 10):
+		h.registrar(valor)
+	resumo = h.resumo()
+	assert resumo["faixas"] == {"1": 2, "2": 3, "4": 4, "+Inf": 5}
+	assert (resumo["p50"], resumo["p95"], resumo["maximo"]) == (2, 10, 10)
+	assert resumo["media"] == 3.14
+
+	h.reiniciar()
+	assert h.resumo()["total"] == 0 and h.resumo()["p50"] is None
+
+
+def test_contadores_incrementam_e_reiniciam():
+	c = Contadores()
+	c.incrementar("a")
+	c.incrementar("a", 4)
+	assert c.valor("a") == 5 and c.valor("b") == 0
+	assert c.resumo() == {"a": 5}
+	c.reiniciar()
+	assert c.resumo() == {}
+
+
+def test_cronometrar_funcoes_sincronas_e_assincronas():
+	h = Histograma([0.5])
+
+	@cronometrar(h)
+	def soma(a, b):
+		return a + b
+
+	@cronometrar(h)
+	async def espera():
+		await asyncio.sleep(0)
+		return "ok"
+
+	@cronometrar(h)
+	def falha():
+		raise RuntimeError("boom")
+
+	assert soma(1, 2) == 3
+	assert asyncio.run(espera()) == "ok"
+	with pytest.raises(RuntimeError):
+		falha()
+	assert h.resumo()["total"] == 3
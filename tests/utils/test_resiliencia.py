@@ -0,0 +1,104 @@
+"""
+Testes dos utilitários de resiliência (app.utils.resiliencia)
+
+- test_disjuntor_abre_recusa_e_testa_uma_chamada:
+	Com um relógio controlado, o disjuntor abre ao atingir o limite de falhas,
+	recusa chamadas durante o tempo de recuperação, deixa passar uma única
+	chamada de teste e fecha (ou reabre) conforme o resultado.
+
+- test_backoff_com_jitter_respeita_teto:
+	A espera é sorteada entre zero e min(maximo, base * 2**tentativa).
+
+- test_chamar_com_resiliencia_repete_so_falhas_transitorias:
+	Falhas transitórias são repetidas até o sucesso; falhas permanentes são
+	repassadas sem nova tentativa e não contam para o circuito.
+
+- test_chamar_com_resiliencia_async_aplica_prazo:
+	Tentativas assíncronas que passam do prazo viram TimeoutError e são
+	repetidas até o circuito abrir; a tentativa seguinte é recusada.
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.resiliencia import CircuitoAberto, DisjuntorCircuito, PoliticaRetentativa, chamar_com_resiliencia, chamar_com_resiliencia_async
+
+
+def test_disjuntor_abre_recusa_e_testa_uma_chamada():
+	agora = [0.0]
+	d = DisjuntorCircuito("api", limite_falhas=2, tempo_recuperacao=10, relogio=lambda: agora[0])
+	d.verificar()
+	d.registrar_falha()
+	assert d.estado == "fechado"
+	d.registrar_falha()
+	assert d.estado == "aberto"
+	with pytest.raises(CircuitoAberto) as erro:
+		d.verificar()
+	assert erro.value.reabre_em == 10
+
+	agora[0] = 10.0
+	assert d.estado == "meio_aberto"
+	d.verificar()  # chamada de teste
+	with pytest.raises(CircuitoAberto):
+		d.verificar()  # demais esperam o resultado do teste
+	d.registrar_falha()
+	assert d.estado == "aberto"
+
+	agora[0] = 20.0
+	d.verificar()
+	d.registrar_sucesso()
+	assert d.resumo() == {"estado": "fechado", "falhas_seguidas": 0}
+
+
+def test_backoff_com_jitter_respeita_teto():
+	assert PoliticaRetentativa(base=0.5, maximo=8, sorteio=lambda: 1.0).atraso(2) == 2.0
+	assert PoliticaRetentativa(base=0.5, maximo=8, sorteio=lambda: 1.0).atraso(10) == 8
+	assert PoliticaRetentativa(base=0.5, maximo=8, sorteio=lambda: 0.25).atraso(1) == 0.25
+	assert PoliticaRetentativa(tentativas=0).tentativas == 1
+
+
+def test_chamar_com_resiliencia_repete_so_falhas_transitorias():
+	disjuntor = DisjuntorCircuito("api", limite_falhas=5)
+	politica = PoliticaRetentativa(tentativas=3, base=0)
+	respostas = [ConnectionError("queda"), ConnectionError("queda"), "ok"]
+	retentativas = []
+
+	def instavel():
+		resposta = respostas.pop(0)
+		if isinstance(resposta, Exception):
+			raise resposta
+		return resposta
+
+	transitorio = lambda exc: isinstance(exc, ConnectionError)
+	assert chamar_com_resiliencia(instavel, disjuntor, politica, transitorio, retentativas.append) == "ok"
+	assert len(retentativas) == 2 and disjuntor.resumo()["falhas_seguidas"] == 0
+
+	chamadas = []
+
+	def invalida():
+		chamadas.append(1)
+		raise ValueError("requisição inválida")
+
+	with pytest.raises(ValueError):
+		chamar_com_resiliencia(invalida, disjuntor, politica, transitorio)
+	assert len(chamadas) == 1 and disjuntor.estado == "fechado"
+
+
+def test_chamar_com_resiliencia_async_aplica_prazo():
+	disjuntor = DisjuntorCircuito("api", limite_falhas=2)
+	chamadas = []
+
+	async def lenta():
+		chamadas.append(1)
+		await asyncio.sleep(1)
+
+	async def cenario():
+		await chamar_com_resiliencia_async(
+			lenta, disjuntor, PoliticaRetentativa(tentativas=3, base=0), lambda exc: isinstance(exc, TimeoutError), prazo=0.05
+		)
+
+	# a segunda falha abre o circuito: a terceira tentativa é recusada sem chamar a função
+	with pytest.raises(CircuitoAberto):
+		asyncio.run(cenario())
+	assert len(chamadas) == 2